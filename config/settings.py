@@ -57,6 +57,7 @@ MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "core.middleware.ConcurrencyLimitMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -118,6 +119,20 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashers (the first one is used for owner accounts, the voter hashers are
+# selected per instance through Instance.instance_password_policy)
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "live.hashers.VoterPBKDF2PasswordHasher",
+    "live.hashers.VoterScryptPasswordHasher",
+]
+VOTER_PBKDF2_ITERATIONS = int(os.environ.get('VOTER_PBKDF2_ITERATIONS', 10000))
+VOTER_SCRYPT_WORK_FACTOR = int(os.environ.get('VOTER_SCRYPT_WORK_FACTOR', 2 ** 11))
+
 # Internationalization
 LANGUAGE_CODE = "en-us"
 
@@ -132,6 +147,46 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# File answers: the uploaded files are stored (content addressed) through the 'answer_files'
+# storage, any Django storage backend can be used, the partial uploads are always kept locally
+
+ANSWER_FILES_ROOT = os.environ.get('ANSWER_FILES_ROOT', str(BASE_DIR / 'answer_files'))
+FILE_UPLOAD_PARTIAL_ROOT = os.environ.get('FILE_UPLOAD_PARTIAL_ROOT', os.path.join(ANSWER_FILES_ROOT, 'partial'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'answer_files': {
+        'BACKEND': os.environ.get('ANSWER_FILES_STORAGE', 'data.storage.LocalFileSystemStorage'),
+        'OPTIONS': {'location': os.path.join(ANSWER_FILES_ROOT, 'blobs')},
+    },
+}
+
+# Maximum size of an uploaded file, chunk size suggested to the clients and hours an unused
+# upload is kept for (expired uploads and unreferenced files are removed by purge_uploads)
+
+FILE_UPLOAD_MAX_SIZE = int(os.environ.get('FILE_UPLOAD_MAX_SIZE', 50 * 1024 * 1024))
+FILE_UPLOAD_CHUNK_SIZE = int(os.environ.get('FILE_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024))
+FILE_UPLOAD_EXPIRY_HOURS = int(os.environ.get('FILE_UPLOAD_EXPIRY_HOURS', 24))
+
+# Drafts: maximum size in bytes of the saved answers of a draft and days an unsaved draft is
+# kept for (expired drafts are removed by purge_drafts)
+
+DRAFT_MAX_SIZE = int(os.environ.get('DRAFT_MAX_SIZE', 1024 * 1024))
+DRAFT_EXPIRY_DAYS = int(os.environ.get('DRAFT_EXPIRY_DAYS', 30))
+
+# File answer downloads: sent by the application (FileResponse, with range requests) or delegated
+# to the front web server with FILE_DOWNLOAD_ACCEL set to 'x-accel' (nginx internal location
+# FILE_DOWNLOAD_ACCEL_PREFIX aliased to the blobs directory) or 'x-sendfile' (Apache, lighttpd;
+# the storages without local paths fall back to FileResponse)
+
+FILE_DOWNLOAD_ACCEL = os.environ.get('FILE_DOWNLOAD_ACCEL', '')
+FILE_DOWNLOAD_ACCEL_PREFIX = os.environ.get('FILE_DOWNLOAD_ACCEL_PREFIX', '/protected/answer-files/')
+
 # Default primary key field type
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -142,7 +197,14 @@ AUTH_USER_MODEL = "core.User"
 
 # Email settings
 
-EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+# Emails are queued in the outbox (core.OutboxMessage) and delivered by the send_queued_mail
+# command through OUTBOX_EMAIL_BACKEND, in batches over one connection with retries
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'core.mail.QueuedEmailBackend')
+OUTBOX_EMAIL_BACKEND = os.environ.get('OUTBOX_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+OUTBOX_RETRY_DELAY = int(os.environ.get('OUTBOX_RETRY_DELAY', 60))
+OUTBOX_MAX_RETRY_DELAY = int(os.environ.get('OUTBOX_MAX_RETRY_DELAY', 3600))
 MAILER_EMAIL_BACKEND = os.environ.get('MAILER_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
@@ -151,6 +213,17 @@ EMAIL_PORT = os.environ.get('EMAIL_PORT', 587)
 EMAIL_USE_SSL = True
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Voter invitations: access link (relative to PROTOCOL://DOMAIN) and validity of its pre-signed token
+
+VOTER_INVITATION_URL = os.environ.get('VOTER_INVITATION_URL', 'vote/{hash}/?token={token}')
+VOTER_INVITATION_TOKEN_DAYS = int(os.environ.get('VOTER_INVITATION_TOKEN_DAYS', 7))
+
+# Admin changelists of the huge tables: above the threshold the unfiltered count is the
+# table statistics estimate, filtered counts stop at the limit
+
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', 10000))
+ADMIN_COUNT_LIMIT = int(os.environ.get('ADMIN_COUNT_LIMIT', 100000))
+
 # Authentication backends
 
 AUTHENTICATION_BACKENDS = (
@@ -165,10 +238,107 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ClaimsJWTAuthentication',
     ),
+    # Reverse proxies in front of the app: the client IP of the throttles is taken from
+    # X-Forwarded-For only behind them (0 uses REMOTE_ADDR, the header is set by the client)
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Cache settings (use a shared backend such as Redis or Memcached when running several workers)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
 }
 
+# Instance metadata cache: in-process LRU (LOCAL_SIZE entries, LOCAL_TTL seconds)
+# in front of the shared cache (TTL seconds)
+
+INSTANCE_CACHE = {
+    'LOCAL_SIZE': int(os.environ.get('INSTANCE_CACHE_LOCAL_SIZE', 1024)),
+    'LOCAL_TTL': int(os.environ.get('INSTANCE_CACHE_LOCAL_TTL', 5)),
+    'TTL': int(os.environ.get('INSTANCE_CACHE_TTL', 300)),
+}
+
+# Voter form payloads (whole form, outline and sections) cached under the skeleton version:
+# in-process LRU (LOCAL_SIZE entries) in front of the shared cache (TTL seconds)
+
+FORM_CACHE_LOCAL_SIZE = int(os.environ.get('FORM_CACHE_LOCAL_SIZE', 256))
+FORM_CACHE_TTL = int(os.environ.get('FORM_CACHE_TTL', 3600))
+
+# Compiled branching rules and shuffled questions and options kept in-process (one entry per skeleton version)
+
+FORM_RULES_CACHE_SIZE = int(os.environ.get('FORM_RULES_CACHE_SIZE', 256))
+
+# Seconds an unknown username is remembered by the owner login (negative lookup cache)
+
+MISSING_USERNAME_CACHE_TTL = int(os.environ.get('MISSING_USERNAME_CACHE_TTL', 300))
+
+# Seconds the active flags of an owner are cached by the claims based JWT authentication
+# (bounds how long a deactivated account keeps access when the cache is not shared)
+
+USER_STATE_CACHE_TTL = int(os.environ.get('USER_STATE_CACHE_TTL', 30))
+
+# Username index (Bloom filter) used by the username existence check
+
+USERNAME_INDEX_REBUILD_INTERVAL = int(os.environ.get('USERNAME_INDEX_REBUILD_INTERVAL', 600))
+USERNAME_INDEX_ERROR_RATE = float(os.environ.get('USERNAME_INDEX_ERROR_RATE', 0.01))
+
+# Instance deletion: tombstone and purge in a background thread (purge_deleted_instances
+# resumes interrupted purges), or purge synchronously within the request
+
+INSTANCE_DELETE_IN_BACKGROUND = os.environ.get('INSTANCE_DELETE_IN_BACKGROUND', 'true').lower() == 'true'
+INSTANCE_PURGE_CHUNK_SIZE = int(os.environ.get('INSTANCE_PURGE_CHUNK_SIZE', 1000))
+RESPONSE_PURGE_CHUNK_SIZE = int(os.environ.get('RESPONSE_PURGE_CHUNK_SIZE', 1000))
+
+# Submission histograms: days the minute/hour/day buckets are kept (None keeps them
+# forever, pruned by compact_submission_buckets) and maximum number of buckets returned
+
+SUBMISSION_BUCKET_RETENTION_DAYS = {
+    'minute': int(os.environ.get('SUBMISSION_MINUTE_BUCKET_DAYS', 2)),
+    'hour': int(os.environ.get('SUBMISSION_HOUR_BUCKET_DAYS', 90)),
+    'day': None,
+}
+HISTOGRAM_MAX_POINTS = int(os.environ.get('HISTOGRAM_MAX_POINTS', 500))
+
+# Seconds the crosstab tables are cached (they are updated incrementally with the new responses)
+
+CROSSTAB_CACHE_TTL = int(os.environ.get('CROSSTAB_CACHE_TTL', 86400))
+
+# Response listing: page size when paginated (page/page_size query parameters) and the number of
+# answers up to which the most selective answer filter is fetched instead of used as a subquery
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 100))
+FILTER_MATERIALIZE_LIMIT = int(os.environ.get('FILTER_MATERIALIZE_LIMIT', 5000))
+
+# Full-text search of the text answers: index rows fetched per query term at most, and the number
+# of matching answers under which the next terms are only fetched for them
+
+SEARCH_MAX_POSTINGS = int(os.environ.get('SEARCH_MAX_POSTINGS', 100000))
+SEARCH_CANDIDATES = int(os.environ.get('SEARCH_CANDIDATES', 1000))
+
+# Interned answer values: entries of the per-process value to id and id to value caches
+
+ANSWER_VALUE_CACHE_SIZE = int(os.environ.get('ANSWER_VALUE_CACHE_SIZE', 100000))
+
+# Voter endpoints throttling (token bucket per client IP and instance hash)
+# BACKEND is either 'local' (per process) or 'cache' (shared through the Django cache)
+
+VOTER_THROTTLE = {
+    'BACKEND': os.environ.get('VOTER_THROTTLE_BACKEND', 'local'),
+    'RATE': float(os.environ.get('VOTER_THROTTLE_RATE', 5)),
+    'BURST': int(os.environ.get('VOTER_THROTTLE_BURST', 20)),
+    'CACHE_ALIAS': 'default',
+}
+
+# Load shedding: requests above this many in flight get a 503 (0 disables the limit)
+
+MAX_CONCURRENT_REQUESTS = int(os.environ.get('MAX_CONCURRENT_REQUESTS', 64))
+CONCURRENCY_RETRY_AFTER = int(os.environ.get('CONCURRENCY_RETRY_AFTER', 1))
+
 # Simple JWT settings config
 
 SIMPLE_JWT = {
@@ -205,5 +375,6 @@ DJOSER = {
     'USERNAME_RESET_CONFIRM_URL': 'auth/reset-username/?uid={uid}&token={token}',
     'PASSWORD_RESET_SHOW_EMAIL_NOT_FOUND': True
 }
-DOMAIN = os.environ.get('DOMAIN', 'http://localhost:3000')
+DOMAIN = os.environ.get('DOMAIN', 'localhost:3000')
+PROTOCOL = os.environ.get('PROTOCOL', 'http')
 SITE_NAME = os.environ.get('SITE_NAME', 'SPAPI')
@@ -6,8 +6,111 @@ Description: This file contains the admin settings for the Django core app.
 Author: Divij Sharma <divijs75@gmail.com>
 """
 
+from django.conf import settings
 from django.contrib import admin
-from .models import User
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from .models import User, OutboxMessage
+
+
+def estimate_table_rows(model, using='default'):
+    """
+    Get the row count estimate of the model table from the database statistics, None when unavailable.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute('SELECT table_rows FROM information_schema.tables '
+                           'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for the huge tables, avoiding the full COUNT(*) of the changelists.
+
+    Details: The unfiltered changelist uses the table statistics estimate once the
+    table is larger than ADMIN_ESTIMATED_COUNT_THRESHOLD rows, filtered
+    changelists count at most ADMIN_COUNT_LIMIT rows.
+    """
+    @cached_property
+    def count(self):
+        """
+        Get the (estimated or capped) number of objects.
+        """
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        if not queryset.query.where:
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate >= getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 10000):
+                return estimate
+        return queryset.order_by()[:getattr(settings, 'ADMIN_COUNT_LIMIT', 100000)].count()
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    Changelist filter with a text input, instead of listing every related object.
+
+    Details: Subclasses set title, parameter_name and the lookup applied to the
+    entered value.
+    """
+    template = 'admin/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        """
+        No choices are listed, the value is typed in.
+        """
+        return ()
+
+    def has_output(self):
+        """
+        Always display the input.
+        """
+        return True
+
+    def queryset(self, request, queryset):
+        """
+        Filter the queryset by the entered value.
+        """
+        if self.value():
+            try:
+                return queryset.filter(**{self.lookup: self.value().strip()})
+            except (ValueError, ValidationError):
+                return queryset.none()
+        return queryset
+
+    def choices(self, changelist):
+        """
+        Yield the reset choice, carrying the other filter parameters as hidden inputs.
+        """
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (key, value)
+            for key, values in changelist.get_filters_params().items() if key != self.parameter_name
+            for value in values
+        ]
+        yield all_choice
+
+
+def input_filter(title, parameter_name, lookup):
+    """
+    Build an InputFilter class for the lookup.
+    """
+    return type(f'{parameter_name.title().replace("_", "")}InputFilter', (InputFilter,), {
+        'title': title, 'parameter_name': parameter_name, 'lookup': lookup})
 
 
 class CustomUserAdmin(admin.ModelAdmin):
@@ -16,7 +119,7 @@ class CustomUserAdmin(admin.ModelAdmin):
     """
     list_display = ('email', 'username', 'first_name', 'last_name', 'is_active',
                     'is_deactivated', 'is_superuser')
-    search_fields = ('email', 'username', 'first_name', 'last_name')
+    search_fields = ('^email', '^username', '^first_name', '^last_name')
     list_filter = ('is_active', 'is_deactivated', 'is_superuser', 'date_joined')
     ordering = ('-date_joined',)
     readonly_fields = ('date_joined', 'last_login')
@@ -37,3 +140,19 @@ class CustomUserAdmin(admin.ModelAdmin):
 
 
 admin.site.register(User, CustomUserAdmin)
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """
+    Outbox message admin settings.
+    """
+    list_display = ('subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('^subject',)
+    ordering = ('-pk',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,63 @@
+"""
+Brief: Django authentication.py file.
+
+Description: This file contains the authentication classes for the Django core app.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .cache import get_user_state
+from .models import ClaimsUser
+
+# Only the claims that (practically) never change are trusted, the profile fields are loaded lazily
+CLAIM_FIELDS = ('username',)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication building the user from the token claims instead of fetching it.
+
+    Details: The active flags are read from a short-TTL cache (one indexed query on
+    a miss), every other field is served from the claims or loaded lazily by the
+    ClaimsUser proxy. Tokens without the profile claims fall back to the default
+    user fetch.
+    """
+    def get_user(self, validated_token):
+        """
+        Get the user for the validated token.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        if api_settings.CHECK_REVOKE_TOKEN or 'username' not in validated_token \
+                or api_settings.USER_ID_FIELD != 'id':
+            user = super().get_user(validated_token)
+            if user.is_deactivated:
+                raise AuthenticationFailed("Account deactivated", code="user_deactivated")
+            return user
+
+        state = get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        is_active, is_deactivated = state
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if is_deactivated:
+            raise AuthenticationFailed("Account deactivated", code="user_deactivated")
+
+        field_names = ['id', 'is_active', 'is_deactivated']
+        values = [user_id, is_active, is_deactivated]
+        for claim in CLAIM_FIELDS:
+            if claim in validated_token:
+                field_names.append(claim)
+                values.append(validated_token[claim])
+
+        concrete = [f.attname for f in ClaimsUser._meta.concrete_fields]
+        ordered = sorted(zip(field_names, values), key=lambda item: concrete.index(item[0]))
+        return ClaimsUser.from_db(DEFAULT_DB_ALIAS, [name for name, _ in ordered], [value for _, value in ordered])
@@ -0,0 +1,126 @@
+"""
+Brief: Django bloom.py file.
+
+Description: This file contains the Bloom filter and the in-memory username index
+used to answer definite negatives of the username existence check without a query.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import math
+import time
+import hashlib
+import logging
+import threading
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from .cache import is_new_username
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings (double hashing on a 128 bit BLAKE2b digest).
+    """
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Size the filter for the capacity and the false positive rate.
+        """
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        """
+        Get the bit positions of the item.
+        """
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        """
+        Add the item to the filter.
+        """
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        """
+        Check if the item may be in the filter (False is definite).
+        """
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class UsernameIndex:
+    """
+    Process wide Bloom filter over the usernames.
+
+    Details: The filter is built on first use and rebuilt every
+    USERNAME_INDEX_REBUILD_INTERVAL seconds (which also drops deleted usernames),
+    or once it holds more usernames than it was sized for. The builds run in a
+    background thread, the requests keep using the previous filter meanwhile (or
+    query the database until the first filter is ready). Usernames created by
+    other workers since the last rebuild are found through the shared cache.
+    Usernames are case folded since the database collation may be case insensitive.
+    """
+    def __init__(self):
+        self.filter = None
+        self.built_at = 0
+        self.lock = threading.Lock()
+
+    def rebuild(self):
+        """
+        Build the filter from all the usernames.
+        """
+        users = get_user_model().objects.all()
+        bloom = BloomFilter(max(1000, users.count() * 2), getattr(settings, 'USERNAME_INDEX_ERROR_RATE', 0.01))
+        for username in users.values_list('username', flat=True).iterator(chunk_size=10000):
+            bloom.add(username.casefold())
+        self.filter, self.built_at = bloom, time.monotonic()
+
+    def _rebuild_in_background(self):
+        """
+        Rebuild the filter, then release the build lock and the database connection of the thread.
+        """
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('Failed to rebuild the username index')
+        finally:
+            connection.close()
+            self.lock.release()
+
+    def _current(self):
+        """
+        Get the filter (None until the first build is done), starting a background rebuild when
+        missing, too old or over capacity.
+        """
+        bloom = self.filter
+        interval = getattr(settings, 'USERNAME_INDEX_REBUILD_INTERVAL', 600)
+        if bloom is None or time.monotonic() - self.built_at > interval or bloom.count > bloom.capacity:
+            if self.lock.acquire(blocking=False):
+                threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+        return bloom
+
+    def add(self, username):
+        """
+        Add a new username to the filter (if built).
+        """
+        if self.filter is not None:
+            self.filter.add(username.casefold())
+
+    def might_exist(self, username):
+        """
+        Check if a user may exist with the username, False is definite.
+        """
+        bloom = self._current()
+        return bloom is None or username.casefold() in bloom or is_new_username(username)
+
+
+username_index = UsernameIndex()
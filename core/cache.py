@@ -0,0 +1,97 @@
+"""
+Brief: Django cache.py file.
+
+Description: This file contains the cache helpers for the Django core app.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import hashlib
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+
+def _username_digest(username):
+    """
+    Get a fixed length digest of the casefolded username, safe in any cache key.
+    """
+    return hashlib.sha256(username.casefold().encode()).hexdigest()
+
+
+def _missing_username_key(username):
+    """
+    Get the cache key of the negative lookup for the username (and its case variants).
+    """
+    return f'auth:missing-username:{_username_digest(username)}'
+
+
+def is_missing_username(username):
+    """
+    Check if a recent lookup found no user with the username.
+    """
+    return cache.get(_missing_username_key(username)) is not None
+
+
+def remember_missing_username(username):
+    """
+    Remember that no user exists with the username nor any of its case variants.
+    """
+    cache.set(_missing_username_key(username), True, getattr(settings, 'MISSING_USERNAME_CACHE_TTL', 300))
+
+
+def forget_missing_username(username):
+    """
+    Forget the negative lookup of the username (the user has been created).
+    """
+    cache.delete(_missing_username_key(username))
+
+
+def _new_username_key(username):
+    """
+    Get the cache key marking a recently created username.
+    """
+    return f'auth:new-username:{_username_digest(username)}'
+
+
+def is_new_username(username):
+    """
+    Check if the username was created recently (possibly by another worker).
+    """
+    return cache.get(_new_username_key(username)) is not None
+
+
+def remember_new_username(username):
+    """
+    Mark the username as recently created, until every worker has rebuilt its username index.
+    """
+    cache.set(_new_username_key(username), True, 2 * getattr(settings, 'USERNAME_INDEX_REBUILD_INTERVAL', 600))
+
+
+def _user_state_key(user_id):
+    """
+    Get the cache key of the active flags of the user.
+    """
+    return f'auth:user-state:{user_id}'
+
+
+def get_user_state(user_id):
+    """
+    Get the (is_active, is_deactivated) flags of the user, None if the user does not exist.
+
+    The flags are cached for USER_STATE_CACHE_TTL seconds and dropped whenever the
+    user is saved or deleted, so deactivations take effect at the latest after the TTL.
+    """
+    state = cache.get(_user_state_key(user_id))
+    if state is None:
+        row = get_user_model().objects.filter(pk=user_id).values_list('is_active', 'is_deactivated').first()
+        state = tuple(row) if row else ()
+        cache.set(_user_state_key(user_id), state, getattr(settings, 'USER_STATE_CACHE_TTL', 30))
+    return state or None
+
+
+def forget_user_state(user_id):
+    """
+    Drop the cached active flags of the user.
+    """
+    cache.delete(_user_state_key(user_id))
@@ -0,0 +1,106 @@
+"""
+Brief: Django deletion.py file.
+
+Description: This file contains the bulk deletion engine. Unlike Model.delete()
+and QuerySet.delete(), which load every cascaded object into memory to send the
+delete signals, the engine walks the cascading relations of the model and removes
+the rows in dependency order (children first) with chunked DELETE statements,
+without loading any object.
+
+Note: No pre_delete/post_delete signals are sent, callers are responsible for
+the side effects normally performed by the receivers (cache invalidation, ...).
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import time
+from collections import Counter
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+
+def get_cascade_relations(model):
+    """
+    Get the reverse relations of the model (including the hidden ones, such as the
+    many to many through tables), same candidates as the Django deletion collector.
+    """
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete and (field.one_to_one or field.one_to_many)
+    ]
+
+
+def _delete_ids(model, ids, using):
+    """
+    Delete the rows of the model with the given primary keys in one statement.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    pk = model._meta.pk
+    sql = 'DELETE FROM %s WHERE %s IN (%s)' % (
+        quote(model._meta.db_table), quote(pk.column), ', '.join(['%s'] * len(ids)))
+    with connection.cursor() as cursor:
+        # The keys are converted to their database values (UUID keys, ...) like the queryset lookups
+        cursor.execute(sql, [pk.get_db_prep_value(value, connection) for value in ids])
+        return cursor.rowcount
+
+
+def _update_chunked(model, lookup, values, chunk_size, sleep, using):
+    """
+    Update the rows of the model matching the lookup in chunks (used by SET_NULL relations).
+    """
+    queryset = model._base_manager.using(using)
+    while True:
+        ids = list(queryset.filter(**lookup).values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        queryset.filter(pk__in=ids).update(**values)
+        if sleep:
+            time.sleep(sleep)
+
+
+def delete_cascade(model, lookup, chunk_size=1000, sleep=0, using=DEFAULT_DB_ALIAS, deleted=None, depth=0,
+                   before_delete=None):
+    """
+    Delete the rows of the model matching the lookup and all the rows cascading from them.
+
+    Details: The lookup is a dictionary of filter keyword arguments. For every
+    CASCADE relation the lookup is prefixed with the relation path and the child
+    model is purged first, then the rows are deleted chunk_size primary keys at a
+    time (each chunk is its own statement, sleep seconds apart). SET_NULL and
+    SET_DEFAULT relations are updated in chunks, DO_NOTHING relations are left
+    alone and PROTECT/RESTRICT relations are refused. before_delete, if given, is
+    called with the model and the primary keys of every chunk before it is deleted
+    (to maintain the counters normally moved by the delete receivers).
+
+    Returns a Counter of the deleted rows per model label.
+    """
+    deleted = Counter() if deleted is None else deleted
+    if depth > 16:
+        raise RecursionError(f'Relation graph of {model._meta.label} is too deep to purge.')
+
+    for relation in get_cascade_relations(model):
+        child = relation.related_model
+        on_delete = relation.on_delete
+        child_lookup = {f'{relation.field.name}__{key}': value for key, value in lookup.items()}
+        if on_delete is models.CASCADE:
+            delete_cascade(child, child_lookup, chunk_size, sleep, using, deleted, depth + 1, before_delete)
+        elif on_delete is models.SET_NULL:
+            _update_chunked(child, child_lookup, {relation.field.name: None}, chunk_size, sleep, using)
+        elif on_delete is models.SET_DEFAULT:
+            _update_chunked(child, child_lookup, {relation.field.name: relation.field.get_default()},
+                            chunk_size, sleep, using)
+        elif on_delete is not models.DO_NOTHING:
+            raise ValueError(f'Cannot bulk delete {model._meta.label}: {child._meta.label}.{relation.field.name} '
+                             f'uses {on_delete.__name__}.')
+
+    queryset = model._base_manager.using(using).filter(**lookup)
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            break
+        if before_delete is not None:
+            before_delete(model, ids)
+        deleted[model._meta.label] += _delete_ids(model, ids, using)
+        if sleep:
+            time.sleep(sleep)
+    return deleted
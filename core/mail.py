@@ -0,0 +1,162 @@
+"""
+Brief: Django mail.py file.
+
+Description: This file contains the queued email backend and the outbox sender.
+Sending an email (e.g. the Djoser activation and reset emails) only stores it in
+the outbox, the send_queued_mail command then delivers the pending messages in
+batches over one connection of OUTBOX_EMAIL_BACKEND, retrying failures with an
+exponential backoff.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import base64
+import datetime
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxMessage
+
+OUTBOX_STATUS_PENDING = 0x1 << 0
+OUTBOX_STATUS_SENT = 0x1 << 1
+OUTBOX_STATUS_FAILED = 0x1 << 2
+
+
+def to_outbox_message(message):
+    """
+    Build the (unsaved) outbox row of an EmailMessage.
+    """
+    attachments = []
+    for attachment in message.attachments:
+        if not isinstance(attachment, tuple):
+            raise ValueError('Only (filename, content, mimetype) attachments can be queued.')
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append([filename, base64.b64encode(content).decode(), mimetype])
+
+    return OutboxMessage(
+        subject=message.subject, body=message.body, from_email=message.from_email or '',
+        to=list(message.to), cc=list(message.cc), bcc=list(message.bcc), reply_to=list(message.reply_to),
+        headers=dict(message.extra_headers), attachments=attachments,
+        alternatives=[list(alternative) for alternative in getattr(message, 'alternatives', [])],
+    )
+
+
+def to_email_message(outbox_message, connection=None):
+    """
+    Rebuild the EmailMessage of an outbox row.
+    """
+    message = EmailMultiAlternatives(
+        subject=outbox_message.subject, body=outbox_message.body,
+        from_email=outbox_message.from_email or None, to=outbox_message.to, cc=outbox_message.cc,
+        bcc=outbox_message.bcc, reply_to=outbox_message.reply_to, headers=outbox_message.headers,
+        connection=connection,
+    )
+    for content, mimetype in outbox_message.alternatives:
+        message.attach_alternative(content, mimetype)
+    for filename, content, mimetype in outbox_message.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """
+    Email backend storing the messages in the outbox instead of sending them.
+    """
+    def send_messages(self, email_messages):
+        """
+        Queue the messages with a single insert, return the number of queued messages.
+        """
+        rows = [to_outbox_message(message) for message in email_messages if message.recipients()]
+        if not rows:
+            return 0
+        try:
+            OutboxMessage.objects.bulk_create(rows)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(rows)
+
+
+def get_retry_delay(attempts):
+    """
+    Get the delay before the next delivery attempt (exponential backoff, capped).
+    """
+    delay = getattr(settings, 'OUTBOX_RETRY_DELAY', 60) * 2 ** (attempts - 1)
+    return datetime.timedelta(seconds=min(delay, getattr(settings, 'OUTBOX_MAX_RETRY_DELAY', 3600)))
+
+
+def close_connection(connection):
+    """
+    Close an email connection, ignoring the errors of an already broken connection.
+    """
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def record_failure(outbox_message, error, now):
+    """
+    Record a failed delivery attempt of a message, retried later or marked as failed after
+    OUTBOX_MAX_ATTEMPTS attempts.
+    """
+    outbox_message.attempts += 1
+    outbox_message.last_error = f'{type(error).__name__}: {error}'
+    if outbox_message.attempts >= getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5):
+        outbox_message.status = OUTBOX_STATUS_FAILED
+    else:
+        outbox_message.next_attempt_at = now + get_retry_delay(outbox_message.attempts)
+
+
+def send_queued_messages(batch_size=100, backend=None):
+    """
+    Deliver a batch of due pending messages over one connection, return the number of sent messages.
+
+    Details: The batch rows are locked (skipping the rows locked by other workers)
+    until their status is recorded. Every message is sent on its own so a failure
+    only affects that message, the connection is then reopened for the next one.
+    When the connection cannot be opened (the mail server is down) the remaining
+    messages of the batch are all recorded as failed attempts, so they follow the
+    same backoff.
+    """
+    sent = 0
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+            status=OUTBOX_STATUS_PENDING, next_attempt_at__lte=now).order_by('next_attempt_at')[:batch_size])
+        if not batch:
+            return 0
+
+        connection = get_connection(backend or settings.OUTBOX_EMAIL_BACKEND, fail_silently=False)
+        opened = False
+        try:
+            for index, outbox_message in enumerate(batch):
+                if not opened:
+                    try:
+                        connection.open()
+                        opened = True
+                    except Exception as e:
+                        for remaining in batch[index:]:
+                            record_failure(remaining, e, now)
+                        break
+                try:
+                    connection.send_messages([to_email_message(outbox_message, connection)])
+                except Exception as e:
+                    record_failure(outbox_message, e, now)
+                    # The connection may be broken, start the next message on a fresh one
+                    close_connection(connection)
+                    opened = False
+                else:
+                    outbox_message.status = OUTBOX_STATUS_SENT
+                    outbox_message.sent_at = timezone.now()
+                    sent += 1
+        finally:
+            close_connection(connection)
+        OutboxMessage.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return sent
@@ -0,0 +1,97 @@
+"""
+Brief: Django benchmark_owner_login management command.
+
+Description: This command measures the owner login throughput (logins/sec) and the
+queries per login of the previous pipeline (user pre-check, authenticate() and the
+token serializer) against the CustomTokenObtainPairView fast path. The benchmark
+user is rolled back at the end of the run.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import time
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.views import TokenObtainPairView
+from core.serializers import CustomTokenObtainPairSerializer
+from core.views import CustomTokenObtainPairView
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """
+    Raised to roll back the benchmark user.
+    """
+
+
+def legacy_login(request):
+    """
+    The previous owner login pipeline: user pre-check then the token serializer.
+    """
+    user = User.objects.get(username=request.POST.get('username'))
+    if not user.is_active or user.is_deactivated:
+        raise AssertionError('Benchmark user must be active')
+    return TokenObtainPairView.as_view(serializer_class=CustomTokenObtainPairSerializer)(request)
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the owner login pipelines.
+    """
+    help = 'Benchmark owner logins/sec of the previous and the fast login pipeline.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--duration', type=float, default=3.0, help='Seconds to spend on each case.')
+        parser.add_argument('--cheap-hasher', action='store_true',
+                            help='Hash with MD5 to measure the pipeline overhead without the PBKDF2 cost.')
+
+    def handle(self, *args, **options):
+        """
+        Create the benchmark user, run the cases and roll back.
+        """
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if options['cheap_hasher'] else None
+        try:
+            with override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+                with transaction.atomic():
+                    self.run(options['duration'])
+                    raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, duration):
+        """
+        Time every case and print logins/sec and queries per login.
+        """
+        username = f'bench-{uuid.uuid4().hex[:8]}'
+        user = User(username=username, email=f'{username}@example.com', is_active=True)
+        user.set_password('benchmark-password')
+        user.save()
+
+        factory = APIRequestFactory()
+        fast_login = CustomTokenObtainPairView.as_view()
+        cases = [
+            ('legacy', legacy_login, username, 200),
+            ('fast', fast_login, username, 200),
+            ('fast unknown', fast_login, 'missing-' + username, 400),
+        ]
+        for name, view, login, expected in cases:
+            logins = 0
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                while time.perf_counter() - start < duration:
+                    request = factory.post('/', {'username': login, 'password': 'benchmark-password'})
+                    response = view(request)
+                    if response.status_code != expected:
+                        raise AssertionError(f'{name}: unexpected status {response.status_code}')
+                    logins += 1
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{name:<13} {logins / elapsed:>10.1f} logins/sec   '
+                              f'{len(queries) / logins:.2f} queries/login')
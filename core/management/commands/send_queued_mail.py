@@ -0,0 +1,41 @@
+"""
+Brief: Django send_queued_mail management command.
+
+Description: This command delivers the pending messages of the outbox in batches,
+once or continuously (--loop).
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from core.mail import send_queued_messages
+
+
+class Command(BaseCommand):
+    """
+    Deliver the queued emails.
+    """
+    help = 'Deliver the queued emails of the outbox in batches.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--batch-size', type=int, default=100, help='Messages sent per connection.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls when idle.')
+        parser.add_argument('--backend', help='Email backend used for the delivery, defaults to OUTBOX_EMAIL_BACKEND.')
+
+    def handle(self, *args, **options):
+        """
+        Send the batches until the outbox is drained (and keep polling with --loop).
+        """
+        while True:
+            sent = send_queued_messages(options['batch_size'], options['backend'])
+            if sent:
+                self.stdout.write(f'Sent {sent} messages.')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
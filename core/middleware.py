@@ -0,0 +1,57 @@
+"""
+Brief: Django middleware.py file.
+
+Description: This file contains the middlewares for the Django core app.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import threading
+from django.conf import settings
+from django.http import JsonResponse
+from .throttling import incr_counter
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Shed load with a 503 once the number of requests in flight reaches MAX_CONCURRENT_REQUESTS.
+
+    Details: The limit should stay below the number of database connections
+    available to the process so the excess requests are rejected before they
+    wait on (or exhaust) the database. A streamed response (CSV codes, ZIP
+    export) keeps its slot until its body is sent. The middleware sits after the
+    CorsMiddleware so the 503 responses carry the CORS headers.
+    """
+    def __init__(self, get_response):
+        """
+        Set up the semaphore guarding the requests in flight (disabled if the limit is 0).
+        """
+        self.get_response = get_response
+        limit = getattr(settings, 'MAX_CONCURRENT_REQUESTS', 0)
+        self.semaphore = threading.BoundedSemaphore(limit) if limit else None
+        self.retry_after = getattr(settings, 'CONCURRENCY_RETRY_AFTER', 1)
+
+    def __call__(self, request):
+        """
+        Serve the request if a slot is free, otherwise reply with 503 and Retry-After.
+        """
+        if self.semaphore is None:
+            return self.get_response(request)
+
+        if not self.semaphore.acquire(blocking=False):
+            incr_counter('requests_shed')
+            response = JsonResponse({'detail': 'Server is busy, please retry later.'}, status=503)
+            response['Retry-After'] = str(self.retry_after)
+            return response
+        try:
+            incr_counter('requests_served')
+            response = self.get_response(request)
+        except BaseException:
+            self.semaphore.release()
+            raise
+        if response.streaming:
+            # The slot is held until the streamed body is sent (the server closes the response)
+            response._resource_closers.append(self.semaphore.release)
+        else:
+            self.semaphore.release()
+        return response
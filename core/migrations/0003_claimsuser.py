@@ -0,0 +1,26 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:44
+
+import django.contrib.auth.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_user_is_staff_user_is_superuser"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClaimsUser",
+            fields=[],
+            options={
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("core.user",),
+            managers=[
+                ("objects", django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_claimsuser"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.TextField(blank=True)),
+                ("body", models.TextField(blank=True)),
+                ("from_email", models.CharField(blank=True, max_length=254)),
+                ("to", models.JSONField(default=list)),
+                ("cc", models.JSONField(default=list)),
+                ("bcc", models.JSONField(default=list)),
+                ("reply_to", models.JSONField(default=list)),
+                ("headers", models.JSONField(default=dict)),
+                ("alternatives", models.JSONField(default=list)),
+                ("attachments", models.JSONField(default=list)),
+                (
+                    "status",
+                    models.IntegerField(
+                        choices=[(1, "Pending"), (2, "Sent"), (4, "Failed")], default=1
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("next_attempt_at", models.DateTimeField(auto_now_add=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, default=None, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="outbox_status_next_attempt",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -9,6 +9,12 @@ Author: Divij Sharma <divijs75@gmail.com>
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+OUTBOX_STATUS_CHOICES = (
+        (0x1 << 0, 'Pending'),
+        (0x1 << 1, 'Sent'),
+        (0x1 << 2, 'Failed'),
+    )
+
 
 class User(AbstractUser):
     """
@@ -60,3 +66,76 @@ class User(AbstractUser):
         """
         self.is_deactivated = False
         self.save()
+
+
+class ClaimsUser(User):
+    """
+    Proxy of the User model built from the access token claims.
+
+    Details: Only the fields carried by the token are loaded, the other fields are
+    deferred and fetched together (in one query) the first time one of them is
+    accessed.
+    """
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        """
+        Load all the deferred fields at once when a deferred field is accessed.
+        """
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+
+class OutboxMessage(models.Model):
+    """
+    Model for the queued outbound emails.
+
+    Details: The messages are stored by the QueuedEmailBackend and delivered in
+    batches by the send_queued_mail command over a single connection of the
+    OUTBOX_EMAIL_BACKEND.
+
+    Fields:
+    - subject: Subject of the email.
+    - body: Plain text body of the email.
+    - from_email: Sender of the email.
+    - to, cc, bcc, reply_to: Lists of recipients.
+    - headers: Extra headers of the email.
+    - alternatives: List of (content, mimetype) alternative bodies (e.g. HTML).
+    - attachments: List of (filename, base64 content, mimetype) attachments.
+    - status: Delivery status, defaults to pending.
+    - attempts: Number of failed delivery attempts.
+    - next_attempt_at: Timestamp after which the next delivery attempt is made.
+    - last_error: Error of the last failed delivery attempt.
+    - created_at: Timestamp of the message creation.
+    - sent_at: Timestamp of the delivery.
+    """
+    subject = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list)
+    bcc = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+    headers = models.JSONField(default=dict)
+    alternatives = models.JSONField(default=list)
+    attachments = models.JSONField(default=list)
+    status = models.IntegerField(choices=OUTBOX_STATUS_CHOICES, default=0x1 << 0)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(auto_now_add=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_attempt'),
+        ]
+
+    def __str__(self):
+        """
+        Return the subject of the message.
+        """
+        return self.subject
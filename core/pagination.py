@@ -0,0 +1,56 @@
+"""
+Brief: Django pagination.py file.
+
+Description: This file contains the pagination classes of the project.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from .records import RecordResponse
+
+
+class OptInPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination applied only when the page or page_size query parameter is given.
+
+    Details: The listings keep returning every object by default. The page is
+    returned as a lazy sliced queryset so the record builders can fetch it with
+    values_list(), and the paginated response is encoded with the record layer.
+    """
+    page_size = getattr(settings, 'DEFAULT_PAGE_SIZE', 100)
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Paginate the queryset if requested, return the page as a sliced queryset.
+        """
+        if self.page_query_param not in request.query_params and \
+                self.page_size_query_param not in request.query_params:
+            return None
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.request = request
+        return self.page.object_list
+
+    def get_paginated_response(self, data):
+        """
+        Return the page records with the total count and the neighbour page links.
+        """
+        return RecordResponse({
+            'count': self.page.paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }, status=200)
@@ -0,0 +1,92 @@
+"""
+Brief: Django records.py file.
+
+Description: This file contains the lightweight record layer used by the read-only
+hot endpoints in place of the DRF serializers. Rows are fetched with values_list(),
+mapped into __slots__ record classes and encoded straight to JSON bytes.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import json
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+
+class Record:
+    """
+    Base class of the records, subclasses only declare their __slots__ (in output order).
+    """
+    __slots__ = ()
+
+    def __init__(self, *values):
+        """
+        Set the slots from the positional values, in the order of __slots__.
+        """
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def to_dict(self):
+        """
+        Return the record as a dictionary with the keys in the order of __slots__.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def format_datetime(value):
+    """
+    Format a datetime the same way as the DRF DateTimeField (ISO 8601, 'Z' for UTC).
+    """
+    if value is None:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _default(obj):
+    """
+    Encode the records (and nested records) for the JSON encoder.
+    """
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """
+    Encode the data (records, lists, dicts and scalars) to JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def loads(payload):
+    """
+    Decode JSON bytes (an encoded payload) to the data.
+    """
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+class RecordResponse(HttpResponse):
+    """
+    HTTP response with the records encoded as JSON bytes.
+    """
+    def __init__(self, data, **kwargs):
+        """
+        Encode the data and set the JSON content type.
+        """
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
@@ -61,21 +61,34 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom serializer for obtaining JWT tokens.
     """
+    @classmethod
+    def get_token(cls, user):
+        """
+        Get the token for the user with the profile claims embedded.
+        """
+        token = super().get_token(user)
+        for claim, value in cls.get_profile(user).items():
+            if claim != 'id':
+                token[claim] = value
+        return token
+
+    @staticmethod
+    def get_profile(user):
+        """
+        Get the user's id, first name, last name, email, username, is_active and is_deactivated status.
+        """
+        return {
+            'id': user.id, 'first_name': user.first_name,
+            'last_name': user.last_name, 'email': user.email,
+            'username': user.username,
+            'is_active': user.is_active,
+            'is_deactivated': user.is_deactivated,
+        }
+
     def validate(self, attrs):
         """
         Validate the token data and add additional user information to the token payload.
-
-        - Include user's id, first name, last name, email, username, is_active, and is_deactivated status.
         """
         data = super().validate(attrs)
-
-        obj = self.user
-
-        data.update({
-            'id': obj.id, 'first_name': obj.first_name,
-            'last_name': obj.last_name, 'email': obj.email,
-            'username': obj.username,
-            'is_active': obj.is_active,
-            'is_deactivated': obj.is_deactivated,
-        })
+        data.update(self.get_profile(self.user))
         return data
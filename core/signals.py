@@ -0,0 +1,41 @@
+"""
+Brief: Django signals.py file.
+
+Description: This file contains the signal receivers for the Django core app.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import forget_missing_username, forget_user_state, remember_new_username
+from .bloom import username_index
+from .models import ClaimsUser
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def user_saved(sender, instance, **kwargs):
+    """
+    Drop the negative lookup of the username once a user holds it, and the cached active flags.
+
+    The username is also added to the username index of this process and marked
+    as new for the indexes of the other workers.
+    """
+    forget_missing_username(instance.username)
+    forget_user_state(instance.pk)
+    if 'username' not in instance.get_deferred_fields():
+        username_index.add(instance.username)
+        remember_new_username(instance.username)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ClaimsUser)
+def user_deleted(sender, instance, **kwargs):
+    """
+    Drop the cached active flags of the deleted user.
+    """
+    forget_user_state(instance.pk)
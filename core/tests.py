@@ -0,0 +1,147 @@
+"""
+Brief: Django tests.py file.
+
+Description: This file contains the tests of the queued email backend and the
+outbox sender of the Django core app, against the Django locmem email backend.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import smtplib
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from .mail import OUTBOX_STATUS_PENDING, OUTBOX_STATUS_SENT, OUTBOX_STATUS_FAILED, send_queued_messages
+from .models import OutboxMessage
+
+LOCMEM_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class CountingEmailBackend(EmailBackend):
+    """
+    Locmem backend counting the opened connections.
+    """
+    opened = 0
+
+    def open(self):
+        """
+        Count the opened connection.
+        """
+        CountingEmailBackend.opened += 1
+        return True
+
+
+class FailingRecipientEmailBackend(CountingEmailBackend):
+    """
+    Locmem backend refusing the messages sent to fail@example.com.
+    """
+    def send_messages(self, messages):
+        """
+        Refuse the messages to the failing recipient.
+        """
+        for message in messages:
+            if 'fail@example.com' in message.to:
+                raise smtplib.SMTPRecipientsRefused({'fail@example.com': (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+class UnreachableEmailBackend(EmailBackend):
+    """
+    Backend whose connection cannot be opened (mail server down).
+    """
+    def open(self):
+        """
+        Fail to connect.
+        """
+        raise ConnectionRefusedError('Connection refused')
+
+
+@override_settings(EMAIL_BACKEND='core.mail.QueuedEmailBackend', OUTBOX_EMAIL_BACKEND=LOCMEM_BACKEND,
+                   OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_DELAY=60, OUTBOX_MAX_RETRY_DELAY=3600)
+class OutboxTests(TestCase):
+    """
+    Tests of the outbox: queuing and delivery of the emails.
+    """
+    def setUp(self):
+        """
+        Reset the opened connections counter.
+        """
+        CountingEmailBackend.opened = 0
+
+    def queue(self, *recipients):
+        """
+        Queue one email per recipient.
+        """
+        for recipient in recipients:
+            mail.send_mail('Subject', 'Body', 'from@example.com', [recipient])
+
+    def test_enqueue(self):
+        """
+        Sending an email only stores it in the outbox.
+        """
+        message = mail.EmailMultiAlternatives('Subject', 'Body', 'from@example.com', ['a@example.com'])
+        message.attach_alternative('<p>Body</p>', 'text/html')
+        message.attach('notes.txt', 'notes', 'text/plain')
+        message.send()
+        self.assertEqual(len(mail.outbox), 0)
+        outbox_message = OutboxMessage.objects.get()
+        self.assertEqual(outbox_message.status, OUTBOX_STATUS_PENDING)
+        self.assertEqual(outbox_message.to, ['a@example.com'])
+        self.assertEqual(outbox_message.alternatives, [['<p>Body</p>', 'text/html']])
+
+    def test_send_batch_over_one_connection(self):
+        """
+        A batch is delivered over a single connection.
+        """
+        self.queue('a@example.com', 'b@example.com', 'c@example.com')
+        sent = send_queued_messages(backend='core.tests.CountingEmailBackend')
+        self.assertEqual(sent, 3)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox),
+                         ['a@example.com', 'b@example.com', 'c@example.com'])
+        self.assertFalse(OutboxMessage.objects.exclude(status=OUTBOX_STATUS_SENT).exists())
+        self.assertEqual(send_queued_messages(backend='core.tests.CountingEmailBackend'), 0)
+
+    def test_message_failure(self):
+        """
+        A failed message is retried with a backoff, the others of the batch are sent.
+        """
+        self.queue('a@example.com', 'fail@example.com', 'b@example.com')
+        sent = send_queued_messages(backend='core.tests.FailingRecipientEmailBackend')
+        self.assertEqual(sent, 2)
+        # The connection is reopened after the failure
+        self.assertEqual(CountingEmailBackend.opened, 2)
+        failed = OutboxMessage.objects.get(to=['fail@example.com'])
+        self.assertEqual(failed.status, OUTBOX_STATUS_PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn('SMTPRecipientsRefused', failed.last_error)
+        self.assertGreater(failed.next_attempt_at, failed.created_at)
+        # Not due yet
+        self.assertEqual(send_queued_messages(backend='core.tests.FailingRecipientEmailBackend'), 0)
+
+    def test_message_failed_after_max_attempts(self):
+        """
+        A message is marked as failed after OUTBOX_MAX_ATTEMPTS attempts.
+        """
+        self.queue('fail@example.com')
+        for _ in range(3):
+            OutboxMessage.objects.update(next_attempt_at=OutboxMessage.objects.get().created_at)
+            send_queued_messages(backend='core.tests.FailingRecipientEmailBackend')
+        failed = OutboxMessage.objects.get()
+        self.assertEqual(failed.status, OUTBOX_STATUS_FAILED)
+        self.assertEqual(failed.attempts, 3)
+
+    def test_connection_failure(self):
+        """
+        When the connection cannot be opened, the whole batch is retried with a backoff.
+        """
+        self.queue('a@example.com', 'b@example.com')
+        self.assertEqual(send_queued_messages(backend='core.tests.UnreachableEmailBackend'), 0)
+        for outbox_message in OutboxMessage.objects.all():
+            self.assertEqual(outbox_message.status, OUTBOX_STATUS_PENDING)
+            self.assertEqual(outbox_message.attempts, 1)
+            self.assertIn('ConnectionRefusedError', outbox_message.last_error)
+            self.assertGreater(outbox_message.next_attempt_at, outbox_message.created_at)
+        # Not picked up again before the retry delay
+        self.assertEqual(send_queued_messages(backend='core.tests.UnreachableEmailBackend'), 0)
+        self.assertEqual(OutboxMessage.objects.filter(attempts=1).count(), 2)
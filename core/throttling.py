@@ -0,0 +1,154 @@
+"""
+Brief: Django throttling.py file.
+
+Description: This file contains the token bucket rate limiter used by the public
+(AllowAny) voter endpoints, along with the request counters exposed for monitoring.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import time
+import threading
+from collections import Counter
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def incr_counter(name, value=1):
+    """
+    Increment a process wide monitoring counter.
+    """
+    with _counters_lock:
+        _counters[name] += value
+
+
+def get_counters():
+    """
+    Get a snapshot of the process wide monitoring counters.
+    """
+    with _counters_lock:
+        return dict(_counters)
+
+
+def get_throttle_settings():
+    """
+    Get the voter throttle settings merged with the defaults.
+    """
+    defaults = {'BACKEND': 'local', 'RATE': 5.0, 'BURST': 20, 'CACHE_ALIAS': 'default', 'MAX_KEYS': 100000}
+    defaults.update(getattr(settings, 'VOTER_THROTTLE', {}))
+    return defaults
+
+
+class LocalTokenBucketBackend:
+    """
+    In-process token bucket store, buckets are only shared by the threads of a worker.
+    """
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def consume(self, key, rate, capacity):
+        """
+        Take a token from the bucket, return the seconds to wait (0 if the token was granted).
+        """
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                wait = 0
+            else:
+                self.buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+            if len(self.buckets) > self.max_keys:
+                self._prune(now, rate, capacity)
+        return wait
+
+    def _prune(self, now, rate, capacity):
+        """
+        Drop the buckets that have refilled completely, they are equivalent to missing ones.
+        """
+        full = [key for key, (tokens, last) in self.buckets.items()
+                if tokens + (now - last) * rate >= capacity]
+        for key in full:
+            del self.buckets[key]
+
+
+class CacheTokenBucketBackend:
+    """
+    Token bucket store in a Django cache shared by all the workers.
+
+    Note: The read-modify-write is not atomic, concurrent requests for the same
+    key may occasionally be granted a token more than the bucket holds.
+    """
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def consume(self, key, rate, capacity):
+        """
+        Take a token from the bucket, return the seconds to wait (0 if the token was granted).
+        """
+        now = time.time()
+        cache_key = f'throttle:{key}'
+        tokens, last = self.cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + max(0, now - last) * rate)
+        if tokens >= 1:
+            tokens, wait = tokens - 1, 0
+        else:
+            wait = (1 - tokens) / rate
+        self.cache.set(cache_key, (tokens, now), timeout=int(capacity / rate) + 1)
+        return wait
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """
+    Get the configured token bucket backend (created once per process).
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                conf = get_throttle_settings()
+                if conf['BACKEND'] == 'cache':
+                    _backend = CacheTokenBucketBackend(conf['CACHE_ALIAS'])
+                else:
+                    _backend = LocalTokenBucketBackend(conf['MAX_KEYS'])
+    return _backend
+
+
+class VoterRateThrottle(BaseThrottle):
+    """
+    Token bucket throttle keyed by the client IP (see NUM_PROXIES) and the instance hash.
+    """
+    def allow_request(self, request, view):
+        """
+        Check if the request can be served, a token is taken from the bucket if so.
+        """
+        conf = get_throttle_settings()
+        hash_value = view.kwargs.get('hash') if hasattr(view, 'kwargs') else None
+        if not hash_value and request.method == 'POST':
+            hash_value = request.data.get('hash')
+        key = f'{self.get_ident(request)}:{hash_value or "-"}'
+
+        self.wait_time = get_backend().consume(key, float(conf['RATE']), float(conf['BURST']))
+        if self.wait_time:
+            incr_counter('throttle_denied')
+            return False
+        incr_counter('throttle_allowed')
+        return True
+
+    def wait(self):
+        """
+        Return the number of seconds until a token is available.
+        """
+        return self.wait_time
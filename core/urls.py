@@ -7,7 +7,7 @@ Author: Divij Sharma <divijs75@gmail.com>
 """
 
 from django.urls import path, include
-from core.views import CustomTokenObtainPairView, home, check_username_exists
+from core.views import CustomTokenObtainPairView, home, check_username_exists, metrics
 
 urlpatterns = [
     path('jwt/create', CustomTokenObtainPairView.as_view(), name='custom_jwt_create'),
@@ -16,4 +16,5 @@ urlpatterns = [
     # path('', include("djoser.social.urls")),
     path('status', home, name='home'),
     path('exists', check_username_exists, name='exists'),
+    path('metrics', metrics, name='metrics'),
 ]
@@ -7,12 +7,17 @@ Author: Divij Sharma <divijs75@gmail.com>
 """
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.settings import api_settings
 from .serializers import CustomTokenObtainPairSerializer
+from .throttling import get_counters
+from .cache import is_missing_username, remember_missing_username
+from .bloom import username_index
 
 User = get_user_model()
 
@@ -22,11 +27,15 @@ User = get_user_model()
 def check_username_exists(request):
     """
     Check if a username exists in the user model.
+
+    Definite negatives of the in-memory username index are answered without a query.
     """
-    if not request.data.get('username'):
+    username = request.data.get('username')
+    if not isinstance(username, str) or not username:
         return Response({'error': 'Bad_request'}, status=status.HTTP_400_BAD_REQUEST)
 
-    username = request.data.get('username')
+    if not username_index.might_exist(username):
+        return Response({'username_exists': False}, status=status.HTTP_404_NOT_FOUND)
     try:
         User.objects.get(username=username)
         return Response({'username_exists': True}, status=status.HTTP_200_OK)
@@ -43,6 +52,15 @@ def home(request):
     return Response({'detail': 'Love from the server :). Seems like you are authenticated.'}, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """
+    Metrics view that returns the throttling and load shedding counters of this process.
+    """
+    return Response(get_counters(), status=status.HTTP_200_OK)
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     """
     Custom view for obtaining JWT tokens.
@@ -51,15 +69,35 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 
     def post(self, request, *args, **kwargs):
         """
-         Handle POST request for obtaining JWT token.
+        Handle POST request for obtaining JWT token.
+
+        The user is fetched once and its password checked once, the tokens are then
+        issued directly. Unknown usernames are remembered for a while so repeated
+        attempts do not reach the database.
         """
-        try:
-            user = User.objects.get(username=request.data.get('username'))
-            if not user.is_active:
-                return Response({'detail': 'Account not activated'}, status=status.HTTP_401_UNAUTHORIZED)
-            if user.is_deactivated:
-                return Response({'detail': 'Account deactivated'}, status=status.HTTP_401_UNAUTHORIZED)
-        except User.DoesNotExist:
+        username = request.data.get('username')
+        password = request.data.get('password')
+        if not isinstance(username, str) or not username or is_missing_username(username):
             return Response({'error': 'Invalid username or password'}, status=status.HTTP_400_BAD_REQUEST)
 
-        return super().post(request, *args, **kwargs)
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            # The negative lookup covers the case variants, only remembered if none exists
+            if not User.objects.filter(username__iexact=username).exists():
+                remember_missing_username(username)
+            return Response({'error': 'Invalid username or password'}, status=status.HTTP_400_BAD_REQUEST)
+        if not user.is_active:
+            return Response({'detail': 'Account not activated'}, status=status.HTTP_401_UNAUTHORIZED)
+        if user.is_deactivated:
+            return Response({'detail': 'Account deactivated'}, status=status.HTTP_401_UNAUTHORIZED)
+        if not password or not user.check_password(password):
+            return Response({'detail': 'No active account found with the given credentials'},
+                            status=status.HTTP_401_UNAUTHORIZED)
+
+        refresh = self.serializer_class.get_token(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+
+        data = {'refresh': str(refresh), 'access': str(refresh.access_token)}
+        data.update(self.serializer_class.get_profile(user))
+        return Response(data, status=status.HTTP_200_OK)
@@ -7,7 +7,8 @@ Author: Divij Sharma <divijs75@gmail.com>
 """
 
 from django.contrib import admin
-from .models import Skeleton, Field, Response, Answer
+from core.admin import EstimatedCountPaginator, input_filter
+from .models import Skeleton, Section, Field, Response, Answer, AnswerValue, FileBlob, Upload, Draft
 
 
 class SkeletonAdmin(admin.ModelAdmin):
@@ -15,8 +16,10 @@ class SkeletonAdmin(admin.ModelAdmin):
     Custom Skeleton admin settings.
     """
     list_display = ('title', 'instance', 'description', 'created_at', 'endMessage')
-    search_fields = ('title', 'endMessage')
+    search_fields = ('^title', '=instance__hash')
     list_filter = ('created_at',)
+    list_select_related = ('instance',)
+    autocomplete_fields = ('instance',)
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
     fieldsets = (
@@ -29,17 +32,36 @@ class SkeletonAdmin(admin.ModelAdmin):
     )
 
 
+class SectionAdmin(admin.ModelAdmin):
+    """
+    Custom Section admin settings.
+    """
+    list_display = ('title', 'skeleton', 'position')
+    search_fields = ('^title',)
+    list_filter = (input_filter('skeleton id', 'skeleton', 'skeleton_id'),)
+    list_select_related = ('skeleton',)
+    autocomplete_fields = ('skeleton',)
+    ordering = ('skeleton', 'position')
+    fieldsets = (
+        ('Section Info', {
+            'fields': ('skeleton', 'title', 'description', 'position')
+        }),
+    )
+
+
 class FieldAdmin(admin.ModelAdmin):
     """
     Custom Field admin settings.
     """
-    list_display = ('title', 'type', 'required', 'skeleton')
-    search_fields = ('title', 'type')
-    list_filter = ('type', 'required')
+    list_display = ('title', 'type', 'required', 'skeleton', 'section')
+    search_fields = ('^title',)
+    list_filter = ('type', 'required', input_filter('skeleton id', 'skeleton', 'skeleton_id'))
+    list_select_related = ('skeleton', 'section')
+    autocomplete_fields = ('skeleton', 'section')
     ordering = ('skeleton', 'title')
     fieldsets = (
         ('Field Info', {
-            'fields': ('skeleton', 'title', 'type', 'required')
+            'fields': ('skeleton', 'section', 'title', 'type', 'required')
         }),
         ('Options', {
             'fields': ('options', 'accepted')
@@ -52,47 +74,115 @@ class ResponseAdmin(admin.ModelAdmin):
     Custom Response admin settings.
     """
     list_display = ('skeleton', 'submitted_at', 'user')
-    search_fields = ('skeleton__title', 'user__username')
-    list_filter = ('submitted_at', 'user')
+    search_fields = ('^user__username', '=instance__hash')
+    list_filter = ('submitted_at', input_filter('instance hash', 'instance', 'instance__hash'),
+                   input_filter('voter username', 'voter', 'user__username'))
+    list_select_related = ('skeleton', 'user')
+    autocomplete_fields = ('instance', 'skeleton', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ('-submitted_at',)
     readonly_fields = ('submitted_at',)
     fieldsets = (
         ('Response Info', {
-            'fields': ('skeleton', 'submitted_at', 'user')
+            'fields': ('instance', 'skeleton', 'submitted_at', 'user')
         }),
     )
 
-    def get_queryset(self, request):
-        """
-        Customize the queryset to include related fields.
-        """
-        queryset = super().get_queryset(request)
-        return queryset.select_related('skeleton', 'user')
-
 
 class AnswerAdmin(admin.ModelAdmin):
     """
     Custom Answer admin settings.
     """
     list_display = ('response', 'field', 'value')
-    search_fields = ('response__skeleton__title', 'field__title', 'value')
-    list_filter = ('field', 'response__skeleton')
-    ordering = ('response', 'field')
+    search_fields = ('^field__title',)
+    list_filter = (input_filter('field id', 'field', 'field_id'),
+                   input_filter('skeleton id', 'skeleton', 'field__skeleton_id'),
+                   input_filter('response id', 'response', 'response_id'))
+    list_select_related = ('response', 'field')
+    autocomplete_fields = ('response', 'field', 'value_ref')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
     fieldsets = (
         ('Answer Info', {
-            'fields': ('response', 'field', 'value')
+            'fields': ('response', 'field', 'value_ref')
         }),
     )
 
-    def get_queryset(self, request):
-        """
-        Customize the queryset to include related fields.
-        """
-        queryset = super().get_queryset(request)
-        return queryset.select_related('response', 'field')
+
+class AnswerValueAdmin(admin.ModelAdmin):
+    """
+    Custom AnswerValue admin settings.
+    """
+    list_display = ('key', 'digest')
+    search_fields = ('^key',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+    readonly_fields = ('digest', 'key', 'value')
+
+
+class FileBlobAdmin(admin.ModelAdmin):
+    """
+    Custom FileBlob admin settings.
+    """
+    list_display = ('sha256', 'size', 'content_type', 'created_at')
+    search_fields = ('=sha256',)
+    list_filter = ('created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-created_at',)
+    readonly_fields = ('sha256', 'size', 'content_type', 'name', 'created_at')
+
+
+class UploadAdmin(admin.ModelAdmin):
+    """
+    Custom Upload admin settings.
+    """
+    list_display = ('filename', 'instance', 'field', 'size', 'offset', 'status', 'updated_at')
+    search_fields = ('^filename', '=instance__hash')
+    list_filter = ('status', 'updated_at', input_filter('instance hash', 'instance', 'instance__hash'))
+    list_select_related = ('instance', 'field')
+    autocomplete_fields = ('instance', 'field', 'user', 'response')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-updated_at',)
+    readonly_fields = ('id', 'blob', 'size', 'offset', 'created_at', 'updated_at')
+    fieldsets = (
+        ('Upload Info', {
+            'fields': ('id', 'instance', 'field', 'user', 'response', 'filename', 'content_type', 'status')
+        }),
+        ('Content', {
+            'fields': ('blob', 'size', 'offset')
+        }),
+        ('Dates', {
+            'fields': ('created_at', 'updated_at')
+        }),
+    )
+
+
+class DraftAdmin(admin.ModelAdmin):
+    """
+    Custom Draft admin settings.
+    """
+    list_display = ('key', 'instance', 'user', 'revision', 'updated_at')
+    search_fields = ('=instance__hash', '^user__username')
+    list_filter = ('updated_at', input_filter('instance hash', 'instance', 'instance__hash'))
+    list_select_related = ('instance', 'user')
+    autocomplete_fields = ('instance', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-updated_at',)
+    readonly_fields = ('key', 'revision', 'created_at', 'updated_at')
 
 
 admin.site.register(Skeleton, SkeletonAdmin)
+admin.site.register(Section, SectionAdmin)
 admin.site.register(Field, FieldAdmin)
 admin.site.register(Response, ResponseAdmin)
 admin.site.register(Answer, AnswerAdmin)
+admin.site.register(AnswerValue, AnswerValueAdmin)
+admin.site.register(FileBlob, FileBlobAdmin)
+admin.site.register(Upload, UploadAdmin)
+admin.site.register(Draft, DraftAdmin)
@@ -0,0 +1,154 @@
+"""
+Brief: Django analytics.py file.
+
+Description: This file contains the cross-tabulation engine of the Django data app.
+The answers to the selected choice fields are loaded as integer-coded NumPy arrays
+(option index per response) and counted with vectorized bincounts. The tables are
+cached per skeleton version with the high-water mark (last response id) they
+cover, later requests only load and add the responses submitted since then.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from .models import Answer, Response
+from .values import decode_values
+
+CHOICE_TYPES = ('multioption-singleanswer', 'multioption-multianswer')
+
+
+def encode_value(value, codes):
+    """
+    Get the option indexes of an answer value (an option, an option index or a list of them).
+    """
+    values = value if isinstance(value, list) else [value]
+    indexes = []
+    for item in values:
+        if isinstance(item, str) and item in codes:
+            indexes.append(codes[item])
+        elif isinstance(item, int) and not isinstance(item, bool) and 0 <= item < len(codes):
+            indexes.append(item)
+    return indexes
+
+
+def load_codes(skeleton_id, fields, after_id=0, chunk_size=5000):
+    """
+    Load the coded answers of the fields for the responses with an id above after_id.
+
+    Returns the number of loaded responses, the highest response id, and per field
+    the (response position, option index) arrays.
+    """
+    codes = {field.id: {option: index for index, option in enumerate(field.options or [])} for field in fields}
+    response_ids, positions, options = [], {field.id: [] for field in fields}, {field.id: [] for field in fields}
+
+    responses = Response.objects.filter(skeleton_id=skeleton_id, id__gt=after_id)
+    for response_id in responses.order_by('id').values_list('id', flat=True).iterator(chunk_size=chunk_size):
+        response_ids.append(response_id)
+    if not response_ids:
+        return 0, after_id, {field.id: (np.empty(0, np.int64), np.empty(0, np.int64)) for field in fields}
+    high_water = response_ids[-1]
+    index = {response_id: position for position, response_id in enumerate(response_ids)}
+
+    answers = Answer.objects.filter(
+        field_id__in=list(codes), response__skeleton_id=skeleton_id, response_id__gt=after_id,
+        response_id__lte=high_water).values_list('response_id', 'field_id', 'value_ref_id')
+    answers = list(answers.iterator(chunk_size=chunk_size))
+    # The interned values are decoded and encoded once per (field, value)
+    values = decode_values({value_id for _, _, value_id in answers})
+    encoded = {}
+    for response_id, field_id, value_id in answers:
+        if (field_id, value_id) not in encoded:
+            encoded[(field_id, value_id)] = encode_value(values[value_id], codes[field_id])
+        for option in encoded[(field_id, value_id)]:
+            positions[field_id].append(index[response_id])
+            options[field_id].append(option)
+
+    return len(response_ids), high_water, {
+        field_id: (np.asarray(positions[field_id], np.int64), np.asarray(options[field_id], np.int64))
+        for field_id in codes
+    }
+
+
+def count_options(coded, size):
+    """
+    Count the answers per option of one field.
+    """
+    _, options = coded
+    return np.bincount(options, minlength=size)
+
+
+def crosstab(coded_rows, coded_columns, responses, size_rows, size_columns):
+    """
+    Count the responses per (row option, column option) pair of two fields.
+
+    Details: Single answers are counted with one bincount over the combined codes,
+    multiple answers by pairing the row and column answers of every response, then
+    one bincount over the combined codes of the pairs (memory proportional to the
+    pairs, not to responses by options).
+    """
+    row_positions, row_options = coded_rows
+    column_positions, column_options = coded_columns
+    if len(np.unique(row_positions)) == len(row_positions) and \
+            len(np.unique(column_positions)) == len(column_positions):
+        rows = np.full(responses, -1, np.int64)
+        rows[row_positions] = row_options
+        columns = np.full(responses, -1, np.int64)
+        columns[column_positions] = column_options
+        answered = (rows >= 0) & (columns >= 0)
+        combined = rows[answered] * size_columns + columns[answered]
+        return np.bincount(combined, minlength=size_rows * size_columns).reshape(size_rows, size_columns)
+
+    # Every (row option, column option) pair of a response: the column answers are sorted by response,
+    # each row answer is repeated once per column answer of its response and paired with them
+    order = np.argsort(column_positions, kind='stable')
+    column_options = column_options[order]
+    column_counts = np.bincount(column_positions, minlength=responses)
+    column_starts = np.cumsum(column_counts) - column_counts
+    repeats = column_counts[row_positions]
+    total = int(repeats.sum())
+    group_starts = np.repeat(np.cumsum(repeats) - repeats, repeats)
+    paired = np.repeat(column_starts[row_positions], repeats) + np.arange(total) - group_starts
+    combined = np.repeat(row_options, repeats) * size_columns + column_options[paired]
+    return np.bincount(combined, minlength=size_rows * size_columns).reshape(size_rows, size_columns)
+
+
+def compute_counts(skeleton_id, fields, after_id=0):
+    """
+    Compute the counts table of one (per option) or two fields (crosstab) over the responses above after_id.
+    """
+    responses, high_water, coded = load_codes(skeleton_id, fields, after_id)
+    sizes = [len(field.options or []) for field in fields]
+    if len(fields) == 1:
+        table = count_options(coded[fields[0].id], sizes[0])
+    else:
+        table = crosstab(coded[fields[0].id], coded[fields[1].id], responses, *sizes)
+    return responses, high_water, table
+
+
+def get_counts(skeleton, fields):
+    """
+    Get the counts table of the fields, updating the cached table with the new responses only.
+
+    Details: A deletion of responses below the high-water mark is detected by
+    comparing the number of covered responses, the table is then recomputed.
+    """
+    key = f"crosstab:{skeleton.id}:{skeleton.version}:{':'.join(str(field.id) for field in fields)}"
+    cached = cache.get(key)
+    if cached is not None and Response.objects.filter(
+            skeleton_id=skeleton.id, id__lte=cached['high_water']).count() != cached['responses']:
+        cached = None
+
+    if cached is None:
+        responses, high_water, table = compute_counts(skeleton.id, fields)
+    else:
+        responses, high_water, table = compute_counts(skeleton.id, fields, cached['high_water'])
+        responses += cached['responses']
+        table = table + np.asarray(cached['table'], np.int64)
+        if high_water == cached['high_water']:
+            return responses, table
+
+    cache.set(key, {'responses': responses, 'high_water': high_water, 'table': table.tolist()},
+              getattr(settings, 'CROSSTAB_CACHE_TTL', 86400))
+    return responses, table
@@ -0,0 +1,251 @@
+"""
+Brief: Django downloads.py file.
+
+Description: This file contains the downloads of the file answers for the Django
+data app. A single file is served from the answer files storage with FileResponse
+(handed to the sendfile based wsgi.file_wrapper of the server when the whole file
+or its tail is sent), or delegated to the front web server (X-Accel-Redirect or
+X-Sendfile, only for the storages with local paths), with support of the HTTP Range
+requests. The files of a form are exported as a ZIP archive generated on the fly
+while it is streamed, holding at most one storage chunk in memory and without
+temporary files.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import re
+import zipfile
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponse
+from django.utils.text import get_valid_filename
+from .models import Answer, FileBlob
+from .storage import get_storage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+EXPORT_BATCH_SIZE = 500
+
+
+class RangeFile:
+    """
+    Read only view of a byte range of a file.
+    """
+    def __init__(self, file, length):
+        """
+        Wrap the file positioned at the start of the range.
+        """
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        """
+        Read up to size bytes without going past the end of the range.
+        """
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        """
+        Close the underlying file.
+        """
+        self.file.close()
+
+
+class ZipStream:
+    """
+    Write only (non seekable) output of the ZIP archive, drained after every write.
+    """
+    def __init__(self):
+        """
+        Start with an empty buffer.
+        """
+        self.buffer = bytearray()
+        self.position = 0
+
+    def write(self, data):
+        """
+        Append the data to the buffer.
+        """
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        """
+        Get the number of bytes written so far.
+        """
+        return self.position
+
+    def flush(self):
+        """
+        Nothing to flush, the buffer is drained by the generator.
+        """
+
+    def drain(self):
+        """
+        Get and clear the buffered bytes.
+        """
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def parse_range(header, size):
+    """
+    Parse a single range Range header, return the (start, end) inclusive range, None for the whole
+    file (missing, malformed or multiple ranges) or False when the range is not satisfiable.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Suffix range, the last bytes of the file
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def get_safe_filename(name, default):
+    """
+    Get a file name safe for the archives and the Content-Disposition header.
+    """
+    try:
+        return get_valid_filename(name)
+    except SuspiciousFileOperation:
+        return default
+
+
+def get_file_blob(value):
+    """
+    Get the stored file of a file answer value, None if the value is not a file.
+    """
+    if not isinstance(value, dict) or 'sha256' not in value:
+        return None
+    return FileBlob.objects.filter(sha256=value['sha256']).first()
+
+
+def get_sendfile_path(name):
+    """
+    Get the local path of a stored file for X-Sendfile, None if the storage has no local paths.
+    """
+    try:
+        return get_storage().path(name)
+    except NotImplementedError:
+        return None
+
+
+def serve_file(request, blob, filename, content_type=''):
+    """
+    Serve a stored file, whole or the requested range.
+    """
+    etag = f'"{blob.sha256}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    accel = getattr(settings, 'FILE_DOWNLOAD_ACCEL', '')
+    path = get_sendfile_path(blob.name) if accel == 'x-sendfile' else None
+    if accel and (path or accel != 'x-sendfile'):
+        # The front web server sends the file (and handles the ranges)
+        response = HttpResponse(content_type=content_type or blob.content_type or 'application/octet-stream')
+        if path:
+            response['X-Sendfile'] = path
+        else:
+            response['X-Accel-Redirect'] = settings.FILE_DOWNLOAD_ACCEL_PREFIX.rstrip('/') + '/' + blob.name
+        response['Content-Disposition'] = f'attachment; filename="{get_safe_filename(filename, blob.sha256)}"'
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    if request.headers.get('If-Range', etag) == etag:
+        byte_range = parse_range(request.headers.get('Range'), blob.size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{blob.size}'
+        return response
+
+    file = get_storage().open(blob.name, 'rb')
+    content_type = content_type or blob.content_type or 'application/octet-stream'
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        if end == blob.size - 1:
+            # Tail of the file, still sent by the file wrapper of the server
+            response = FileResponse(file, as_attachment=True, filename=filename, content_type=content_type)
+        else:
+            response = FileResponse(RangeFile(file, end - start + 1), as_attachment=True, filename=filename,
+                                    content_type=content_type)
+        response.status_code = 206
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{blob.size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
+
+
+def iter_file_answers(skeleton_id, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Iterate the (response id, field id, value, blob) of the file answers of a skeleton, in keyset batches.
+    """
+    answers = Answer.objects.filter(field__skeleton_id=skeleton_id, field__type='file').order_by('id')
+    last_id = 0
+    while True:
+        rows = list(answers.filter(id__gt=last_id).values_list(
+            'id', 'response_id', 'field_id', 'value_ref__value')[:batch_size])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        digests = {value['sha256'] for *_, value in rows if isinstance(value, dict) and 'sha256' in value}
+        blobs = FileBlob.objects.in_bulk(list(digests), field_name='sha256')
+        for _, response_id, field_id, value in rows:
+            blob = blobs.get(value['sha256']) if isinstance(value, dict) and 'sha256' in value else None
+            if blob is not None:
+                yield response_id, field_id, value, blob
+
+
+def stream_zip(files):
+    """
+    Generate the ZIP archive of the (archive name, blob) files chunk by chunk.
+    """
+    storage = get_storage()
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name, blob in files:
+            info = zipfile.ZipInfo(name, date_time=blob.created_at.timetuple()[:6])
+            info.file_size = blob.size
+            with storage.open(blob.name, 'rb') as source, \
+                    archive.open(info, 'w', force_zip64=blob.size >= zipfile.ZIP64_LIMIT) as target:
+                for chunk in source.chunks():
+                    target.write(chunk)
+                    data = stream.drain()
+                    if data:
+                        yield data
+            data = stream.drain()
+            if data:
+                yield data
+    yield stream.drain()
+
+
+def export_files(skeleton_id):
+    """
+    Generate the ZIP archive of the file answers of a skeleton (one folder per response).
+    """
+    files = (
+        (f'{response_id}/{field_id}-{get_safe_filename(value.get("name") or "", blob.sha256)}', blob)
+        for response_id, field_id, value, blob in iter_file_answers(skeleton_id)
+    )
+    return stream_zip(files)
@@ -0,0 +1,107 @@
+"""
+Brief: Django drafts.py file.
+
+Description: This file contains the partial saves of the answers for the Django
+data app. A draft holds the answers of a voter as one merged document (question
+id -> value) in a single row, each save sends only the changed answers (a null
+value removes an answer) and is merged under a row lock. The submission of the
+draft goes through the regular submission, which creates the response and its
+answers in one bulk insert and deletes the draft.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from core.records import format_datetime
+from .models import Draft, Field
+
+
+class DraftConflict(APIException):
+    """
+    Raised when a draft was saved since the revision the changes are based on.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The draft was saved meanwhile, reload it before saving again.'
+    default_code = 'conflict'
+
+
+def merge_answers(answers, changes, field_ids):
+    """
+    Merge the changed answers ([{id, value}]) into the answers document of a draft.
+    """
+    if not isinstance(changes, list):
+        raise ValidationError({'answers': 'A list of answers is expected.'})
+    for change in changes:
+        try:
+            field_id = int(change['id'])
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError({'answers': 'Id and value are required for answer.'})
+        if field_id not in field_ids:
+            raise ValidationError({'answers': f'The question {field_id} does not belong to the form.'})
+        value = change.get('value')
+        if value is None:
+            answers.pop(str(field_id), None)
+        else:
+            answers[str(field_id)] = value
+    return answers
+
+
+def save_draft(draft, changes, revision=None):
+    """
+    Merge the changed answers into the draft, return the saved draft.
+
+    Details: The row is locked while merging so concurrent saves never lose an
+    answer. When the revision the changes are based on is given, a draft saved
+    since then is refused.
+    """
+    if revision is not None:
+        try:
+            revision = int(revision)
+        except (TypeError, ValueError):
+            raise ValidationError({'revision': 'A valid integer is required.'})
+    field_ids = set(Field.objects.filter(skeleton__instance_id=draft.instance_id).values_list('id', flat=True))
+    with transaction.atomic():
+        draft = Draft.objects.select_for_update().get(pk=draft.pk)
+        if revision is not None and revision != draft.revision:
+            raise DraftConflict()
+        merge_answers(draft.answers, changes, field_ids)
+        if len(json.dumps(draft.answers)) > settings.DRAFT_MAX_SIZE:
+            raise ValidationError({'answers': f'The draft exceeds {settings.DRAFT_MAX_SIZE} bytes.'})
+        draft.revision += 1
+        draft.save(update_fields=['answers', 'revision', 'updated_at'])
+    return draft
+
+
+def get_draft_answers(draft):
+    """
+    Get the answers of a draft in the submission format ([{id, value}]).
+    """
+    return [{'id': int(field_id), 'value': value} for field_id, value in draft.answers.items()]
+
+
+def get_draft_state(draft):
+    """
+    Get the state of a draft returned to the voter.
+    """
+    return {
+        'key': str(draft.key),
+        'answers': get_draft_answers(draft),
+        'revision': draft.revision,
+        'updated_at': format_datetime(draft.updated_at),
+    }
+
+
+def purge_drafts(expiry_days=None):
+    """
+    Delete the drafts not saved for longer than the expiry, return the number of deleted drafts.
+    """
+    if expiry_days is None:
+        expiry_days = settings.DRAFT_EXPIRY_DAYS
+    deleted, _ = Draft.objects.filter(updated_at__lt=timezone.now() - timedelta(days=expiry_days)).delete()
+    return deleted
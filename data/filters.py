@@ -0,0 +1,132 @@
+"""
+Brief: Django filters.py file.
+
+Description: This file contains the query string filters of the responses for the
+Django data app. Besides the date range and user filters, answer predicates are
+given as field=<question id>&eq=<value> pairs; they are matched on the indexed
+(field, value_ref) answer columns, the most selective predicate first.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import datetime
+import json
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Length
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from .models import Field, Answer, AnswerValue, VALUE_KEY_MAX_LENGTH, make_value_key
+
+
+def parse_timestamp(value, name):
+    """
+    Parse an ISO 8601 date or datetime query parameter into an aware datetime.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: 'Expected an ISO 8601 date or datetime.'})
+        parsed = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+    return parsed
+
+
+def parse_response_filters(params):
+    """
+    Get the Response lookups for the date range (after, before) and user query parameters.
+    """
+    lookup = {}
+    if params.get('after'):
+        lookup['submitted_at__gte'] = parse_timestamp(params['after'], 'after')
+    if params.get('before'):
+        lookup['submitted_at__lt'] = parse_timestamp(params['before'], 'before')
+    if params.get('user'):
+        lookup['user__username'] = params['user']
+    return lookup
+
+
+def parse_answer_filters(params):
+    """
+    Get the (question id, value) answer predicates of the field/eq query parameter pairs.
+    """
+    fields, values = params.getlist('field'), params.getlist('eq')
+    if len(fields) != len(values):
+        raise ValidationError({'eq': 'Every field parameter needs an eq parameter.'})
+    try:
+        return [(int(field), value) for field, value in zip(fields, values)]
+    except ValueError:
+        raise ValidationError({'field': 'Expected question ids.'})
+
+
+def get_answer_lookup(field_type, value):
+    """
+    Get the Answer lookup of a predicate: the whole value, or one of the options for multiple answers.
+
+    The matching interned values are resolved first, the answers are then selected by value id.
+
+    Details: The options of the multiple answers are matched with a JSON containment
+    lookup where the backend supports it (PostgreSQL, MySQL). Elsewhere the values
+    whose key holds the quoted option, or is truncated, are checked in Python. A
+    whole value is matched on its indexed key, and only checked in Python when the
+    key is truncated (the long values sharing its first VALUE_KEY_MAX_LENGTH characters).
+    """
+    if field_type == 'multioption-multianswer':
+        if connections[AnswerValue.objects.db].features.supports_json_field_contains:
+            values = AnswerValue.objects.filter(value__contains=[value])
+            return {'value_ref_id__in': list(values.values_list('id', flat=True))}
+        values = AnswerValue.objects.annotate(key_length=Length('key')).filter(
+            Q(key__contains=json.dumps(value, ensure_ascii=False)) | Q(key_length__gte=VALUE_KEY_MAX_LENGTH))
+        return {'value_ref_id__in': [value_id for value_id, candidate in values.values_list('id', 'value')
+                                     if isinstance(candidate, list) and value in candidate]}
+
+    key = make_value_key(value)
+    values = AnswerValue.objects.filter(key=key)
+    if len(key) < VALUE_KEY_MAX_LENGTH:
+        return {'value_ref_id__in': list(values.values_list('id', flat=True))}
+    key = make_value_key(value, None)
+    return {'value_ref_id__in': [value_id for value_id, candidate in values.values_list('id', 'value')
+                                 if make_value_key(candidate, None) == key]}
+
+
+def filter_answers(queryset, skeleton_ids, predicates):
+    """
+    Filter the Response queryset by the answer predicates.
+
+    Details: The number of answers matching every predicate is counted on the
+    (field, value_ref) index and the predicates are applied from the most
+    selective one. When it matches at most FILTER_MATERIALIZE_LIMIT answers its
+    response ids are fetched and only those responses are checked against the
+    next predicates, otherwise the predicates become subqueries in that order.
+    """
+    if not predicates:
+        return queryset
+    field_types = dict(Field.objects.filter(
+        skeleton_id__in=skeleton_ids, id__in={field_id for field_id, _ in predicates}).values_list('id', 'type'))
+    if len(field_types) != len({field_id for field_id, _ in predicates}):
+        raise ValidationError({'field': 'Unknown question id.'})
+
+    answers = [
+        Answer.objects.filter(field_id=field_id, **get_answer_lookup(field_types[field_id], value))
+        for field_id, value in predicates
+    ]
+    planned = sorted(((answer.count(), index) for index, answer in enumerate(answers)))
+    if planned[0][0] == 0:
+        return queryset.none()
+
+    if planned[0][0] <= getattr(settings, 'FILTER_MATERIALIZE_LIMIT', 5000):
+        response_ids = set(answers[planned[0][1]].values_list('response_id', flat=True))
+        for _, index in planned[1:]:
+            if not response_ids:
+                break
+            response_ids = set(answers[index].filter(response_id__in=response_ids).values_list(
+                'response_id', flat=True))
+        return queryset.filter(id__in=response_ids)
+
+    for _, index in planned:
+        queryset = queryset.filter(id__in=answers[index].values('response_id'))
+    return queryset
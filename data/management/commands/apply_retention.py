@@ -0,0 +1,55 @@
+"""
+Brief: Django apply_retention management command.
+
+Description: This command deletes the responses (and their answers) older than the
+retention window of their instance, in bounded chunks with a pause between them so
+the purge does not hold long locks while voting is in progress.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.deletion import delete_cascade
+from live.models import Instance
+from live.stats import reconcile_stats
+from data.timeseries import rebuild_buckets
+from data.models import Response
+
+
+class Command(BaseCommand):
+    """
+    Apply the per-instance response retention policies.
+    """
+    help = 'Delete the responses older than the retention window of their instance.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--chunk-size', type=int, default=getattr(settings, 'RESPONSE_PURGE_CHUNK_SIZE', 1000),
+                            help='Rows deleted per statement.')
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to sleep between statements.')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired responses.')
+
+    def handle(self, *args, **options):
+        """
+        Purge the expired responses of every instance with a retention window.
+        """
+        now = timezone.now()
+        instances = Instance.objects.filter(retention_days__isnull=False).values_list('id', 'hash', 'retention_days')
+        for instance_id, hash, retention_days in instances:
+            lookup = {'instance_id': instance_id,
+                      'submitted_at__lt': now - datetime.timedelta(days=retention_days)}
+            if options['dry_run']:
+                count = Response.objects.filter(**lookup).count()
+                self.stdout.write(f'Instance {hash}: {count} responses past {retention_days} days')
+                continue
+            deleted = delete_cascade(Response, lookup, chunk_size=options['chunk_size'], sleep=options['sleep'])
+            if deleted:
+                reconcile_stats(instance_id)
+                rebuild_buckets(instance_id)
+            self.stdout.write(f'Instance {hash}: deleted {deleted.get(Response._meta.label, 0)} responses '
+                              f'and {deleted.get("data.Answer", 0)} answers')
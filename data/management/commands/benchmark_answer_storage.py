@@ -0,0 +1,125 @@
+"""
+Brief: Django benchmark_answer_storage management command.
+
+Description: This command measures the interned answer storage on a seeded poll
+(a million answers by default) whose answers repeat a few option labels and short
+texts: ingestion and listing times, distinct values, and the value bytes stored
+inline versus interned (plus the table sizes when the database reports them).
+The seeded rows are rolled back at the end of the run.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import json
+import random
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from core.models import User
+from core.records import dumps
+from live.models import Instance
+from data.models import Skeleton, Field, Response, Answer, AnswerValue
+from data.records import response_records
+
+
+class Rollback(Exception):
+    """
+    Raised to roll back the seeded rows.
+    """
+
+
+def get_table_size(model):
+    """
+    Get the size in bytes (data and indexes) of the model table, None when the database does not report it.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_total_relation_size(%s::regclass)', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute('SELECT data_length + index_length FROM information_schema.tables '
+                           'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the interned answer storage.
+    """
+    help = 'Benchmark the interned answer storage on a seeded poll.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--answers', type=int, default=1000000, help='Number of answers.')
+        parser.add_argument('--fields', type=int, default=10, help='Number of questions (answers per response).')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Answers inserted per statement batch.')
+
+    def handle(self, *args, **options):
+        """
+        Seed the rows, run the benchmark and roll back.
+        """
+        try:
+            with transaction.atomic():
+                self.run(options['answers'], options['fields'], options['batch_size'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, answers, fields, batch_size):
+        """
+        Seed the poll and report the measures.
+        """
+        random.seed(0)
+        suffix = uuid.uuid4().hex[:8]
+        owner = User.objects.create(username=f'bench-{suffix}', email=f'bench-{suffix}@example.com')
+        instance = Instance.objects.create(user=owner, name='benchmark', description='benchmark')
+        skeleton = Skeleton.objects.create(instance=instance, title='benchmark')
+        options = ['Strongly agree', 'Agree', 'Neutral', 'Disagree', 'Strongly disagree']
+        texts = ['Yes', 'No', 'n/a', 'Nothing to add', 'Great work'] + [f'Comment {i}' for i in range(200)]
+        field_objs = Field.objects.bulk_create([
+            Field(skeleton=skeleton, title=f'Question {i}', type='multioption-singleanswer', options=options)
+            if i % 2 else Field(skeleton=skeleton, title=f'Question {i}', type='short-text')
+            for i in range(fields)])
+
+        values_before = AnswerValue.objects.count()
+        inline_bytes = 0
+        start = time.perf_counter()
+        for offset in range(0, answers, batch_size):
+            count = min(batch_size, answers - offset)
+            responses = Response.objects.bulk_create([
+                Response(instance=instance, skeleton=skeleton) for _ in range(count // fields or 1)])
+            batch = []
+            for response in responses:
+                for field in field_objs:
+                    value = random.choice(options if field.type != 'short-text' else texts)
+                    inline_bytes += len(json.dumps(value, ensure_ascii=False).encode())
+                    batch.append(Answer(response=response, field=field, value=value))
+            Answer.objects.bulk_create(batch, batch_size=batch_size)
+        ingestion = time.perf_counter() - start
+
+        total = Answer.objects.filter(response__instance=instance).count()
+        value_ids = set(Answer.objects.filter(response__instance=instance).values_list('value_ref', flat=True))
+        distinct = len(value_ids)
+        interned_bytes = sum(len(json.dumps(value, ensure_ascii=False).encode()) for value in
+                             AnswerValue.objects.filter(id__in=value_ids).values_list('value', flat=True))
+
+        start = time.perf_counter()
+        dumps(response_records(Response.objects.filter(instance=instance)[:10000]))
+        listing = time.perf_counter() - start
+
+        self.stdout.write(f'answers         {total}')
+        self.stdout.write(f'distinct values {distinct} ({AnswerValue.objects.count() - values_before} new)')
+        self.stdout.write(f'ingestion       {ingestion:.1f} s ({total / ingestion:.0f} answers/s)')
+        self.stdout.write(f'listing         {listing * 1000:.1f} ms for 10000 responses')
+        self.stdout.write(f'value bytes     inline {inline_bytes}   interned {total * 8 + interned_bytes} '
+                          f'(8 byte references + distinct values)')
+        for model in (Answer, AnswerValue):
+            size = get_table_size(model)
+            if size is not None:
+                self.stdout.write(f'{model._meta.db_table:<15} {size} bytes')
@@ -0,0 +1,100 @@
+"""
+Brief: Django benchmark_serializers management command.
+
+Description: This command compares the DRF serializers with the record layer on
+seeded rows (responses, skeletons and social users). The seeded rows are rolled
+back at the end of the run.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import json
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from core.models import User
+from core.records import dumps
+from live.models import Instance, SocialUser
+from live.serializers import SocialUserSerializer
+from live.records import social_user_records
+from data.models import Skeleton, Field, Response, Answer
+from data.serializers import SkeletonSerializer, ResponseSerializer
+from data.records import skeleton_records, response_records
+
+
+class Rollback(Exception):
+    """
+    Raised to roll back the seeded rows.
+    """
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the DRF serializers against the record layer.
+    """
+    help = 'Benchmark the DRF serializers against the record layer on seeded rows.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--rows', type=int, default=10000, help='Number of responses and social users.')
+        parser.add_argument('--fields', type=int, default=5, help='Number of questions (answers per response).')
+
+    def handle(self, *args, **options):
+        """
+        Seed the rows, run the benchmark and roll back.
+        """
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['fields'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, rows, fields):
+        """
+        Seed the rows and time both serialization paths.
+        """
+        suffix = uuid.uuid4().hex[:8]
+        owner = User.objects.create(username=f'bench-{suffix}', email=f'bench-{suffix}@example.com')
+        instance = Instance.objects.create(user=owner, name='benchmark', description='benchmark')
+        skeleton = Skeleton.objects.create(instance=instance, title='benchmark')
+        field_objs = Field.objects.bulk_create([
+            Field(skeleton=skeleton, title=f'Question {i}', type='multioption-singleanswer',
+                  options=['Yes', 'No', 'Maybe']) for i in range(fields)])
+        users = SocialUser.objects.bulk_create([
+            SocialUser(instance=instance, username=f'voter{i}', first_name='First', last_name='Last',
+                       password='!') for i in range(rows)])
+        responses = Response.objects.bulk_create([
+            Response(instance=instance, skeleton=skeleton, user=user) for user in users])
+        Answer.objects.bulk_create([
+            Answer(response=response, field=field, value=['Yes', 'No', 'Maybe'][i % 3])
+            for i, response in enumerate(responses) for field in field_objs], batch_size=5000)
+
+        renderer = JSONRenderer()
+        cases = [
+            ('responses', Response.objects.filter(instance=instance),
+             lambda qs: renderer.render(ResponseSerializer(qs.select_related('user').prefetch_related('answers'),
+                                                           many=True).data),
+             lambda qs: dumps(response_records(qs))),
+            ('social users', SocialUser.objects.filter(instance=instance),
+             lambda qs: renderer.render(SocialUserSerializer(qs.select_related('instance'), many=True).data),
+             lambda qs: dumps(social_user_records(qs))),
+            ('skeleton', Skeleton.objects.filter(instance=instance),
+             lambda qs: renderer.render(SkeletonSerializer(qs, many=True).data),
+             lambda qs: dumps(skeleton_records(qs))),
+        ]
+        for name, queryset, drf, records in cases:
+            start = time.perf_counter()
+            drf_output = drf(queryset.all())
+            drf_time = time.perf_counter() - start
+            start = time.perf_counter()
+            records_output = records(queryset.all())
+            records_time = time.perf_counter() - start
+            if json.loads(drf_output) != json.loads(records_output):
+                self.stderr.write(f'{name}: outputs differ')
+            self.stdout.write(f'{name:<13} DRF {drf_time * 1000:>9.1f} ms   records {records_time * 1000:>9.1f} ms   '
+                              f'x{drf_time / records_time:.1f}')
@@ -0,0 +1,42 @@
+"""
+Brief: Django compact_submission_buckets management command.
+
+Description: This command prunes the submission buckets older than the retention
+of their resolution (the coarser buckets keep the counts), and can rebuild the
+buckets of instances from their responses (--rebuild, e.g. for a backfill).
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.core.management.base import BaseCommand
+from live.models import Instance
+from data.timeseries import prune_buckets, rebuild_buckets
+
+
+class Command(BaseCommand):
+    """
+    Compact the submission buckets.
+    """
+    help = 'Prune the expired submission buckets, optionally rebuilding them from the responses.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--rebuild', nargs='*', metavar='HASH',
+                            help='Rebuild the buckets of the given instances (every instance without hashes).')
+
+    def handle(self, *args, **options):
+        """
+        Rebuild the requested instances, then prune the expired buckets.
+        """
+        if options['rebuild'] is not None:
+            instances = Instance.objects.all()
+            if options['rebuild']:
+                instances = instances.filter(hash__in=options['rebuild'])
+            for instance_id, hash in instances.values_list('id', 'hash').iterator():
+                rebuild_buckets(instance_id)
+                self.stdout.write(f'Instance {hash}: buckets rebuilt')
+
+        for name, count in prune_buckets().items():
+            self.stdout.write(f'Pruned {count} {name} buckets')
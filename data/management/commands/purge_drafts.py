@@ -0,0 +1,32 @@
+"""
+Brief: Django purge_drafts management command.
+
+Description: This command deletes the drafts of the voters not saved for longer
+than the expiry.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.core.management.base import BaseCommand
+from data.drafts import purge_drafts
+
+
+class Command(BaseCommand):
+    """
+    Purge the expired drafts.
+    """
+    help = 'Delete the drafts not saved for longer than the expiry.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--expiry-days', type=int, default=None,
+                            help='Days an unsaved draft is kept for (defaults to DRAFT_EXPIRY_DAYS).')
+
+    def handle(self, *args, **options):
+        """
+        Purge the drafts.
+        """
+        deleted = purge_drafts(options['expiry_days'])
+        self.stdout.write(f'Removed {deleted} drafts')
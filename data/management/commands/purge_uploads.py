@@ -0,0 +1,33 @@
+"""
+Brief: Django purge_uploads management command.
+
+Description: This command removes the uploads of file answers left unused (never
+completed or never submitted) for longer than the expiry, with their partial
+files, and the stored files no longer referenced by any upload.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.core.management.base import BaseCommand
+from data.uploads import purge_uploads
+
+
+class Command(BaseCommand):
+    """
+    Purge the expired uploads and the unreferenced files.
+    """
+    help = 'Remove the expired unused uploads and the stored files no longer referenced.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--expiry-hours', type=int, default=None,
+                            help='Hours an unused upload is kept for (defaults to FILE_UPLOAD_EXPIRY_HOURS).')
+
+    def handle(self, *args, **options):
+        """
+        Purge the uploads and the files.
+        """
+        uploads, blobs = purge_uploads(options['expiry_hours'])
+        self.stdout.write(f'Removed {uploads} uploads and {blobs} files')
@@ -0,0 +1,37 @@
+"""
+Brief: Django rebuild_search_index management command.
+
+Description: This command rebuilds the inverted index of the text answers of the
+forms of every instance or of the given instances.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.core.management.base import BaseCommand
+from data.models import Skeleton
+from data.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the text answer search index.
+    """
+    help = 'Rebuild the inverted index of the text answers.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('hashes', nargs='*', help='Hashes of the instances, every instance by default.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Answers read per query.')
+
+    def handle(self, *args, **options):
+        """
+        Rebuild the index of the forms of the selected instances.
+        """
+        skeletons = Skeleton.objects.filter(instance__deleted_at__isnull=True)
+        if options['hashes']:
+            skeletons = skeletons.filter(instance__hash__in=options['hashes'])
+        for skeleton_id, hash in skeletons.values_list('id', 'instance__hash').iterator():
+            total = rebuild_index(skeleton_id, options['chunk_size'])
+            self.stdout.write(f'Instance {hash}: {total} index rows')
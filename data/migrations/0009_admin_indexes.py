@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0008_skeleton_description"),
+        ("live", "0019_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="response",
+            index=models.Index(fields=["submitted_at"], name="response_submitted_at"),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0009_admin_indexes"),
+        ("live", "0020_instancestats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubmissionBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.IntegerField(
+                        choices=[(1, "Minute"), (2, "Hour"), (4, "Day")]
+                    ),
+                ),
+                ("bucket_start", models.DateTimeField()),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "instance",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="submission_buckets",
+                        to="live.instance",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="submissionbucket",
+            constraint=models.UniqueConstraint(
+                fields=("instance", "resolution", "bucket_start"),
+                name="unique_instance_resolution_bucket",
+            ),
+        ),
+    ]
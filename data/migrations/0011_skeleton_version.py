@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0010_submissionbucket"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="skeleton",
+            name="version",
+            field=models.IntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0011_skeleton_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnswerToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=64)),
+                ("count", models.IntegerField(default=1)),
+                (
+                    "field",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="data.field",
+                    ),
+                ),
+                (
+                    "response",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="data.response",
+                    ),
+                ),
+                (
+                    "skeleton",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="data.skeleton",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["skeleton", "token"], name="answertoken_skeleton_token"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:58
+
+import json
+
+from django.db import migrations, models
+
+
+def make_value_key(value):
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = json.dumps(
+            value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+    return value[:255]
+
+
+def fill_value_keys(apps, schema_editor):
+    Answer = apps.get_model("data", "Answer")
+    last_id = 0
+    while True:
+        answers = list(
+            Answer.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "value")[:5000]
+        )
+        if not answers:
+            break
+        for answer in answers:
+            answer.value_key = make_value_key(answer.value)
+        Answer.objects.bulk_update(answers, ["value_key"])
+        last_id = answers[-1].id
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0012_answertoken"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answer",
+            name="value_key",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.RunPython(fill_value_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                fields=["field", "value_key"], name="answer_field_value_key"
+            ),
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:10
+
+import hashlib
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def digest_value(value):
+    canonical = json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def intern_answer_values(apps, schema_editor):
+    Answer = apps.get_model("data", "Answer")
+    AnswerValue = apps.get_model("data", "AnswerValue")
+    ids = {}
+    last_id = 0
+    while True:
+        answers = list(
+            Answer.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "value", "value_key")[:5000]
+        )
+        if not answers:
+            break
+        missing = {}
+        for answer in answers:
+            digest = digest_value(answer.value)
+            if digest not in ids:
+                missing[digest] = AnswerValue(
+                    digest=digest, key=answer.value_key, value=answer.value
+                )
+        if missing:
+            AnswerValue.objects.bulk_create(missing.values(), ignore_conflicts=True)
+            ids.update(
+                AnswerValue.objects.filter(digest__in=list(missing)).values_list(
+                    "digest", "id"
+                )
+            )
+        for answer in answers:
+            answer.value_ref_id = ids[digest_value(answer.value)]
+        Answer.objects.bulk_update(answers, ["value_ref"])
+        last_id = answers[-1].id
+
+
+def restore_answer_values(apps, schema_editor):
+    Answer = apps.get_model("data", "Answer")
+    last_id = 0
+    while True:
+        answers = list(
+            Answer.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .select_related("value_ref")
+            .only("id", "value_ref__key", "value_ref__value")[:5000]
+        )
+        if not answers:
+            break
+        for answer in answers:
+            answer.value = answer.value_ref.value
+            answer.value_key = answer.value_ref.key
+        Answer.objects.bulk_update(answers, ["value", "value_key"])
+        last_id = answers[-1].id
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0013_answer_value_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnswerValue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(max_length=64, unique=True)),
+                (
+                    "key",
+                    models.CharField(
+                        blank=True, db_index=True, default="", max_length=255
+                    ),
+                ),
+                ("value", models.JSONField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="answer",
+            name="value_ref",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="data.answervalue",
+            ),
+        ),
+        migrations.RunPython(intern_answer_values, restore_answer_values),
+        migrations.RemoveIndex(
+            model_name="answer",
+            name="answer_field_value_key",
+        ),
+        migrations.RemoveField(
+            model_name="answer",
+            name="value_key",
+        ),
+        migrations.RemoveField(
+            model_name="answer",
+            name="value",
+        ),
+        migrations.AlterField(
+            model_name="answer",
+            name="value_ref",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="data.answervalue",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="answer",
+            index=models.Index(
+                fields=["field", "value_ref"], name="answer_field_value_ref"
+            ),
+        ),
+    ]
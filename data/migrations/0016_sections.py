@@ -0,0 +1,56 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0015_uploads"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Section",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("description", models.TextField(blank=True, null=True)),
+                ("position", models.IntegerField(default=0)),
+                (
+                    "skeleton",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sections",
+                        to="data.skeleton",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="field",
+            name="section",
+            field=models.ForeignKey(
+                blank=True,
+                default=None,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="fields",
+                to="data.section",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="section",
+            index=models.Index(
+                fields=["skeleton", "position"], name="section_skeleton_position"
+            ),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:12
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0016_sections"),
+        ("live", "0020_instancestats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Draft",
+            fields=[
+                (
+                    "key",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("answers", models.JSONField(blank=True, default=dict)),
+                ("revision", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "instance",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="drafts",
+                        to="live.instance",
+                    ),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        blank=True,
+                        default=None,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="draft",
+                        to="live.socialuser",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["updated_at"], name="draft_updated_at")
+                ],
+            },
+        ),
+    ]
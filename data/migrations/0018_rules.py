@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0017_drafts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="field",
+            name="rules",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="section",
+            name="rules",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data", "0018_rules"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="field",
+            name="shuffle",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="section",
+            name="shuffle",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -7,6 +7,7 @@ Author: Divij Sharma <divijs75@gmail.com>
 """
 
 import json
+import uuid
 from django.db import models
 from live.models import Instance, SocialUser
 
@@ -19,6 +20,17 @@ TYPE_CHOICES = [
     ('file', 'File upload'),
 ]
 
+UPLOAD_STATUS_CHOICES = [
+    (0x1 << 0, 'Pending'),
+    (0x1 << 1, 'Complete'),
+]
+
+RESOLUTION_CHOICES = [
+    (0x1 << 0, 'Minute'),
+    (0x1 << 1, 'Hour'),
+    (0x1 << 2, 'Day'),
+]
+
 
 class Skeleton(models.Model):
     """
@@ -33,12 +45,14 @@ class Skeleton(models.Model):
     - title: A CharField for the title of the instance.
     - created_at: A DateTimeField for the creation date of the instance.
     - endMessage: A TextField for the message displayed after the instance ends.
+    - version: An IntegerField bumped whenever a field of the skeleton changes (cache key).
     """
     instance = models.ForeignKey(Instance, related_name='skeletons', on_delete=models.CASCADE, default=None)
     title = models.CharField(max_length=255, blank=False, null=False)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     endMessage = models.TextField(blank=True, null=True)
+    version = models.IntegerField(default=1, editable=False)
 
     def getSkeletonByInstance(instance):
         """
@@ -47,6 +61,42 @@ class Skeleton(models.Model):
         return Skeleton.objects.get(instance=instance)
 
 
+class Section(models.Model):
+    """
+    A model to split the fields of a form into sections
+
+    Details: The sections of a skeleton are the pages of the form, the voters
+    load the outline of the form (the sections and their number of questions)
+    and then fetch the questions section by section. Fields without a section
+    are grouped in an implicit leading section.
+
+    Fields:
+    - skeleton: A ForeignKey to the Skeleton model.
+    - title: A CharField for the title of the section.
+    - description: A TextField for the description of the section.
+    - position: An IntegerField for the order of the section in the form.
+    - rules: A JSONField for the branching rules of the section (see data/rules.py).
+    - shuffle: A BooleanField to present the questions of the section in a per voter order.
+    """
+    skeleton = models.ForeignKey(Skeleton, related_name='sections', on_delete=models.CASCADE)
+    title = models.CharField(max_length=255, blank=False, null=False)
+    description = models.TextField(blank=True, null=True)
+    position = models.IntegerField(default=0)
+    rules = models.JSONField(null=True, blank=True)
+    shuffle = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['skeleton', 'position'], name='section_skeleton_position'),
+        ]
+
+    def __str__(self):
+        """
+        Return the title of the section.
+        """
+        return self.title
+
+
 class Field(models.Model):
     """
     A model to hold all the internal fields of the form
@@ -62,6 +112,9 @@ class Field(models.Model):
     - required: A BooleanField for the required status of the instance.
     - options: A JSONField for the options of the instance.
     - accepted: A JSONField for the accepted values of the instance.
+    - section: A ForeignKey to the Section model, null for the fields outside of the sections.
+    - rules: A JSONField for the branching rules of the field (see data/rules.py).
+    - shuffle: A BooleanField to present the options of the field in a per voter order.
     """
     skeleton = models.ForeignKey(Skeleton, related_name='fields', on_delete=models.CASCADE)
     title = models.CharField(max_length=255, blank=False, null=False)
@@ -69,6 +122,10 @@ class Field(models.Model):
     required = models.BooleanField(default=False)
     options = models.JSONField(null=True, blank=True)
     accepted = models.JSONField(null=True, blank=True)
+    section = models.ForeignKey(Section, related_name='fields', on_delete=models.SET_NULL,
+                                null=True, blank=True, default=None)
+    rules = models.JSONField(null=True, blank=True)
+    shuffle = models.BooleanField(default=False)
 
     def getFieldById(id):
         """
@@ -95,6 +152,65 @@ class Response(models.Model):
     user = models.ForeignKey(SocialUser,
                              related_name='responses', on_delete=models.CASCADE, null=True, blank=True, default=None)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['submitted_at'], name='response_submitted_at'),
+        ]
+
+
+VALUE_KEY_MAX_LENGTH = 255
+
+
+def make_value_key(value, max_length=VALUE_KEY_MAX_LENGTH):
+    """
+    Get the indexed comparison key of an answer value (the string itself, JSON for the other values),
+    truncated to max_length characters (None for the whole key).
+    """
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        key = value
+    else:
+        key = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return key[:max_length]
+
+
+class AnswerValue(models.Model):
+    """
+    A model to hold the distinct answer values
+
+    Details: Each distinct value is stored once and referenced by the answers, the
+    values are immutable and never deleted (see data/values.py for the interning).
+
+    Fields:
+    - digest: A CharField for the SHA-256 hex digest of the canonical JSON of the value, unique.
+    - key: A CharField for the comparison key of the value (the string itself, JSON otherwise).
+    - value: A JSONField for the value.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    key = models.CharField(max_length=VALUE_KEY_MAX_LENGTH, db_index=True, blank=True, default='')
+    value = models.JSONField(blank=True, null=True)
+
+    def __str__(self):
+        """
+        Return the comparison key of the value.
+        """
+        return self.key
+
+
+class AnswerQuerySet(models.QuerySet):
+    """
+    QuerySet of the answers, interning the new values of the bulk created answers.
+    """
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Intern the values of the answers (one lookup per batch of distinct values) and insert them.
+        """
+        from .values import intern_answers
+        objs = list(objs)
+        intern_answers(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class Answer(models.Model):
     """
@@ -108,11 +224,48 @@ class Answer(models.Model):
     Fields:
     - response: A ForeignKey to the Response model.
     - field: A ForeignKey to the Field model.
-    - value: A TextField for the value of the instance.
+    - value_ref: A ForeignKey to the interned AnswerValue of the answer.
+
+    The value property reads and sets the (interned) value of the answer, new
+    values are interned when the answer is saved or bulk created.
     """
     response = models.ForeignKey(Response, related_name='answers', on_delete=models.CASCADE)
     field = models.ForeignKey(Field, on_delete=models.CASCADE)
-    value = models.JSONField(blank=True, null=True)
+    value_ref = models.ForeignKey(AnswerValue, related_name='+', on_delete=models.PROTECT)
+
+    objects = AnswerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['field', 'value_ref'], name='answer_field_value_ref'),
+        ]
+
+    @property
+    def value(self):
+        """
+        Get the value of the answer, decoded once from its interned value.
+        """
+        if '_value' not in self.__dict__:
+            from .values import decode_value
+            self._value = decode_value(self.value_ref_id)
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        """
+        Set the value of the answer, interned on save.
+        """
+        self._value = value
+        self._value_pending = True
+
+    def save(self, *args, **kwargs):
+        """
+        Intern the new value before saving the answer.
+        """
+        if self.__dict__.pop('_value_pending', False):
+            from .values import intern_value
+            self.value_ref_id = intern_value(self._value)
+        super().save(*args, **kwargs)
 
     def set_value(self, value):
         """
@@ -131,3 +284,181 @@ class Answer(models.Model):
             return json.loads(self.value)
         except json.JSONDecodeError:
             return self.value
+
+
+class SubmissionBucket(models.Model):
+    """
+    A model to hold the submission counts of an instance per time bucket
+
+    Details: Every submission increments the minute, hour and day bucket it falls
+    in, so the submission histograms are read from a few rows instead of grouping
+    the responses. The fine buckets are pruned by the compact_submission_buckets
+    command once they are past their retention.
+
+    Fields:
+    - instance: A ForeignKey to the Instance model.
+    - resolution: An IntegerField for the size of the bucket (minute, hour or day).
+    - bucket_start: A DateTimeField for the (UTC) start of the bucket.
+    - count: An IntegerField for the number of submissions in the bucket.
+    """
+    instance = models.ForeignKey(Instance, related_name='submission_buckets', on_delete=models.CASCADE)
+    resolution = models.IntegerField(choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['instance', 'resolution', 'bucket_start'],
+                                    name='unique_instance_resolution_bucket')
+        ]
+
+
+class AnswerToken(models.Model):
+    """
+    A model to hold the inverted index of the text answers
+
+    Details: One row per distinct token of a short-text or long-text answer,
+    written at submission time and rebuildable with the rebuild_search_index
+    command. The search looks the tokens up by (skeleton, token), exact or by
+    prefix, instead of scanning the answer values.
+
+    Fields:
+    - skeleton: A ForeignKey to the Skeleton model.
+    - field: A ForeignKey to the Field model.
+    - response: A ForeignKey to the Response model.
+    - token: A CharField for the normalized token.
+    - count: An IntegerField for the occurrences of the token in the answer.
+    """
+    skeleton = models.ForeignKey(Skeleton, related_name='+', on_delete=models.CASCADE)
+    field = models.ForeignKey(Field, related_name='+', on_delete=models.CASCADE)
+    response = models.ForeignKey(Response, related_name='+', on_delete=models.CASCADE)
+    token = models.CharField(max_length=64)
+    count = models.IntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['skeleton', 'token'], name='answertoken_skeleton_token'),
+        ]
+
+
+class FileBlob(models.Model):
+    """
+    A model to hold the distinct uploaded files
+
+    Details: The files are content addressed, every distinct content is stored
+    once in the answer files storage under its SHA-256 digest and shared by all
+    the uploads of the same content. Unreferenced blobs are removed by the
+    purge_uploads command.
+
+    Fields:
+    - sha256: A CharField for the SHA-256 hex digest of the content, unique.
+    - size: A BigIntegerField for the size of the content in bytes.
+    - content_type: A CharField for the content type of the first upload of the content.
+    - name: A CharField for the name of the file in the answer files storage.
+    - created_at: A DateTimeField for the creation date of the blob.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=255, blank=True, default='')
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """
+        Return the digest of the blob.
+        """
+        return self.sha256
+
+
+class Upload(models.Model):
+    """
+    A model to hold the resumable upload sessions of the file answers
+
+    Details: An upload is created for a file question with the declared size of
+    the file, the content is then sent in chunks (each at the current offset) and
+    streamed to a partial file. Once the last chunk is received the content is
+    hashed, checked and moved to its blob, and the upload id can be used as the
+    value of the file answer on submission.
+
+    Fields:
+    - id: A UUIDField for the (unguessable) id of the upload.
+    - instance: A ForeignKey to the Instance model.
+    - field: A ForeignKey to the Field model (file question).
+    - user: A ForeignKey to the SocialUser model uploading the file, null for the anonymous voters.
+    - response: A ForeignKey to the Response model using the upload, null until submitted.
+    - blob: A ForeignKey to the FileBlob model of the content, null until complete.
+    - filename: A CharField for the name of the uploaded file.
+    - content_type: A CharField for the content type of the uploaded file.
+    - size: A BigIntegerField for the declared size of the file in bytes.
+    - offset: A BigIntegerField for the number of bytes received.
+    - status: An IntegerField for the status of the upload.
+    - created_at: A DateTimeField for the creation date of the upload.
+    - updated_at: A DateTimeField for the date of the last received chunk.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    instance = models.ForeignKey(Instance, related_name='uploads', on_delete=models.CASCADE)
+    field = models.ForeignKey(Field, related_name='uploads', on_delete=models.CASCADE)
+    user = models.ForeignKey(SocialUser, related_name='uploads', on_delete=models.CASCADE,
+                             null=True, blank=True, default=None)
+    response = models.ForeignKey(Response, related_name='uploads', on_delete=models.CASCADE,
+                                 null=True, blank=True, default=None)
+    blob = models.ForeignKey(FileBlob, related_name='uploads', on_delete=models.PROTECT,
+                             null=True, blank=True, default=None)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, blank=True, default='')
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    status = models.IntegerField(choices=UPLOAD_STATUS_CHOICES, default=0x1 << 0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='upload_status_updated_at'),
+        ]
+
+    def __str__(self):
+        """
+        Return the file name of the upload.
+        """
+        return self.filename
+
+
+class Draft(models.Model):
+    """
+    A model to hold the partially saved answers of a voter
+
+    Details: The answers saved before the submission are merged into a single
+    document (question id -> value), every save only sends the changed answers.
+    The draft of a listed or social user is bound to the user, the anonymous
+    drafts are only reachable through their (unguessable) key. The submission of
+    the draft creates the response and deletes the draft.
+
+    Fields:
+    - key: A UUIDField for the key of the draft.
+    - instance: A ForeignKey to the Instance model.
+    - user: A OneToOneField to the SocialUser model, null for the anonymous drafts.
+    - answers: A JSONField for the merged answers, keyed by question id.
+    - revision: An IntegerField incremented by every save (optimistic concurrency).
+    - created_at: A DateTimeField for the creation date of the draft.
+    - updated_at: A DateTimeField for the date of the last save.
+    """
+    key = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    instance = models.ForeignKey(Instance, related_name='drafts', on_delete=models.CASCADE)
+    user = models.OneToOneField(SocialUser, related_name='draft', on_delete=models.CASCADE,
+                                null=True, blank=True, default=None)
+    answers = models.JSONField(default=dict, blank=True)
+    revision = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='draft_updated_at'),
+        ]
+
+    def __str__(self):
+        """
+        Return the key of the draft.
+        """
+        return str(self.key)
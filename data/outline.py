@@ -0,0 +1,162 @@
+"""
+Brief: Django outline.py file.
+
+Description: This file contains the voter payloads of the forms for the Django data
+app: the whole form, its outline (the sections with their number of questions,
+without the questions) and each section with its questions. The payloads are
+encoded once and cached under the skeleton version (bumped by every change of
+the form, its sections or its questions), in a small in-process LRU in front of
+the shared Django cache, so a big form is neither rebuilt nor sent at once. The
+per voter orders (see data/shuffle.py) are applied to the cached payloads.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from core.records import Record, dumps, loads, format_datetime
+from live.cache import LRUCache
+from .models import Skeleton, Section, Field
+from .records import FieldRecord, skeleton_records
+from .rules import get_program
+from .shuffle import get_plan, get_voter_key, shuffle_payload
+
+# Id of the implicit section holding the fields outside of the sections
+UNSECTIONED = 0
+
+# Payloads are immutable under their versioned keys, the TTL only bounds the memory held
+local_payloads = LRUCache(getattr(settings, 'FORM_CACHE_LOCAL_SIZE', 256), getattr(settings, 'FORM_CACHE_TTL', 3600))
+
+
+class SectionRecord(Record):
+    """
+    Record of a Section with its questions.
+    """
+    __slots__ = ('id', 'title', 'description', 'position', 'rules', 'shuffle', 'fields')
+
+
+class OutlineSectionRecord(Record):
+    """
+    Record of a Section in the outline of a form (number of questions only).
+    """
+    __slots__ = ('id', 'title', 'description', 'position', 'rules', 'shuffle', 'questions')
+
+
+class OutlineRecord(Record):
+    """
+    Record of the outline of a form.
+    """
+    __slots__ = ('id', 'title', 'description', 'created_at', 'endMessage', 'version', 'sections')
+
+
+def get_skeleton_version(instance_id):
+    """
+    Get the (id, version) of the skeleton of an instance, None if the instance has no form.
+    """
+    return Skeleton.objects.filter(instance_id=instance_id).values_list('id', 'version').first()
+
+
+def get_cached_payload(key, build):
+    """
+    Get the encoded payload cached under the versioned key, building it on a miss.
+    """
+    payload = local_payloads.get(key)
+    if payload is None:
+        payload = cache.get(key)
+        if payload is None:
+            payload = build()
+            cache.set(key, payload, getattr(settings, 'FORM_CACHE_TTL', 3600))
+        local_payloads.set(key, payload)
+    return payload
+
+
+def build_form(instance_id):
+    """
+    Encode the whole forms of an instance (same output as the SkeletonSerializer).
+    """
+    return dumps(skeleton_records(Skeleton.objects.filter(instance_id=instance_id)))
+
+
+def build_outline(skeleton_id):
+    """
+    Encode the outline of a skeleton.
+    """
+    skeleton = Skeleton.objects.get(pk=skeleton_id)
+    counts = dict(Field.objects.filter(skeleton_id=skeleton_id).values_list('section_id').annotate(
+        count=Count('id')).order_by())
+    sections = []
+    if counts.get(None):
+        sections.append(OutlineSectionRecord(UNSECTIONED, None, None, None, None, False, counts[None]))
+    for id, title, description, position, rules, shuffle in Section.objects.filter(
+            skeleton_id=skeleton_id).order_by('position', 'id').values_list(
+            'id', 'title', 'description', 'position', 'rules', 'shuffle'):
+        sections.append(OutlineSectionRecord(id, title, description, position, rules, shuffle, counts.get(id, 0)))
+    return dumps(OutlineRecord(skeleton.id, skeleton.title, skeleton.description,
+                               format_datetime(skeleton.created_at), skeleton.endMessage, skeleton.version, sections))
+
+
+def build_section(skeleton_id, section_id):
+    """
+    Encode a section of a skeleton with its questions, None if the section does not exist.
+    """
+    if section_id == UNSECTIONED:
+        section = SectionRecord(UNSECTIONED, None, None, None, None, False, [])
+    else:
+        row = Section.objects.filter(pk=section_id, skeleton_id=skeleton_id).values_list(
+            'id', 'title', 'description', 'position', 'rules', 'shuffle').first()
+        if row is None:
+            return None
+        section = SectionRecord(*row, [])
+    fields = Field.objects.filter(skeleton_id=skeleton_id, section_id=section_id or None).order_by('id').values_list(
+        'id', 'title', 'type', 'required', 'options', 'accepted', 'section_id', 'rules', 'shuffle')
+    section.fields = [FieldRecord(*values) for values in fields]
+    return dumps(section)
+
+
+def get_form_payload(instance_id, seed=None):
+    """
+    Get the encoded whole forms of an instance, in the order of the voter with the given seed.
+    """
+    skeleton = get_skeleton_version(instance_id)
+    if skeleton is None:
+        return dumps([])
+    skeleton_id, version = skeleton
+    payload = get_cached_payload(f'form:{skeleton_id}:{version}', lambda: build_form(instance_id))
+    return shuffle_payload(payload, get_plan(skeleton_id, version), get_voter_key(seed))
+
+
+def get_outline_payload(instance_id, answers=None):
+    """
+    Get the encoded outline of the form of an instance, None if the instance has no form.
+
+    Details: Given the answers of the voter (question id -> value), only the
+    sections reachable with these answers are kept in the outline.
+    """
+    skeleton = get_skeleton_version(instance_id)
+    if skeleton is None:
+        return None
+    skeleton_id, version = skeleton
+    payload = get_cached_payload(f'form-outline:{skeleton_id}:{version}', lambda: build_outline(skeleton_id))
+    if answers is None:
+        return payload
+    reachable, _, _ = get_program(skeleton_id, version).evaluate(answers)
+    outline = loads(payload)
+    outline['sections'] = [section for section in outline['sections'] if section['id'] in reachable]
+    return dumps(outline)
+
+
+def get_section_payload(instance_id, section_id, seed=None):
+    """
+    Get the encoded section of the form of an instance, in the order of the voter with the given
+    seed, None if the section does not exist.
+    """
+    skeleton = get_skeleton_version(instance_id)
+    if skeleton is None:
+        return None
+    skeleton_id, version = skeleton
+    key = f'form-section:{skeleton_id}:{version}:{section_id}'
+    payload = get_cached_payload(key, lambda: build_section(skeleton_id, section_id) or b'')
+    if not payload:
+        return None
+    return shuffle_payload(payload, get_plan(skeleton_id, version), get_voter_key(seed))
@@ -0,0 +1,82 @@
+"""
+Brief: Django records.py file.
+
+Description: This file contains the records for the Django data app, producing
+the same output as the SkeletonSerializer and the ResponseSerializer.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from core.records import Record, format_datetime
+from .models import Field, Answer
+from .values import decode_values
+
+
+class FieldRecord(Record):
+    """
+    Record of a Field, same output as the FieldSerializer.
+    """
+    __slots__ = ('id', 'title', 'type', 'required', 'options', 'accepted', 'section', 'rules', 'shuffle')
+
+
+class SkeletonRecord(Record):
+    """
+    Record of a Skeleton, same output as the SkeletonSerializer.
+    """
+    __slots__ = ('id', 'title', 'description', 'created_at', 'fields', 'endMessage')
+
+
+class AnswerRecord(Record):
+    """
+    Record of an Answer, same output as the AnswerSerializer.
+    """
+    __slots__ = ('field', 'value')
+
+
+class ResponseRecord(Record):
+    """
+    Record of a Response, same output as the ResponseSerializer.
+    """
+    __slots__ = ('id', 'submitted_at', 'user', 'answers')
+
+
+def skeleton_records(queryset):
+    """
+    Get the skeleton records (with their fields) for the Skeleton queryset, in two queries.
+    """
+    skeletons = {}
+    for id, title, description, created_at, end_message in queryset.values_list(
+            'id', 'title', 'description', 'created_at', 'endMessage'):
+        skeletons[id] = SkeletonRecord(id, title, description, format_datetime(created_at), [], end_message)
+
+    if skeletons:
+        fields = Field.objects.filter(skeleton_id__in=list(skeletons)).order_by('id').values_list(
+            'skeleton_id', 'id', 'title', 'type', 'required', 'options', 'accepted', 'section_id', 'rules',
+            'shuffle')
+        for skeleton_id, *values in fields:
+            skeletons[skeleton_id].fields.append(FieldRecord(*values))
+    return list(skeletons.values())
+
+
+def response_records(queryset):
+    """
+    Get the response records (with their answers) for the Response queryset, in two queries.
+
+    The answers are selected with a subquery on the response queryset, or with the
+    response ids when the queryset is sliced (a page), since LIMIT subqueries are
+    not supported everywhere.
+    """
+    responses = {}
+    for id, submitted_at, username in queryset.values_list('id', 'submitted_at', 'user__username'):
+        responses[id] = ResponseRecord(id, format_datetime(submitted_at), username, [])
+
+    if responses:
+        if queryset.query.is_sliced:
+            answers = Answer.objects.filter(response_id__in=list(responses))
+        else:
+            answers = Answer.objects.filter(response__in=queryset.values('id'))
+        answers = list(answers.order_by('id').values_list('response_id', 'field_id', 'value_ref_id'))
+        values = decode_values({value_id for _, _, value_id in answers})
+        for response_id, field_id, value_id in answers:
+            responses[response_id].answers.append(AnswerRecord(field_id, values[value_id]))
+    return list(responses.values())
@@ -0,0 +1,283 @@
+"""
+Brief: Django rules.py file.
+
+Description: This file contains the branching rules of the forms for the Django data
+app. A question or a section can be shown only if (show_if), or skipped if
+(skip_if), an expression on the earlier answers holds:
+
+    {"question": 12, "op": "eq", "value": "Yes"}
+    {"all": [...]}, {"any": [...]}, {"not": {...}}
+
+The rules of a skeleton are compiled once into closures (cached per skeleton
+version) and evaluated in the order of the form, each question seeing only the
+answers of the visible questions before it, so the evaluation is one pass over the
+form with constant time lookups of the answers (the edits of the form enforce that
+the rules only depend on the questions before them). The evaluation validates the
+submissions (the required questions hidden by a rule are not required, the answers
+of hidden questions are dropped) and selects the reachable sections.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from live.cache import LRUCache
+from .models import Section, Field
+
+RULE_KEYS = ('show_if', 'skip_if')
+
+MAX_RULE_DEPTH = 16
+
+# Id standing for a section or a question being created, after the existing ones
+NEW_ID = float('inf')
+
+# (skeleton id, version) -> FormProgram, immutable under the versioned key
+programs = LRUCache(getattr(settings, 'FORM_RULES_CACHE_SIZE', 256), float('inf'))
+
+
+def is_empty(value):
+    """
+    Check if an answer value counts as not answered.
+    """
+    return value is None or value == '' or value == [] or value == {}
+
+
+def to_number(value):
+    """
+    Get the numeric value of an answer, None if it is not a number.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def compare(op, value, expected):
+    """
+    Compare an answer with the expected value of a condition, False when their types cannot be compared.
+    """
+    try:
+        return compare_values(op, value, expected)
+    except TypeError:
+        return False
+
+
+def compare_values(op, value, expected):
+    """
+    Compare an answer with the expected value of a condition.
+    """
+    if op in ('eq', 'ne'):
+        # Numeric questions may be answered with numeric strings
+        equal = value == expected or (isinstance(expected, (int, float)) and to_number(value) == expected)
+        return equal if op == 'eq' else not equal
+    if op == 'in':
+        return value in expected
+    if op == 'not_in':
+        return value not in expected
+    if op == 'contains':
+        if isinstance(value, str):
+            return isinstance(expected, str) and expected in value
+        return isinstance(value, list) and expected in value
+    value, expected = to_number(value), to_number(expected)
+    if value is None or expected is None:
+        return False
+    if op == 'gt':
+        return value > expected
+    if op == 'gte':
+        return value >= expected
+    if op == 'lt':
+        return value < expected
+    return value <= expected
+
+
+OPERATORS = {'eq', 'ne', 'in', 'not_in', 'contains', 'gt', 'gte', 'lt', 'lte', 'answered', 'not_answered'}
+
+
+def compile_expression(expression, depth=0):
+    """
+    Compile a rule expression into a predicate on the answers (question id -> value), return the
+    predicate and the ids of the questions it depends on. Raise a ValidationError if invalid.
+    """
+    if depth > MAX_RULE_DEPTH:
+        raise ValidationError('The rule is nested too deeply.')
+    if not isinstance(expression, dict) or len(expression) == 0:
+        raise ValidationError('A rule expression must be an object.')
+
+    for combinator in ('all', 'any'):
+        if combinator in expression:
+            operands = expression[combinator]
+            if not isinstance(operands, list) or not operands:
+                raise ValidationError(f'"{combinator}" expects a non empty list of expressions.')
+            compiled = [compile_expression(operand, depth + 1) for operand in operands]
+            predicates = [predicate for predicate, _ in compiled]
+            questions = set().union(*(refs for _, refs in compiled))
+            if combinator == 'all':
+                return (lambda answers: all(predicate(answers) for predicate in predicates)), questions
+            return (lambda answers: any(predicate(answers) for predicate in predicates)), questions
+
+    if 'not' in expression:
+        predicate, questions = compile_expression(expression['not'], depth + 1)
+        return (lambda answers: not predicate(answers)), questions
+
+    try:
+        question = int(expression['question'])
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError('A condition needs the id of the question it depends on.')
+    op = expression.get('op', 'eq')
+    if op not in OPERATORS:
+        raise ValidationError(f'Unknown operator "{op}".')
+    if op == 'answered':
+        return (lambda answers: not is_empty(answers.get(question))), {question}
+    if op == 'not_answered':
+        return (lambda answers: is_empty(answers.get(question))), {question}
+    if 'value' not in expression:
+        raise ValidationError(f'The operator "{op}" needs a value.')
+    expected = expression['value']
+    if op in ('in', 'not_in') and not isinstance(expected, list):
+        raise ValidationError(f'The operator "{op}" needs a list value.')
+    if op == 'contains' and (expected is None or isinstance(expected, (list, dict))):
+        raise ValidationError('The operator "contains" needs a string or a scalar value.')
+
+    def condition(answers):
+        value = answers.get(question)
+        if is_empty(value):
+            return op in ('ne', 'not_in')
+        return compare(op, value, expected)
+    return condition, {question}
+
+
+def compile_rules(rules):
+    """
+    Compile the rules of a question or a section into a visibility predicate (None when always
+    visible), return the predicate and the ids of the questions it depends on.
+    """
+    if not rules:
+        return None, set()
+    if not isinstance(rules, dict) or set(rules) - set(RULE_KEYS) or len(rules) != 1:
+        raise ValidationError('The rules hold either a "show_if" or a "skip_if" expression.')
+    (key, expression), = rules.items()
+    predicate, questions = compile_expression(expression)
+    if key == 'skip_if':
+        return (lambda answers: not predicate(answers)), questions
+    return predicate, questions
+
+
+def validate_rules(rules, question_ids, own_id=None):
+    """
+    Check that the rules compile and only depend on (other) questions of the form.
+    """
+    _, questions = compile_rules(rules)
+    unknown = questions - set(question_ids)
+    if own_id is not None and own_id in questions:
+        raise ValidationError('A question cannot depend on its own answer.')
+    if unknown:
+        raise ValidationError(f'Unknown questions {sorted(unknown)} in the rules.')
+
+
+def get_order_errors(sections, fields):
+    """
+    Get the (kind, id, message) of the rules depending on questions not strictly before them in the
+    order of the form, from the sections ({id: (position, rules)}) and the questions ({id: (section
+    id, rules)}) of a skeleton (a created section or question has the id NEW_ID).
+
+    Details: A question only sees the answers of the visible questions before it
+    (sections by position, then ids), and a section the answers of the questions
+    before its own questions, so a rule on a later question (or a cycle) would
+    always hide it. The questions unknown to the form are left to validate_rules.
+    """
+    section_order = {section_id: index for index, section_id in
+                     enumerate(sorted(sections, key=lambda section_id: (sections[section_id][0], section_id)), start=1)}
+    field_order = {field_id: (section_order.get(section_id, 0), field_id)
+                   for field_id, (section_id, _) in fields.items()}
+    checks = [('section', section_id, rules, (section_order[section_id], float('-inf')))
+              for section_id, (_, rules) in sections.items()]
+    checks += [('question', field_id, rules, field_order[field_id]) for field_id, (_, rules) in fields.items()]
+    for kind, item_id, rules, limit in checks:
+        if not rules:
+            continue
+        _, questions = compile_rules(rules)
+        later = sorted(question for question in questions if field_order.get(question, limit) >= limit)
+        if later:
+            name = f'the new {kind}' if item_id == NEW_ID else f'the {kind} {item_id}'
+            yield kind, item_id, f'The rules of {name} depend on the questions {later} which are not before it.'
+
+
+class FormProgram:
+    """
+    Compiled rules of a skeleton, evaluated in the order of the form.
+    """
+    def __init__(self, sections, fields):
+        """
+        Keep the section predicates (by id, in form order) and the (id, section id, required,
+        predicate) questions in form order.
+        """
+        self.sections = sections
+        self.fields = fields
+
+    def evaluate(self, answers):
+        """
+        Evaluate the rules on the answers (question id -> value), return the ids of the visible
+        sections (0 for the questions outside of the sections), the ids of the visible questions
+        and the answers of the visible questions.
+
+        Details: A section is evaluated when its first question is reached, on the
+        answers of the visible questions before it (the sections without questions
+        on all the visible answers).
+        """
+        visible_answers = {}
+        visible_sections = {0}
+        visible_fields = set()
+        evaluated = {0: True}
+        for field_id, section_id, _, predicate in self.fields:
+            section_id = section_id or 0
+            shown = evaluated.get(section_id)
+            if shown is None:
+                section_predicate = self.sections.get(section_id)
+                shown = evaluated[section_id] = section_predicate is None or section_predicate(visible_answers)
+                if shown:
+                    visible_sections.add(section_id)
+            if not shown:
+                continue
+            if predicate is None or predicate(visible_answers):
+                visible_fields.add(field_id)
+                if field_id in answers:
+                    visible_answers[field_id] = answers[field_id]
+        for section_id, predicate in self.sections.items():
+            if section_id not in evaluated and (predicate is None or predicate(visible_answers)):
+                visible_sections.add(section_id)
+        return visible_sections, visible_fields, visible_answers
+
+    def get_missing(self, answers):
+        """
+        Get the ids of the visible required questions left unanswered.
+        """
+        _, visible_fields, visible_answers = self.evaluate(answers)
+        return [field_id for field_id, _, required, _ in self.fields
+                if required and field_id in visible_fields and is_empty(visible_answers.get(field_id))]
+
+
+def build_program(skeleton_id):
+    """
+    Compile the rules of a skeleton (the sections by position, the questions outside of the sections first).
+    """
+    sections = list(Section.objects.filter(skeleton_id=skeleton_id).order_by('position', 'id').values_list(
+        'id', 'rules'))
+    order = {section_id: index for index, (section_id, _) in enumerate(sections, start=1)}
+    fields = list(Field.objects.filter(skeleton_id=skeleton_id).values_list('id', 'section_id', 'required', 'rules'))
+    fields.sort(key=lambda field: (order.get(field[1], 0), field[0]))
+    return FormProgram(
+        {section_id: compile_rules(rules)[0] for section_id, rules in sections},
+        [(field_id, section_id, required, compile_rules(rules)[0]) for field_id, section_id, required, rules in fields],
+    )
+
+
+def get_program(skeleton_id, version):
+    """
+    Get the compiled rules of a skeleton version.
+    """
+    key = (skeleton_id, version)
+    program = programs.get(key)
+    if program is None:
+        program = build_program(skeleton_id)
+        programs.set(key, program)
+    return program
@@ -0,0 +1,158 @@
+"""
+Brief: Django search.py file.
+
+Description: This file contains the full-text search of the text answers for the
+Django data app. The short-text and long-text answers are tokenized into the
+AnswerToken inverted index when submitted, the queries look the terms up (exact,
+or by prefix with a trailing *) and rank the matching answers by TF-IDF.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from django.conf import settings
+from django.db import transaction
+from .models import Field, Answer, Response, AnswerToken
+
+TEXT_TYPES = ('short-text', 'long-text')
+
+TOKEN_PATTERN = re.compile(r'\w+')
+TOKEN_MAX_LENGTH = 64
+
+# Upper bound of the tokens starting with a prefix (the last code point)
+PREFIX_END = chr(0x10FFFF)
+
+
+def tokenize(value):
+    """
+    Get the token counts of a text answer value (lowercased words of two characters or more).
+    """
+    if not isinstance(value, str):
+        return Counter()
+    return Counter(
+        token[:TOKEN_MAX_LENGTH] for token in TOKEN_PATTERN.findall(value.lower()) if len(token) > 1)
+
+
+def build_tokens(skeleton_id, response_id, field_id, value):
+    """
+    Get the (unsaved) index rows of an answer.
+    """
+    return [
+        AnswerToken(skeleton_id=skeleton_id, field_id=field_id, response_id=response_id, token=token, count=count)
+        for token, count in tokenize(value).items()
+    ]
+
+
+def index_answers(response, answers):
+    """
+    Index the text answers of a new response.
+    """
+    tokens = []
+    for answer in answers:
+        if answer.field.type in TEXT_TYPES:
+            tokens.extend(build_tokens(response.skeleton_id, response.id, answer.field_id, answer.value))
+    if tokens:
+        AnswerToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+def rebuild_index(skeleton_id, chunk_size=5000):
+    """
+    Rebuild the index of the text answers of the skeleton, return the number of index rows.
+    """
+    field_ids = list(Field.objects.filter(skeleton_id=skeleton_id, type__in=TEXT_TYPES).values_list('id', flat=True))
+    total = 0
+    with transaction.atomic():
+        AnswerToken.objects.filter(skeleton_id=skeleton_id).delete()
+        tokens = []
+        answers = Answer.objects.filter(field_id__in=field_ids).values_list(
+            'response_id', 'field_id', 'value_ref__value')
+        for response_id, field_id, value in answers.iterator(chunk_size=chunk_size):
+            tokens.extend(build_tokens(skeleton_id, response_id, field_id, value))
+            if len(tokens) >= chunk_size:
+                AnswerToken.objects.bulk_create(tokens, batch_size=1000)
+                total += len(tokens)
+                tokens = []
+        AnswerToken.objects.bulk_create(tokens, batch_size=1000)
+    return total + len(tokens)
+
+
+def parse_query(query):
+    """
+    Get the (token, is prefix) terms of a search query, a trailing * makes a prefix term.
+    """
+    terms = []
+    for word in query.lower().split():
+        prefix = word.endswith('*')
+        for token in TOKEN_PATTERN.findall(word):
+            terms.append((token[:TOKEN_MAX_LENGTH], prefix))
+    return terms
+
+
+def get_postings(skeleton_id, token, prefix, field_id=None):
+    """
+    Get the index rows of a term.
+
+    Details: A prefix term is looked up with a range of the (skeleton, token) index
+    (token <= t < token + PREFIX_END) rather than LIKE 'token%', which only uses an
+    index with a pattern operator class (PostgreSQL) or the LIKE optimization (SQLite).
+    """
+    postings = AnswerToken.objects.filter(skeleton_id=skeleton_id)
+    if prefix:
+        postings = postings.filter(token__gte=token, token__lt=token + PREFIX_END)
+    else:
+        postings = postings.filter(token=token)
+    if field_id:
+        postings = postings.filter(field_id=field_id)
+    return postings
+
+
+def search(skeleton_id, query, field_id=None, limit=20):
+    """
+    Get the best (score, response id, field id) matches of the query, every term has to match.
+
+    Details: The score of an answer sums (1 + log tf) * log(1 + N / df) over the
+    terms, N being the number of responses of the skeleton and df the number of
+    answers containing the term. The exact terms are looked up first, the longer
+    prefixes next, and once at most SEARCH_CANDIDATES answers still match only
+    their rows are fetched for the next terms (their df is then counted in the
+    index). At most SEARCH_MAX_POSTINGS rows are fetched per term, the scores of a
+    term matching more rows are computed on a subset.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return []
+    responses = Response.objects.filter(skeleton_id=skeleton_id).count() or 1
+    max_postings = getattr(settings, 'SEARCH_MAX_POSTINGS', 100000)
+    max_candidates = getattr(settings, 'SEARCH_CANDIDATES', 1000)
+
+    scores = None
+    for token, prefix in sorted(terms, key=lambda term: (term[1], -len(term[0]))):
+        postings = get_postings(skeleton_id, token, prefix, field_id)
+        documents = None
+        if scores is not None and len(scores) <= max_candidates:
+            documents = postings.values('response_id', 'field_id').distinct().count() if prefix else postings.count()
+            postings = postings.filter(response_id__in={response_id for response_id, _ in scores})
+        frequencies = Counter()
+        for response_id, posting_field_id, posting_token, count in postings.values_list(
+                'response_id', 'field_id', 'token', 'count')[:max_postings]:
+            # The range of a prefix may hold other tokens under a linguistic collation
+            if not prefix or posting_token.startswith(token):
+                frequencies[(response_id, posting_field_id)] += count
+        if not frequencies:
+            return []
+
+        idf = math.log(1 + responses / (documents or len(frequencies)))
+        term_scores = {document: (1 + math.log(count)) * idf for document, count in frequencies.items()}
+        if scores is None:
+            scores = term_scores
+        else:
+            scores = {document: score + term_scores[document] for document, score in scores.items()
+                      if document in term_scores}
+        if not scores:
+            return []
+
+    return [(score, response_id, document_field_id) for (response_id, document_field_id), score in
+            heapq.nlargest(limit, scores.items(), key=lambda item: item[1])]
@@ -7,7 +7,8 @@ Author: Divij Sharma <divijs75@gmail.com>
 """
 
 from rest_framework import serializers
-from .models import Skeleton, Field, Response, Answer
+from .models import Skeleton, Section, Field, Response, Answer
+from .rules import compile_rules
 
 
 class FieldSerializer(serializers.ModelSerializer):
@@ -16,10 +17,18 @@ class FieldSerializer(serializers.ModelSerializer):
     """
     options = serializers.JSONField(required=False, allow_null=True)
     accepted = serializers.JSONField(required=False, allow_null=True)
+    rules = serializers.JSONField(required=False, allow_null=True)
 
     class Meta:
         model = Field
-        fields = ['id', 'title', 'type', 'required', 'options', 'accepted']
+        fields = ['id', 'title', 'type', 'required', 'options', 'accepted', 'section', 'rules', 'shuffle']
+
+    def validate_rules(self, value):
+        """
+        Check that the branching rules compile (the questions they depend on are checked by the views).
+        """
+        compile_rules(value)
+        return value
 
     def validate(self, data):
         """
@@ -48,6 +57,24 @@ class FieldSerializer(serializers.ModelSerializer):
         return data
 
 
+class SectionSerializer(serializers.ModelSerializer):
+    """
+    Section Serializer for the Section model.
+    """
+    rules = serializers.JSONField(required=False, allow_null=True)
+
+    class Meta:
+        model = Section
+        fields = ['id', 'title', 'description', 'position', 'rules', 'shuffle']
+
+    def validate_rules(self, value):
+        """
+        Check that the branching rules compile (the questions they depend on are checked by the views).
+        """
+        compile_rules(value)
+        return value
+
+
 class SkeletonSerializer(serializers.ModelSerializer):
     """
     Skeleton Serializer for the Skeleton model.
@@ -65,6 +92,9 @@ class SkeletonSerializer(serializers.ModelSerializer):
         fields_data = validated_data.pop('fields', [])
         skeleton = Skeleton.objects.create(**validated_data)
         for field_data in fields_data:
+            # A new skeleton has no sections yet, nor questions for the rules to depend on
+            field_data.pop('section', None)
+            field_data.pop('rules', None)
             Field.objects.create(skeleton=skeleton, **field_data)
         return skeleton
 
@@ -85,6 +115,7 @@ class AnswerSerializer(serializers.ModelSerializer):
     Answer Serializer for the Answer model.
     """
     field = serializers.PrimaryKeyRelatedField(queryset=Field.objects.all())
+    value = serializers.JSONField(required=False, allow_null=True)
 
     class Meta:
         model = Answer
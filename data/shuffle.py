@@ -0,0 +1,173 @@
+"""
+Brief: Django shuffle.py file.
+
+Description: This file contains the per voter shuffling of the forms for the Django
+data app. The questions of a section (Section.shuffle) and the options of a choice
+question (Field.shuffle) are presented to every voter in an order of their own. The
+orders are derived from a seed of the voter (the social user, the voter code or a
+seed chosen by the client) keyed with the server secret, so a voter always gets the
+same order and cannot choose it. They are applied to the decoded cached payload,
+which stays shared by all the voters, and the option positions answered by a voter
+are mapped back to the canonical options, so the stored answers do not depend on
+the order.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import hashlib
+import hmac
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from core.records import dumps, loads
+from live.cache import LRUCache
+from .analytics import CHOICE_TYPES
+from .models import Section, Field
+
+# (skeleton id, version) -> ShufflePlan, immutable under the versioned key
+plans = LRUCache(getattr(settings, 'FORM_RULES_CACHE_SIZE', 256), float('inf'))
+
+
+class ShufflePlan:
+    """
+    Shuffled questions and options of a skeleton version.
+    """
+    def __init__(self, sections, fields, options):
+        """
+        Keep the ids of the sections with shuffled questions, the ids of the questions with
+        shuffled options and the canonical options of the choice questions (by id).
+        """
+        self.sections = sections
+        self.fields = fields
+        self.options = options
+
+    @property
+    def shuffled(self):
+        """
+        Check if anything is shuffled in the form.
+        """
+        return bool(self.sections or self.fields)
+
+
+def get_voter_key(seed):
+    """
+    Get the key of the orders of a voter from its seed, None without a seed (canonical order).
+    """
+    if not seed:
+        return None
+    return hmac.new(settings.SECRET_KEY.encode(), f'shuffle:{seed}'.encode(), hashlib.sha256).digest()
+
+
+def get_order(key, scope, items):
+    """
+    Get the items in the order of the voter key for the scope (a question or a section).
+
+    Details: The items are sorted by their keyed hash, so the order of an item
+    only depends on the key, the scope and the item itself (not on the Python
+    random implementation nor on the order the items are given in).
+    """
+    return sorted(items, key=lambda item: hashlib.blake2b(f'{scope}:{item}'.encode(), key=key,
+                                                          digest_size=8).digest())
+
+
+def get_option_order(key, plan, field_id):
+    """
+    Get the canonical indexes of the options of a question in the order presented to the voter.
+    """
+    indexes = range(len(plan.options[field_id]))
+    if key is None or field_id not in plan.fields:
+        return list(indexes)
+    return get_order(key, f'option:{field_id}', indexes)
+
+
+def shuffle_fields(fields, plan, key):
+    """
+    Shuffle the encoded questions (in place): the options of the shuffled questions, and the
+    questions of the shuffled sections among the places of their section.
+    """
+    places = {}
+    for index, field in enumerate(fields):
+        if field['id'] in plan.fields and field['id'] in plan.options:
+            options = field['options']
+            field['options'] = [options[i] for i in get_option_order(key, plan, field['id'])]
+        if field['section'] in plan.sections:
+            places.setdefault(field['section'], []).append(index)
+    for section_id, indexes in places.items():
+        by_id = {fields[index]['id']: fields[index] for index in indexes}
+        for index, field_id in zip(indexes, get_order(key, f'section:{section_id}', by_id)):
+            fields[index] = by_id[field_id]
+
+
+def shuffle_payload(payload, plan, key):
+    """
+    Get the encoded payload (the whole forms or a section) in the order of the voter key.
+    """
+    if key is None or not plan.shuffled:
+        return payload
+    data = loads(payload)
+    for form in data if isinstance(data, list) else [data]:
+        shuffle_fields(form['fields'], plan, key)
+    return dumps(data)
+
+
+def get_option(options, order, position, field_id):
+    """
+    Get the canonical option at a position of the order presented to the voter.
+    """
+    if isinstance(position, bool) or not isinstance(position, int) or not 0 <= position < len(order):
+        raise ValidationError({'answers': f'Invalid option position for the question {field_id}.'})
+    return options[order[position]]
+
+
+def unshuffle_answers(answers, plan, key):
+    """
+    Map the option positions answered by a voter ({"id", "option"}, a list of positions for
+    the multiple answers) back to the canonical options ({"id", "value"}).
+    """
+    mapped = []
+    for answer in answers:
+        if not isinstance(answer, dict) or 'option' not in answer:
+            mapped.append(answer)
+            continue
+        try:
+            field_id = int(answer['id'])
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError({'answers': 'Id and value are required for answer.'})
+        if field_id not in plan.options:
+            raise ValidationError({'answers': f'The question {field_id} has no options.'})
+        options, order = plan.options[field_id], get_option_order(key, plan, field_id)
+        position = answer['option']
+        if isinstance(position, list):
+            value = [get_option(options, order, item, field_id) for item in position]
+        else:
+            value = get_option(options, order, position, field_id)
+        answer = {name: item for name, item in answer.items() if name != 'option'}
+        answer.update(id=field_id, value=value)
+        mapped.append(answer)
+    return mapped
+
+
+def build_plan(skeleton_id):
+    """
+    Get the shuffled questions and options of a skeleton.
+    """
+    sections = set(Section.objects.filter(skeleton_id=skeleton_id, shuffle=True).values_list('id', flat=True))
+    fields, options = set(), {}
+    for field_id, shuffle, field_options in Field.objects.filter(
+            skeleton_id=skeleton_id, type__in=CHOICE_TYPES).values_list('id', 'shuffle', 'options'):
+        if isinstance(field_options, list):
+            options[field_id] = field_options
+            if shuffle:
+                fields.add(field_id)
+    return ShufflePlan(sections, fields, options)
+
+
+def get_plan(skeleton_id, version):
+    """
+    Get the shuffled questions and options of a skeleton version.
+    """
+    key = (skeleton_id, version)
+    plan = plans.get(key)
+    if plan is None:
+        plan = build_plan(skeleton_id)
+        plans.set(key, plan)
+    return plan
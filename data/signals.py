@@ -0,0 +1,59 @@
+"""
+Brief: Django signals.py file.
+
+Description: This file contains the signal receivers for the Django data app.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from functools import partial
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from live.stats import record_response, forget_response
+from .models import Skeleton, Section, Field, Response
+from .timeseries import record_submission, forget_submission
+
+
+@receiver(post_save, sender=Response)
+def response_saved(sender, instance, created, **kwargs):
+    """
+    Count a new response in the instance stats and the submission buckets once committed.
+
+    Details: The stats row and the buckets are shared by all the submissions of the
+    instance, they are updated after the commit so concurrent submissions do not
+    wait on their row locks until the end of each other's transaction.
+    """
+    if created:
+        transaction.on_commit(partial(record_response, instance.instance_id, instance.submitted_at))
+        transaction.on_commit(partial(record_submission, instance.instance_id, instance.submitted_at))
+
+
+@receiver(post_delete, sender=Response)
+def response_deleted(sender, instance, **kwargs):
+    """
+    Uncount a deleted response from the instance stats and the submission buckets once committed.
+    """
+    transaction.on_commit(partial(forget_response, instance.instance_id))
+    transaction.on_commit(partial(forget_submission, instance.instance_id, instance.submitted_at))
+
+
+@receiver(post_save, sender=Field)
+@receiver(post_delete, sender=Field)
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def field_changed(sender, instance, **kwargs):
+    """
+    Bump the version of the skeleton of a saved or deleted field or section.
+    """
+    Skeleton.objects.filter(pk=instance.skeleton_id).update(version=F('version') + 1)
+
+
+@receiver(post_save, sender=Skeleton)
+def skeleton_saved(sender, instance, created, **kwargs):
+    """
+    Bump the version of an updated skeleton (the cached voter payloads hold its title and messages).
+    """
+    if not created:
+        Skeleton.objects.filter(pk=instance.pk).update(version=F('version') + 1)
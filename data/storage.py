@@ -0,0 +1,74 @@
+"""
+Brief: Django storage.py file.
+
+Description: This file contains the storage of the uploaded answer files for the
+Django data app. The files go through the 'answer_files' entry of the STORAGES
+setting, so any Django storage backend can be plugged in (an object storage for
+instance), the default one keeps them on the local filesystem. The files are
+content addressed: the name of a file is derived from the SHA-256 digest of its
+content and an existing file is never written twice.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import os
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+
+ANSWER_FILES_STORAGE = 'answer_files'
+
+
+class LocalFileSystemStorage(FileSystemStorage):
+    """
+    Filesystem storage of the content addressed answer files.
+    """
+    def save(self, name, content, max_length=None):
+        """
+        Save the file unless a file with the same (content addressed) name is already stored.
+        """
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+class PartialFile(File):
+    """
+    A completed partial upload file, moved (instead of copied) by the filesystem storages.
+    """
+    def temporary_file_path(self):
+        """
+        Get the path of the partial file.
+        """
+        return self.name
+
+
+def get_storage():
+    """
+    Get the storage backend of the answer files.
+    """
+    return storages[ANSWER_FILES_STORAGE]
+
+
+def get_blob_name(sha256):
+    """
+    Get the storage name of the content with the given digest (fanned out in two directory levels).
+    """
+    return f'{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+def get_partial_path(upload_id):
+    """
+    Get the path of the partial file of an upload.
+    """
+    return os.path.join(settings.FILE_UPLOAD_PARTIAL_ROOT, f'{upload_id}.part')
+
+
+def remove_partial(upload_id):
+    """
+    Remove the partial file of an upload if any.
+    """
+    try:
+        os.remove(get_partial_path(upload_id))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,239 @@
+"""
+Brief: Django tests.py file.
+
+Description: This file contains the tests of the bulk deletion of the responses
+(through the API) and of the instances, of the branching rules, of the chunks of
+the resumable uploads and of the submissions of the listed voters of the Django
+data app.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import datetime
+import io
+import tempfile
+from unittest import mock
+import jwt
+from django.conf import settings
+from django.core.files import locks
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase
+from core.deletion import delete_cascade
+from core.models import User
+from live.models import Instance, InstanceStats, SocialUser
+from .models import Skeleton, Section, Field, Response, Upload, Draft
+from .rules import compile_rules
+from .storage import get_partial_path
+from .uploads import UploadConflict, write_chunk
+from . import views
+
+
+class BulkDeletionTests(APITestCase):
+    """
+    Bulk deletion of the responses and the rows cascading from them.
+    """
+    def setUp(self):
+        """
+        Create an owner with a form holding a file question.
+        """
+        self.owner = User.objects.create_user(username='owner', password='secret')
+        self.instance = Instance.objects.create(user=self.owner, name='Form', description='')
+        self.skeleton = Skeleton.objects.create(instance=self.instance, title='Form')
+        self.field = Field.objects.create(skeleton=self.skeleton, title='File', type='file')
+        self.client.force_authenticate(self.owner)
+
+    def test_delete_responses_with_uploads(self):
+        """
+        The uploads (UUID primary keys) of the responses are deleted with them.
+        """
+        response = Response.objects.create(instance=self.instance, skeleton=self.skeleton)
+        Upload.objects.create(instance=self.instance, field=self.field, response=response, filename='a.txt', size=1)
+
+        result = self.client.delete(f'/api/v1/data/{self.instance.hash}/responses/?all=true')
+
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.json(), {'deleted': 1})
+        self.assertFalse(Response.objects.filter(instance=self.instance).exists())
+        self.assertFalse(Upload.objects.filter(instance=self.instance).exists())
+
+    def test_delete_instance_with_draft(self):
+        """
+        The drafts (UUID primary keys) of an instance are deleted with it.
+        """
+        Draft.objects.create(instance=self.instance, answers={str(self.field.id): 'a'})
+
+        deleted = delete_cascade(Instance, {'id': self.instance.id})
+
+        self.assertEqual(deleted[Draft._meta.label], 1)
+        self.assertEqual(deleted[Instance._meta.label], 1)
+        self.assertFalse(Instance.all_objects.filter(id=self.instance.id).exists())
+
+
+class RuleTests(SimpleTestCase):
+    """
+    Compilation and evaluation of the rule expressions.
+    """
+    def test_contains(self):
+        """
+        "contains" matches a substring of a text answer or an option of a multiple answer.
+        """
+        predicate, _ = compile_rules({'show_if': {'question': 1, 'op': 'contains', 'value': 'b'}})
+        self.assertTrue(predicate({1: 'abc'}))
+        self.assertTrue(predicate({1: ['a', 'b']}))
+        self.assertFalse(predicate({1: ['abc']}))
+
+    def test_contains_mismatched_types(self):
+        """
+        A scalar "contains" does not match a text answer, a list "contains" is refused.
+        """
+        predicate, _ = compile_rules({'show_if': {'question': 1, 'op': 'contains', 'value': 5}})
+        self.assertFalse(predicate({1: 'abc'}))
+        self.assertTrue(predicate({1: [5, 6]}))
+        with self.assertRaises(ValidationError):
+            compile_rules({'show_if': {'question': 1, 'op': 'contains', 'value': [5]}})
+
+
+class RuleOrderTests(APITestCase):
+    """
+    The rules of the questions and sections only depend on the questions before them.
+    """
+    def setUp(self):
+        """
+        Create a form with a question in each of two sections.
+        """
+        owner = User.objects.create_user(username='owner', password='secret')
+        instance = Instance.objects.create(user=owner, name='Form', description='')
+        skeleton = Skeleton.objects.create(instance=instance, title='Form')
+        self.first = Section.objects.create(skeleton=skeleton, title='First', position=1)
+        self.second = Section.objects.create(skeleton=skeleton, title='Second', position=2)
+        self.q1 = Field.objects.create(skeleton=skeleton, title='Q1', type='text', section=self.first)
+        self.q2 = Field.objects.create(skeleton=skeleton, title='Q2', type='text', section=self.second)
+        self.url = f'/api/v1/data/{instance.hash}/form/{skeleton.id}'
+        self.client.force_authenticate(owner)
+
+    def rule(self, field):
+        """
+        Get a rule showing when the question is answered.
+        """
+        return {'show_if': {'question': field.id, 'op': 'answered'}}
+
+    def test_earlier_question(self):
+        """
+        A question can depend on a question of an earlier section.
+        """
+        result = self.client.patch(f'{self.url}/question/{self.q2.id}', {'rules': self.rule(self.q1)}, format='json')
+        self.assertEqual(result.status_code, 200)
+
+    def test_later_question(self):
+        """
+        A question cannot depend on a later question (nor a section on its own questions).
+        """
+        result = self.client.patch(f'{self.url}/question/{self.q1.id}', {'rules': self.rule(self.q2)}, format='json')
+        self.assertEqual(result.status_code, 400)
+        self.assertIn('rules', result.json())
+        result = self.client.patch(f'{self.url}/section/{self.second.id}', {'rules': self.rule(self.q2)},
+                                   format='json')
+        self.assertEqual(result.status_code, 400)
+
+    def test_move_after_dependent(self):
+        """
+        A section holding a question other rules depend on cannot be moved after them.
+        """
+        Field.objects.filter(id=self.q2.id).update(rules=self.rule(self.q1))
+        result = self.client.patch(f'{self.url}/section/{self.first.id}', {'position': 3}, format='json')
+        self.assertEqual(result.status_code, 400)
+        self.assertIn('position', result.json())
+        result = self.client.patch(f'{self.url}/question/{self.q1.id}', {'section': self.second.id}, format='json')
+        self.assertEqual(result.status_code, 200)
+
+
+@override_settings(FILE_UPLOAD_PARTIAL_ROOT=tempfile.mkdtemp())
+class UploadChunkTests(APITestCase):
+    """
+    Chunks written to the partial file of an upload.
+    """
+    def setUp(self):
+        """
+        Open an upload of a 10 bytes file.
+        """
+        owner = User.objects.create_user(username='owner', password='secret')
+        instance = Instance.objects.create(user=owner, name='Form', description='')
+        skeleton = Skeleton.objects.create(instance=instance, title='Form')
+        field = Field.objects.create(skeleton=skeleton, title='File', type='file')
+        self.upload = Upload.objects.create(instance=instance, field=field, filename='a.txt', size=10)
+
+    def test_write_chunks(self):
+        """
+        The chunks are appended at the offset of the upload, a stale offset is refused.
+        """
+        self.assertEqual(write_chunk(self.upload, 0, io.BytesIO(b'abcd'), 4), 4)
+        with self.assertRaises(UploadConflict):
+            write_chunk(Upload.objects.get(pk=self.upload.pk), 0, io.BytesIO(b'wxyz'), 4)
+        self.assertEqual(write_chunk(self.upload, 4, io.BytesIO(b'ef'), 2), 6)
+        with open(get_partial_path(self.upload.id), 'rb') as partial:
+            self.assertEqual(partial.read(), b'abcdef')
+
+    def test_concurrent_chunk(self):
+        """
+        A chunk sent while another one is being written is refused and leaves the file alone.
+        """
+        write_chunk(self.upload, 0, io.BytesIO(b'abcd'), 4)
+        with open(get_partial_path(self.upload.id), 'r+b') as partial:
+            self.assertTrue(locks.lock(partial, locks.LOCK_EX | locks.LOCK_NB))
+            with self.assertRaises(UploadConflict):
+                write_chunk(self.upload, 4, io.BytesIO(b'ef'), 2)
+        self.assertEqual(Upload.objects.get(pk=self.upload.pk).offset, 4)
+        with open(get_partial_path(self.upload.id), 'rb') as partial:
+            self.assertEqual(partial.read(), b'abcd')
+
+
+class ListedVoterSubmissionTests(APITestCase):
+    """
+    A listed voter is counted once, whatever the concurrent submissions.
+    """
+    def setUp(self):
+        """
+        Create a listed voter of a form holding a text question.
+        """
+        owner = User.objects.create_user(username='owner', password='secret')
+        self.instance = Instance.objects.create(user=owner, name='Form', description='',
+                                                instance_auth_type=0x1 << 1)
+        skeleton = Skeleton.objects.create(instance=self.instance, title='Form')
+        self.field = Field.objects.create(skeleton=skeleton, title='Text', type='text')
+        self.voter = SocialUser.objects.create(instance=self.instance, first_name='A', last_name='B',
+                                               username='voter', password='-')
+        token = jwt.encode({'social_user_id': self.voter.id, 'username': 'voter',
+                            'exp': datetime.datetime.now() + datetime.timedelta(days=1)},
+                           settings.SECRET_KEY, algorithm='HS256')
+        self.url = f'/api/v1/data/{self.instance.hash}/voter/post-data?access={token}'
+
+    def submit(self):
+        """
+        Submit an answer as the voter.
+        """
+        return self.client.post(self.url, {'answers': [{'id': self.field.id, 'value': 'x'}]}, format='json')
+
+    def test_submit_once(self):
+        """
+        The vote is recorded and counted with the response, a second submission is refused.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit().status_code, 201)
+        self.assertEqual(self.submit().status_code, 403)
+        self.assertEqual(Response.objects.filter(instance=self.instance).count(), 1)
+        self.assertEqual(InstanceStats.objects.get(instance=self.instance).voted_count, 1)
+
+    def test_concurrent_submission(self):
+        """
+        A submission of the voter committed after the voted check of another one wins.
+        """
+        check_answers = views.check_answers
+
+        def vote_meanwhile(*args, **kwargs):
+            SocialUser.objects.filter(pk=self.voter.pk).update(has_voted=True)
+            return check_answers(*args, **kwargs)
+
+        with mock.patch.object(views, 'check_answers', side_effect=vote_meanwhile):
+            self.assertEqual(self.submit().status_code, 403)
+        self.assertFalse(Response.objects.filter(instance=self.instance).exists())
@@ -0,0 +1,166 @@
+"""
+Brief: Django timeseries.py file.
+
+Description: This file contains the submission rollups of the Django data app.
+Each submission is counted in its minute, hour and day SubmissionBucket, the
+histogram queries read the coarsest resolution whose number of buckets over the
+requested window fits HISTOGRAM_MAX_POINTS, and the fine buckets are pruned once
+they are older than their retention. The buckets of a submission are updated once
+its transaction is committed, outside of the locks of the submission.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import datetime
+from collections import Counter
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest, TruncMinute, TruncHour, TruncDay
+from django.utils import timezone
+from .models import Response, SubmissionBucket
+
+RESOLUTION_MINUTE = 0x1 << 0
+RESOLUTION_HOUR = 0x1 << 1
+RESOLUTION_DAY = 0x1 << 2
+
+RESOLUTIONS = {
+    RESOLUTION_MINUTE: ('minute', datetime.timedelta(minutes=1), TruncMinute),
+    RESOLUTION_HOUR: ('hour', datetime.timedelta(hours=1), TruncHour),
+    RESOLUTION_DAY: ('day', datetime.timedelta(days=1), TruncDay),
+}
+
+RESOLUTION_NAMES = {name: resolution for resolution, (name, _, _) in RESOLUTIONS.items()}
+
+
+def get_retention(resolution):
+    """
+    Get how long the buckets of the resolution are kept, None to keep them forever.
+    """
+    days = getattr(settings, 'SUBMISSION_BUCKET_RETENTION_DAYS', {}).get(RESOLUTIONS[resolution][0])
+    return datetime.timedelta(days=days) if days else None
+
+
+def truncate(timestamp, resolution):
+    """
+    Get the (UTC) start of the bucket of the resolution containing the timestamp.
+    """
+    timestamp = timestamp.astimezone(datetime.timezone.utc)
+    if resolution == RESOLUTION_MINUTE:
+        return timestamp.replace(second=0, microsecond=0)
+    if resolution == RESOLUTION_HOUR:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_to_bucket(instance_id, resolution, bucket_start, count=1):
+    """
+    Add to the count of a bucket, creating it when it does not exist yet.
+    """
+    buckets = SubmissionBucket.objects.filter(instance_id=instance_id, resolution=resolution,
+                                              bucket_start=bucket_start)
+    if buckets.update(count=F('count') + count):
+        return
+    try:
+        with transaction.atomic():
+            SubmissionBucket.objects.create(instance_id=instance_id, resolution=resolution,
+                                            bucket_start=bucket_start, count=count)
+    except IntegrityError:
+        # Created concurrently by another submission
+        buckets.update(count=F('count') + count)
+
+
+def record_submission(instance_id, submitted_at):
+    """
+    Count a submission in its minute, hour and day buckets.
+    """
+    for resolution in RESOLUTIONS:
+        add_to_bucket(instance_id, resolution, truncate(submitted_at, resolution))
+
+
+def forget_submission(instance_id, submitted_at):
+    """
+    Uncount a deleted submission from its buckets.
+    """
+    for resolution in RESOLUTIONS:
+        SubmissionBucket.objects.filter(
+            instance_id=instance_id, resolution=resolution, bucket_start=truncate(submitted_at, resolution),
+            count__gt=0).update(count=F('count') - 1)
+
+
+def forget_submissions(instance_id, submitted):
+    """
+    Uncount the deleted submissions (their timestamps) from their buckets, one statement per bucket.
+    """
+    counts = Counter((resolution, truncate(submitted_at, resolution))
+                     for submitted_at in submitted for resolution in RESOLUTIONS)
+    for (resolution, bucket_start), count in counts.items():
+        SubmissionBucket.objects.filter(
+            instance_id=instance_id, resolution=resolution, bucket_start=bucket_start, count__gt=0,
+        ).update(count=Greatest(F('count') - count, 0))
+
+
+def rebuild_buckets(instance_id, now=None):
+    """
+    Recompute the buckets of the instance from its responses (used after bulk deletions and for backfills).
+
+    Details: Only the buckets within the retention of their resolution are rebuilt.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        SubmissionBucket.objects.filter(instance_id=instance_id).delete()
+        for resolution, (_, _, trunc) in RESOLUTIONS.items():
+            responses = Response.objects.filter(instance_id=instance_id)
+            retention = get_retention(resolution)
+            if retention:
+                responses = responses.filter(submitted_at__gte=truncate(now - retention, resolution))
+            rows = (responses.annotate(bucket_start=trunc('submitted_at', tzinfo=datetime.timezone.utc))
+                    .values('bucket_start').annotate(count=Count('id')).order_by().values_list('bucket_start', 'count'))
+            SubmissionBucket.objects.bulk_create([
+                SubmissionBucket(instance_id=instance_id, resolution=resolution, bucket_start=bucket_start, count=count)
+                for bucket_start, count in rows
+            ], batch_size=1000)
+
+
+def prune_buckets(now=None):
+    """
+    Delete the buckets past the retention of their resolution, return the number of deleted buckets per resolution.
+    """
+    now = now or timezone.now()
+    pruned = {}
+    for resolution, (name, _, _) in RESOLUTIONS.items():
+        retention = get_retention(resolution)
+        if retention:
+            pruned[name], _ = SubmissionBucket.objects.filter(
+                resolution=resolution, bucket_start__lt=truncate(now - retention, resolution)).delete()
+    return pruned
+
+
+def choose_resolution(start, end, now=None):
+    """
+    Get the finest resolution covering the window with at most HISTOGRAM_MAX_POINTS buckets.
+
+    Details: The resolutions whose retention does not reach back to the start of
+    the window are skipped, the day buckets are used when nothing else fits.
+    """
+    now = now or timezone.now()
+    max_points = getattr(settings, 'HISTOGRAM_MAX_POINTS', 500)
+    for resolution, (_, step, _) in RESOLUTIONS.items():
+        retention = get_retention(resolution)
+        if retention and start < now - retention:
+            continue
+        if (end - start) / step <= max_points:
+            return resolution
+    return RESOLUTION_DAY
+
+
+def get_histogram(instance_id, start, end, resolution=None):
+    """
+    Get the resolution and the (bucket start, count) pairs of the non-empty buckets within the window.
+    """
+    resolution = resolution or choose_resolution(start, end)
+    buckets = SubmissionBucket.objects.filter(
+        instance_id=instance_id, resolution=resolution,
+        bucket_start__gte=truncate(start, resolution), bucket_start__lt=end, count__gt=0,
+    ).order_by('bucket_start').values_list('bucket_start', 'count')
+    return resolution, list(buckets)
@@ -0,0 +1,319 @@
+"""
+Brief: Django uploads.py file.
+
+Description: This file contains the resumable uploads of the file answers for the
+Django data app. An upload is opened with the name, type and size of the file,
+checked against the accepted types of the question. The content is then sent in
+chunks, each one streamed from the request to a local partial file at the current
+offset of the upload (the request body is never buffered), so an interrupted
+upload resumes from the last received byte. The completed file is hashed, its
+leading bytes are checked against its declared type and it is stored once per
+distinct content (see data/storage.py).
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import hashlib
+import mimetypes
+import os
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import locks
+from django.db import IntegrityError, transaction
+from django.db.models import F, ProtectedError
+from django.http import UnreadablePostError
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from .models import FileBlob, Upload
+from .storage import PartialFile, get_storage, get_blob_name, get_partial_path, remove_partial
+
+UPLOAD_PENDING = 0x1 << 0
+UPLOAD_COMPLETE = 0x1 << 1
+
+READ_SIZE = 64 * 1024
+
+# Leading bytes of the common file types, checked against the declared type of the completed uploads
+SIGNATURES = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'PK\x03\x04', 'application/zip'),
+)
+
+# Types stored in a zip container (office documents, ...)
+ZIP_TYPES = {'application/zip', 'application/epub+zip', 'application/java-archive'}
+
+
+class UploadConflict(APIException):
+    """
+    Raised when a chunk does not start at the current offset of the upload.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The chunk does not start at the current offset of the upload.'
+    default_code = 'conflict'
+
+
+def get_accepted(field):
+    """
+    Get the accepted extensions and content types of a file question (a list or a comma separated string).
+    """
+    accepted = field.accepted or []
+    if isinstance(accepted, str):
+        accepted = accepted.split(',')
+    extensions, content_types = set(), set()
+    for item in accepted:
+        item = str(item).strip().lower()
+        if '/' in item:
+            content_types.add(item)
+        elif item:
+            extensions.add('.' + item.lstrip('.'))
+    return extensions, content_types
+
+
+def get_content_type(filename, declared=''):
+    """
+    Get the content type of a file, guessed from its extension or the declared one.
+    """
+    return (mimetypes.guess_type(filename)[0] or declared or 'application/octet-stream').lower()
+
+
+def is_accepted(field, filename, content_type):
+    """
+    Check if a file name or content type is accepted by a file question (no accepted types accept any file).
+    """
+    extensions, content_types = get_accepted(field)
+    if not extensions and not content_types:
+        return True
+    if os.path.splitext(filename)[1].lower() in extensions:
+        return True
+    major = content_type.split('/')[0]
+    return content_type in content_types or f'{major}/*' in content_types
+
+
+def sniff_content_type(head):
+    """
+    Get the content type of a file from its leading bytes, None when unknown.
+    """
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def is_content_consistent(content_type, head):
+    """
+    Check that the leading bytes of a file match its declared type (when the type has a known signature).
+    """
+    sniffed = sniff_content_type(head)
+    if sniffed is None:
+        return content_type not in {signature_type for _, signature_type in SIGNATURES}
+    if sniffed == 'application/zip':
+        return content_type in ZIP_TYPES or content_type.startswith('application/vnd.')
+    return sniffed == content_type
+
+
+def create_upload(instance, field, user, filename, size, content_type=''):
+    """
+    Open an upload for a file question after checking the file name, type and size.
+    """
+    if field.type != 'file':
+        raise ValidationError({'field': 'The question does not accept files.'})
+    filename = os.path.basename(str(filename or '')).strip()
+    if not filename:
+        raise ValidationError({'filename': 'The file name is required.'})
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValidationError({'size': 'The size of the file is required.'})
+    if size <= 0 or size > settings.FILE_UPLOAD_MAX_SIZE:
+        raise ValidationError({'size': f'The size of the file must be between 1 and '
+                                       f'{settings.FILE_UPLOAD_MAX_SIZE} bytes.'})
+    content_type = get_content_type(filename, content_type)
+    if not is_accepted(field, filename, content_type):
+        raise ValidationError({'filename': 'The file type is not accepted for this question.'})
+    return Upload.objects.create(instance_id=instance.id, field=field, user=user, filename=filename[:255],
+                                 content_type=content_type[:255], size=size)
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Stream a chunk of the upload from the request to the partial file, return the new offset.
+
+    Details: The chunk must start at the current offset of the upload and fit in
+    the declared size. The partial file is locked while the chunk is written, a
+    chunk sent meanwhile (a retry while the first request is still streaming) is
+    refused, and the offset is checked again once the lock is held. The bytes
+    received before a disconnection are kept.
+    """
+    if upload.status != UPLOAD_PENDING:
+        raise ValidationError({'detail': 'The upload is already complete.'})
+    if offset != upload.offset:
+        raise UploadConflict()
+    if length is None or length <= 0 or offset + length > upload.size:
+        raise ValidationError({'detail': f'The chunk must hold between 1 and {upload.size - offset} bytes.'})
+
+    path = get_partial_path(upload.id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    interrupted = False
+    # Opened without truncating, the file may be created by a concurrent chunk
+    with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o600), 'r+b') as partial:
+        if not locks.lock(partial, locks.LOCK_EX | locks.LOCK_NB):
+            raise UploadConflict('A chunk of the upload is being written, resume from the current offset.')
+        upload.refresh_from_db(fields=['offset', 'status'])
+        if upload.status != UPLOAD_PENDING or upload.offset != offset:
+            raise UploadConflict()
+        partial.seek(offset)
+        try:
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                partial.write(data)
+                written += len(data)
+        except (UnreadablePostError, OSError):
+            interrupted = True
+
+        updated = Upload.objects.filter(pk=upload.pk, offset=offset).update(offset=F('offset') + written)
+        if not updated:
+            raise UploadConflict('A concurrent chunk was written, resume from the current offset.')
+        partial.truncate(offset + written)
+        upload.offset = offset + written
+        if interrupted or written < length:
+            raise ValidationError({'detail': 'The chunk was interrupted, resume from the current offset.'})
+        if upload.offset == upload.size:
+            partial.flush()
+            complete_upload(upload)
+    return upload.offset
+
+
+def complete_upload(upload):
+    """
+    Hash and check the received file, then store it once per distinct content.
+    """
+    path = get_partial_path(upload.id)
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as partial:
+        head = partial.read(READ_SIZE)
+        data = head
+        while data:
+            sha256.update(data)
+            data = partial.read(READ_SIZE)
+    if not is_content_consistent(upload.content_type, head):
+        Upload.objects.filter(pk=upload.pk).delete()
+        remove_partial(upload.id)
+        raise ValidationError({'detail': 'The content of the file does not match its type.'})
+
+    digest = sha256.hexdigest()
+    blob = FileBlob.objects.filter(sha256=digest).first()
+    if blob is None:
+        name = get_blob_name(digest)
+        with PartialFile(open(path, 'rb'), name=path) as content:
+            name = get_storage().save(name, content)
+        try:
+            with transaction.atomic():
+                blob = FileBlob.objects.create(sha256=digest, size=upload.size, content_type=upload.content_type,
+                                               name=name)
+        except IntegrityError:
+            # Same content completed concurrently, drop the copy saved under an alternative name
+            blob = FileBlob.objects.get(sha256=digest)
+            if name != blob.name:
+                get_storage().delete(name)
+    remove_partial(upload.id)
+
+    upload.blob = blob
+    upload.status = UPLOAD_COMPLETE
+    upload.save(update_fields=['blob', 'status', 'updated_at'])
+    return blob
+
+
+def get_upload_state(upload):
+    """
+    Get the state of an upload returned to the voter.
+    """
+    return {
+        'id': str(upload.id),
+        'field': upload.field_id,
+        'filename': upload.filename,
+        'content_type': upload.content_type,
+        'size': upload.size,
+        'offset': upload.offset,
+        'complete': upload.status == UPLOAD_COMPLETE,
+        'chunk_size': settings.FILE_UPLOAD_CHUNK_SIZE,
+    }
+
+
+def resolve_file_answers(instance, user, answers):
+    """
+    Replace the upload ids of the file answers with the file values, return the used uploads.
+
+    Details: The value of a file answer is the id of a complete and unused upload
+    of the same question (and voter). It is stored as the name, type, size and
+    digest of the file.
+    """
+    file_answers = [answer for answer in answers if answer.field.type == 'file' and answer.value is not None]
+    if not file_answers:
+        return []
+    try:
+        ids = [str(uuid.UUID(str(answer.value))) for answer in file_answers]
+    except ValueError:
+        raise ValidationError({'answers': 'The value of a file answer must be an upload id.'})
+    uploads = {str(key): upload for key, upload in Upload.objects.select_related('blob').in_bulk(ids).items()}
+    for answer, upload_id in zip(file_answers, ids):
+        upload = uploads.get(upload_id)
+        if (upload is None or upload.instance_id != instance.id or upload.field_id != answer.field.id
+                or upload.user_id != (user.id if user else None) or upload.status != UPLOAD_COMPLETE
+                or upload.response_id is not None):
+            raise ValidationError({'answers': f'Invalid upload for the question {answer.field.id}.'})
+        answer.value = {
+            'upload': upload_id,
+            'name': upload.filename,
+            'content_type': upload.content_type,
+            'size': upload.size,
+            'sha256': upload.blob.sha256,
+        }
+    return list(uploads.values())
+
+
+def claim_uploads(response, uploads):
+    """
+    Attach the uploads used by a response, failing if one of them was claimed concurrently.
+    """
+    if not uploads:
+        return
+    updated = Upload.objects.filter(pk__in=[upload.pk for upload in uploads],
+                                    response__isnull=True).update(response=response)
+    if updated != len(uploads):
+        raise ValidationError({'answers': 'An upload was already used by another response.'})
+
+
+def purge_uploads(expiry_hours=None):
+    """
+    Remove the expired unused uploads and the blobs no longer referenced, return the deleted counts.
+    """
+    if expiry_hours is None:
+        expiry_hours = settings.FILE_UPLOAD_EXPIRY_HOURS
+    cutoff = timezone.now() - timedelta(hours=expiry_hours)
+    expired = Upload.objects.filter(response__isnull=True, updated_at__lt=cutoff)
+    pending = list(expired.filter(status=UPLOAD_PENDING).values_list('pk', flat=True))
+    uploads, _ = expired.delete()
+    for upload_id in pending:
+        remove_partial(upload_id)
+
+    storage = get_storage()
+    blobs = 0
+    for blob in FileBlob.objects.filter(uploads__isnull=True, created_at__lt=cutoff).iterator():
+        try:
+            with transaction.atomic():
+                deleted, _ = FileBlob.objects.filter(pk=blob.pk, uploads__isnull=True).delete()
+        except (ProtectedError, IntegrityError):
+            # Reused by an upload completed meanwhile
+            continue
+        if deleted:
+            storage.delete(blob.name)
+            blobs += 1
+    return uploads, blobs
@@ -8,17 +8,34 @@ Author: Divij Sharma <divijs75@gmail.com>
 
 from django.urls import path
 from .views import FormListCreateView, FormDetailView
-from .views import QuestionListCreateView, QuestionDetailView
-from .views import ResponseListCreateView, ResponseDetailView
-from .views import custom_get_method, custom_post_method
+from .views import QuestionListCreateView, QuestionDetailView, CrosstabView, SearchView
+from .views import SectionListCreateView, SectionDetailView
+from .views import voter_draft_create, voter_draft_detail, voter_draft_submit
+from .views import ResponseListCreateView, ResponseDetailView, ResponseHistogramView
+from .views import FileAnswerDownloadView, FileExportView
+from .views import custom_get_method, custom_get_section, custom_post_method, voter_upload_create, voter_upload_detail
 
 urlpatterns = [
     path('<str:hash>/form/', FormListCreateView.as_view(), name='form-list-create'),
     path('<str:hash>/form/<int:pk>', FormDetailView.as_view(), name='form-detail'),
     path('<str:hash>/form/<int:pk>/question', QuestionListCreateView.as_view(), name='question-list-create'),
     path('<str:hash>/form/<int:pk>/question/<int:itempk>', QuestionDetailView.as_view(), name='question-detail'),
+    path('<str:hash>/form/<int:pk>/section', SectionListCreateView.as_view(), name='section-list-create'),
+    path('<str:hash>/form/<int:pk>/section/<int:sectionpk>', SectionDetailView.as_view(), name='section-detail'),
+    path('<str:hash>/form/<int:pk>/crosstab', CrosstabView.as_view(), name='form-crosstab'),
+    path('<str:hash>/form/<int:pk>/search', SearchView.as_view(), name='form-search'),
+    path('<str:hash>/form/<int:pk>/files', FileExportView.as_view(), name='form-files'),
     path('<str:hash>/responses/', ResponseListCreateView.as_view(), name='response-list-create'),
+    path('<str:hash>/responses/histogram', ResponseHistogramView.as_view(), name='response-histogram'),
     path('<str:hash>/responses/<int:pk>', ResponseDetailView.as_view(), name='response-detail'),
+    path('<str:hash>/responses/<int:pk>/files/<int:field_pk>', FileAnswerDownloadView.as_view(),
+         name='response-file'),
     path('<str:hash>/voter/get-data', custom_get_method, name='form-get'),
+    path('<str:hash>/voter/sections/<int:section_id>', custom_get_section, name='form-get-section'),
     path('<str:hash>/voter/post-data', custom_post_method, name='form-post'),
+    path('<str:hash>/voter/drafts', voter_draft_create, name='draft-create'),
+    path('<str:hash>/voter/drafts/<uuid:key>', voter_draft_detail, name='draft-detail'),
+    path('<str:hash>/voter/drafts/<uuid:key>/submit', voter_draft_submit, name='draft-submit'),
+    path('<str:hash>/voter/uploads', voter_upload_create, name='upload-create'),
+    path('<str:hash>/voter/uploads/<uuid:upload_id>', voter_upload_detail, name='upload-detail'),
 ]
@@ -0,0 +1,110 @@
+"""
+Brief: Django values.py file.
+
+Description: This file contains the interning of the answer values for the Django
+data app. Every distinct value is stored once in AnswerValue and the answers
+reference it. The value ids are resolved through an in-process LRU cache (values
+are immutable) so the ingestion of big polls, where most answers repeat a few
+option labels, rarely touches the AnswerValue table, and the reads decode the
+referenced values without joining it.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import hashlib
+import json
+from django.conf import settings
+from django.db import transaction
+from live.cache import LRUCache
+from .models import AnswerValue, make_value_key
+
+VALUE_CACHE_SIZE = getattr(settings, 'ANSWER_VALUE_CACHE_SIZE', 100000)
+
+# Value digest -> value id, and value id -> (value,)
+interned_ids = LRUCache(VALUE_CACHE_SIZE, float('inf'))
+decoded_values = LRUCache(VALUE_CACHE_SIZE, float('inf'))
+
+
+def digest_value(value):
+    """
+    Get the digest (SHA-256 hex of the canonical JSON) identifying a value.
+    """
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def intern_values(values):
+    """
+    Get the AnswerValue ids of the values (in order), creating the missing ones.
+    """
+    digests = [digest_value(value) for value in values]
+    ids = {}
+    for digest in set(digests):
+        value_id = interned_ids.get(digest)
+        if value_id is not None:
+            ids[digest] = value_id
+
+    missing = {digest: value for digest, value in zip(digests, values) if digest not in ids}
+    if missing:
+        for value_id, digest in AnswerValue.objects.filter(digest__in=list(missing)).values_list('id', 'digest'):
+            ids[digest] = value_id
+            interned_ids.set(digest, value_id)
+            del missing[digest]
+    if missing:
+        AnswerValue.objects.bulk_create([
+            AnswerValue(digest=digest, key=make_value_key(value), value=value) for digest, value in missing.items()
+        ], ignore_conflicts=True)
+        created = dict(AnswerValue.objects.filter(digest__in=list(missing)).values_list('digest', 'id'))
+        ids.update(created)
+
+        def cache_created():
+            # The new ids are only cached once committed, a rollback would leave dangling ids
+            for digest, value_id in created.items():
+                interned_ids.set(digest, value_id)
+                decoded_values.set(value_id, (missing[digest],))
+        transaction.on_commit(cache_created)
+    return [ids[digest] for digest in digests]
+
+
+def intern_value(value):
+    """
+    Get the AnswerValue id of a value, creating it if needed.
+    """
+    return intern_values([value])[0]
+
+
+def decode_values(value_ids):
+    """
+    Get the values of the AnswerValue ids as a dictionary, fetching the uncached ones in one query.
+    """
+    values = {}
+    missing = []
+    for value_id in set(value_ids):
+        cached = decoded_values.get(value_id)
+        if cached is None:
+            missing.append(value_id)
+        else:
+            values[value_id] = cached[0]
+    if missing:
+        for value_id, value in AnswerValue.objects.filter(id__in=missing).values_list('id', 'value'):
+            values[value_id] = value
+            decoded_values.set(value_id, (value,))
+    return values
+
+
+def decode_value(value_id):
+    """
+    Get the value of an AnswerValue id.
+    """
+    if value_id is None:
+        return None
+    return decode_values([value_id]).get(value_id)
+
+
+def intern_answers(answers):
+    """
+    Intern the new values of the (unsaved) answers, called by Answer.objects.bulk_create().
+    """
+    pending = [answer for answer in answers if answer.__dict__.pop('_value_pending', False)]
+    for answer, value_id in zip(pending, intern_values([answer.value for answer in pending])):
+        answer.value_ref_id = value_id
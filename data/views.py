@@ -7,16 +7,39 @@ Author: Divij Sharma <divijs75@gmail.com>
 """
 
 import jwt
+import datetime
+from functools import partial
 from rest_framework import generics
-from .models import Skeleton, Field, Answer, Response
+from rest_framework.views import APIView
+from .models import Skeleton, Section, Field, Answer, Response, Upload, Draft
 from live.models import Instance, SocialUser
-from .serializers import SkeletonSerializer, FieldSerializer, AnswerSerializer, ResponseSerializer
+from live.codes import is_voter_code_valid, redeem_voter_code
+from live.cache import get_instance_meta
+from live.stats import update_stats, refresh_response_bounds
+from core.throttling import VoterRateThrottle
+from core.records import RecordResponse, format_datetime
+from core.deletion import delete_cascade
+from core.pagination import OptInPageNumberPagination
+from .records import response_records
+from .outline import get_skeleton_version, get_form_payload, get_outline_payload, get_section_payload
+from .rules import NEW_ID, get_program, validate_rules, get_order_errors
+from .shuffle import get_plan, get_voter_key, unshuffle_answers
+from .filters import parse_timestamp, parse_response_filters, parse_answer_filters, filter_answers
+from .analytics import CHOICE_TYPES, get_counts
+from .search import search, index_answers
+from .timeseries import RESOLUTIONS, RESOLUTION_NAMES, get_histogram, forget_submissions
+from .downloads import get_file_blob, serve_file, export_files
+from .drafts import save_draft, get_draft_answers, get_draft_state
+from .uploads import create_upload, write_chunk, get_upload_state, resolve_file_answers, claim_uploads
+from .serializers import SkeletonSerializer, SectionSerializer, FieldSerializer, AnswerSerializer, ResponseSerializer
 from rest_framework.exceptions import NotFound, ValidationError
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
+from django.utils import timezone
 
 
 class FormListCreateView(generics.ListCreateAPIView):
@@ -32,7 +55,7 @@ class FormListCreateView(generics.ListCreateAPIView):
         hash = self.kwargs.get('hash')
         user = self.request.user
         instance = check_form_accessible(user, hash)
-        return Skeleton.objects.filter(instance=instance)
+        return Skeleton.objects.filter(instance_id=instance.id)
 
     def perform_create(self, serializer):
         """
@@ -64,7 +87,7 @@ class FormDetailView(generics.RetrieveUpdateDestroyAPIView):
         hash = self.kwargs.get('hash')
         user = self.request.user
         instance = check_form_accessible(user, hash)
-        return Skeleton.objects.filter(instance=instance)
+        return Skeleton.objects.filter(instance_id=instance.id)
 
 
 class QuestionListCreateView(generics.ListCreateAPIView):
@@ -95,6 +118,8 @@ class QuestionListCreateView(generics.ListCreateAPIView):
             skeleton = Skeleton.objects.get(pk=form_pk)
         except Skeleton.DoesNotExist:
             raise NotFound(detail="No Skeleton matches the given query.")
+        check_section(serializer, skeleton.id)
+        check_rules(serializer, skeleton.id, 'question')
         serializer.save(skeleton=skeleton)
 
 
@@ -118,13 +143,128 @@ class QuestionDetailView(generics.RetrieveUpdateDestroyAPIView):
         except Field.DoesNotExist:
             raise NotFound(detail="No question matches the given query.")
 
+    def perform_update(self, serializer):
+        """
+        Update the question after checking its section
+        """
+        check_section(serializer, serializer.instance.skeleton_id)
+        check_rules(serializer, serializer.instance.skeleton_id, 'question', serializer.instance.id)
+        serializer.save()
+
+
+class SectionListCreateView(generics.ListCreateAPIView):
+    """
+    View to list and create sections.
+    """
+    serializer_class = SectionSerializer
+
+    def get_queryset(self):
+        """
+        Get the sections for the given form
+        """
+        hash = self.kwargs.get('hash')
+        user = self.request.user
+        instance = check_form_accessible(user, hash)
+        form_pk = self.kwargs.get('pk')
+        return Section.objects.filter(skeleton_id=form_pk, skeleton__instance_id=instance.id).order_by(
+            'position', 'id')
+
+    def perform_create(self, serializer):
+        """
+        Create a new section for the given form
+        """
+        hash = self.kwargs.get('hash')
+        user = self.request.user
+        instance = check_form_accessible(user, hash)
+        form_pk = self.kwargs.get('pk')
+        try:
+            skeleton = Skeleton.objects.get(pk=form_pk, instance_id=instance.id)
+        except Skeleton.DoesNotExist:
+            raise NotFound(detail="No Skeleton matches the given query.")
+        check_rules(serializer, skeleton.id, 'section')
+        serializer.save(skeleton=skeleton)
+
+
+class SectionDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    View to retrieve, update and delete sections.
+    """
+    serializer_class = SectionSerializer
+
+    def get_object(self):
+        """
+        Get the section for the given form
+        """
+        hash = self.kwargs.get('hash')
+        user = self.request.user
+        instance = check_form_accessible(user, hash)
+        form_pk = self.kwargs.get('pk')
+        section_pk = self.kwargs.get('sectionpk')
+        try:
+            return Section.objects.get(skeleton_id=form_pk, skeleton__instance_id=instance.id, id=section_pk)
+        except Section.DoesNotExist:
+            raise NotFound(detail="No section matches the given query.")
+
+    def perform_update(self, serializer):
+        """
+        Update the section after checking its rules
+        """
+        check_rules(serializer, serializer.instance.skeleton_id, 'section', serializer.instance.id)
+        serializer.save()
+
+
+def check_section(serializer, skeleton_id):
+    """
+    Check that the section of a question belongs to the form of the question
+    """
+    section = serializer.validated_data.get('section')
+    if section is not None and section.skeleton_id != skeleton_id:
+        raise ValidationError({"section": "The section does not belong to the form."})
+
+
+def check_rules(serializer, skeleton_id, kind, item_id=NEW_ID):
+    """
+    Check that the branching rules of a question or section (kind) only depend on the questions of the
+    form before it, and that moving it keeps the other rules depending on earlier questions
+    """
+    data = serializer.validated_data
+    sections = {section_id: (position, rules) for section_id, position, rules in
+                Section.objects.filter(skeleton_id=skeleton_id).values_list('id', 'position', 'rules')}
+    fields = {field_id: (section_id, rules) for field_id, section_id, rules in
+              Field.objects.filter(skeleton_id=skeleton_id).values_list('id', 'section_id', 'rules')}
+    if data.get('rules'):
+        try:
+            validate_rules(data['rules'], list(fields), item_id if kind == 'question' else None)
+        except ValidationError as error:
+            raise ValidationError({"rules": error.detail})
+
+    # The rules already out of order are only reported when the change itself is about them
+    existing = set(get_order_errors(sections, fields))
+    if kind == 'question':
+        section_id, rules = fields.get(item_id, (None, None))
+        if 'section' in data:
+            section_id = data['section'].id if data['section'] is not None else None
+        fields[item_id] = (section_id, data.get('rules', rules))
+        moved = 'section'
+    else:
+        position, rules = sections.get(item_id, (0, None))
+        sections[item_id] = (data.get('position', position), data.get('rules', rules))
+        moved = 'position'
+    for error in get_order_errors(sections, fields):
+        own = error[:2] == (kind, item_id)
+        if own and data.get('rules'):
+            raise ValidationError({"rules": error[2]})
+        if error not in existing:
+            raise ValidationError({moved: error[2]})
+
 
 class ResponseListCreateView(generics.ListAPIView):
     """
-    View to list rhe responses for the form.
+    View to list and bulk delete the responses for the form.
     """
 
     serializer_class = ResponseSerializer
+    pagination_class = OptInPageNumberPagination
 
     def get_queryset(self):
         """
@@ -133,7 +273,197 @@ class ResponseListCreateView(generics.ListAPIView):
         hash = self.kwargs.get('hash')
         user = self.request.user
         instance = check_form_accessible(user, hash)
-        return Response.objects.filter(instance=instance)
+        return Response.objects.filter(instance_id=instance.id)
+
+    def filter_queryset(self, queryset):
+        """
+        Filter the responses by date range (after, before), user and answers (field=<id>&eq=<value> pairs).
+        """
+        queryset = queryset.filter(**parse_response_filters(self.request.query_params))
+        predicates = parse_answer_filters(self.request.query_params)
+        if predicates:
+            skeleton_ids = Skeleton.objects.filter(instance__hash=self.kwargs.get('hash')).values('id')
+            queryset = filter_answers(queryset, skeleton_ids, predicates)
+        return queryset.order_by('id')
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the responses with the record layer instead of the ResponseSerializer.
+
+        The listing is paginated when the page or page_size query parameter is given.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(response_records(page))
+        return RecordResponse(response_records(queryset), status=200)
+
+    def delete(self, request, *args, **kwargs):
+        """
+        Bulk delete the responses by date range (after, before), user or all of them (all=true).
+
+        The responses and their answers are removed with chunked DELETE statements, the
+        instance stats and the submission buckets are decremented chunk by chunk.
+        """
+        instance = check_form_accessible(request.user, self.kwargs.get('hash'))
+        lookup = parse_response_filters(request.query_params)
+        if not lookup and request.query_params.get('all') != 'true':
+            raise ValidationError({"detail": "A date range, a user or all=true is required."})
+        lookup['instance_id'] = instance.id
+        bounds = []
+
+        def forget_responses(model, ids):
+            """
+            Uncount a chunk of responses about to be deleted.
+            """
+            if model is not Response:
+                return
+            submitted = list(Response.objects.filter(pk__in=ids).values_list('submitted_at', flat=True))
+            if submitted:
+                update_stats(instance.id, total_responses=-len(submitted))
+                forget_submissions(instance.id, submitted)
+                bounds.extend((min(submitted), max(submitted)))
+
+        deleted = delete_cascade(Response, lookup, chunk_size=getattr(settings, 'RESPONSE_PURGE_CHUNK_SIZE', 1000),
+                                 before_delete=forget_responses)
+        if bounds:
+            refresh_response_bounds(instance.id, min(bounds), max(bounds))
+        return JsonResponse({"deleted": deleted.get(Response._meta.label, 0)}, status=200)
+
+
+class ResponseHistogramView(APIView):
+    """
+    View to get the submission histogram of the form over a time window.
+    """
+
+    def get(self, request, hash, *args, **kwargs):
+        """
+        Get the submission counts per bucket between after and before (the last day by default).
+
+        The resolution (minute, hour or day) is chosen from the window length unless given.
+        """
+        instance = check_form_accessible(request.user, hash)
+        params = request.query_params
+        end = parse_timestamp(params['before'], 'before') if params.get('before') else timezone.now()
+        start = parse_timestamp(params['after'], 'after') if params.get('after') else end - datetime.timedelta(days=1)
+        if start >= end:
+            raise ValidationError({"after": "The window must end after it starts."})
+        resolution = None
+        if params.get('resolution'):
+            if params['resolution'] not in RESOLUTION_NAMES:
+                raise ValidationError({"resolution": f"Expected one of {', '.join(RESOLUTION_NAMES)}."})
+            resolution = RESOLUTION_NAMES[params['resolution']]
+
+        resolution, buckets = get_histogram(instance.id, start, end, resolution)
+        return JsonResponse({
+            "resolution": RESOLUTIONS[resolution][0],
+            "buckets": [{"start": format_datetime(bucket_start), "count": count} for bucket_start, count in buckets],
+        }, status=200)
+
+
+class CrosstabView(APIView):
+    """
+    View to get the answer counts of a choice question, or the crosstab of two choice questions.
+    """
+
+    def get(self, request, hash, pk, *args, **kwargs):
+        """
+        Get the counts per option of the rows question, per option pair with the columns question.
+        """
+        instance = check_form_accessible(request.user, hash)
+        try:
+            skeleton = Skeleton.objects.get(pk=pk, instance_id=instance.id)
+        except Skeleton.DoesNotExist:
+            raise NotFound(detail="No Skeleton matches the given query.")
+
+        field_ids = [request.query_params.get(name) for name in ('rows', 'columns') if request.query_params.get(name)]
+        if not field_ids or 'rows' not in request.query_params:
+            raise ValidationError({"rows": "A question id is required."})
+        try:
+            fields = {field.id: field for field in Field.objects.filter(skeleton_id=skeleton.id, id__in=field_ids)}
+            fields = [fields[int(field_id)] for field_id in field_ids]
+        except (KeyError, ValueError):
+            raise NotFound(detail="No question matches the given query.")
+        if any(field.type not in CHOICE_TYPES for field in fields):
+            raise ValidationError({"detail": "Only choice based questions can be tabulated."})
+
+        responses, counts = get_counts(skeleton, fields)
+        data = {"responses": responses, "rows": {"question": fields[0].id, "options": fields[0].options}}
+        if len(fields) > 1:
+            data["columns"] = {"question": fields[1].id, "options": fields[1].options}
+        data["counts"] = counts.tolist()
+        return JsonResponse(data, status=200)
+
+
+class SearchView(APIView):
+    """
+    View to search the text answers of the form.
+    """
+
+    def get(self, request, hash, pk, *args, **kwargs):
+        """
+        Get the best matching text answers of the query q (optionally of one question), best first.
+        """
+        instance = check_form_accessible(request.user, hash)
+        if not Skeleton.objects.filter(pk=pk, instance_id=instance.id).exists():
+            raise NotFound(detail="No Skeleton matches the given query.")
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            raise ValidationError({"q": "A search query is required."})
+        try:
+            field_id = int(request.query_params['question']) if request.query_params.get('question') else None
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            raise ValidationError({"detail": "The question and limit parameters must be integers."})
+
+        matches = search(pk, query, field_id, limit)
+        values = {}
+        if matches:
+            answers = Answer.objects.filter(
+                response_id__in={response_id for _, response_id, _ in matches},
+                field_id__in={field_id for _, _, field_id in matches},
+            ).values_list('response_id', 'field_id', 'value_ref__value')
+            values = {(response_id, field_id): value for response_id, field_id, value in answers}
+        return JsonResponse({"results": [
+            {"response": response_id, "question": field_id, "value": values.get((response_id, field_id)),
+             "score": round(score, 4)}
+            for score, response_id, field_id in matches
+        ]}, status=200)
+
+
+class FileAnswerDownloadView(APIView):
+    """
+    View to download the file answered to a question of a response.
+    """
+
+    def get(self, request, hash, pk, field_pk, *args, **kwargs):
+        """
+        Serve the file (or the requested range of the file) of the answer.
+        """
+        instance = check_form_accessible(request.user, hash)
+        answer = Answer.objects.filter(response_id=pk, response__instance_id=instance.id, field_id=field_pk,
+                                       field__type='file').first()
+        blob = get_file_blob(answer.value) if answer else None
+        if blob is None:
+            raise NotFound(detail="No file matches the given query.")
+        return serve_file(request, blob, answer.value.get('name') or blob.sha256, answer.value.get('content_type'))
+
+
+class FileExportView(APIView):
+    """
+    View to export the files answered to a form as a ZIP archive.
+    """
+
+    def get(self, request, hash, pk, *args, **kwargs):
+        """
+        Stream the ZIP archive of the file answers, generated on the fly.
+        """
+        instance = check_form_accessible(request.user, hash)
+        if not Skeleton.objects.filter(pk=pk, instance_id=instance.id).exists():
+            raise NotFound(detail="No form matches the given query.")
+        response = StreamingHttpResponse(export_files(pk), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{hash}-{pk}-files.zip"'
+        return response
 
 
 class ResponseDetailView(generics.RetrieveDestroyAPIView):
@@ -158,23 +488,26 @@ class ResponseDetailView(generics.RetrieveDestroyAPIView):
 
 def check_form_accessible(user, hash):
     """
-    Check if the form is accessible by the user
+    Check if the form is accessible by the user, return the cached instance metadata
     """
     try:
-        instance = Instance.objects.get(hash=hash, user=user)
+        instance = get_instance_meta(hash)
     except Instance.DoesNotExist:
         raise NotFound(detail="No instance matches the given query.")
+    if instance.user_id != user.id:
+        raise NotFound(detail="No instance matches the given query.")
     return instance
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@throttle_classes([VoterRateThrottle])
 def custom_get_method(request, hash, *args, **kwargs):
     """
     Custom GET method for the form when accessing the form as a voter.
     """
     try:
-        instance = Instance.getExistingInstance(hash)
+        instance = get_instance_meta(hash)
     except Instance.DoesNotExist:
         return JsonResponse({"detail": "Instance not found"}, status=404)
 
@@ -189,9 +522,7 @@ def custom_get_method(request, hash, *args, **kwargs):
 
     if auth_type == 0x1 << 0:
         # Public access, no token required
-        skeletons = Skeleton.objects.filter(instance=instance)
-        serializer = SkeletonSerializer(skeletons, many=True)
-        return JsonResponse(serializer.data, safe=False, status=200)
+        return get_form_response(request, instance)
 
     if auth_type in [0x1 << 1, 0x1 << 2]:
         # Either social user or listed user access, token required
@@ -210,46 +541,154 @@ def custom_get_method(request, hash, *args, **kwargs):
             return JsonResponse({"detail": "Invalid access token"}, status=403)
 
         request.user = user
-        skeletons = Skeleton.objects.filter(instance=instance)
-        serializer = SkeletonSerializer(skeletons, many=True)
-        return JsonResponse(serializer.data, safe=False, status=200)
+        return get_form_response(request, instance)
+
+    if auth_type == 0x1 << 3:
+        # Voter code access, the code is only checked here and redeemed on submission
+        code = request.GET.get('code')
+        if not code:
+            return JsonResponse({"detail": "Voter code is required"}, status=403)
+        if not is_voter_code_valid(instance, code):
+            return JsonResponse({"detail": "Invalid or already used voter code"}, status=403)
+
+        return get_form_response(request, instance)
 
     return JsonResponse({"detail": "Unauthorized"}, status=403)
 
 
+def get_form_response(request, instance):
+    """
+    Get the cached voter payload of the form: its outline with outline=1, the whole form otherwise.
+    """
+    if request.GET.get('outline') in ('1', 'true'):
+        answers = None
+        if request.GET.get('draft'):
+            # Only the sections reachable with the answers saved in the draft
+            user = request.user if isinstance(request.user, SocialUser) else None
+            try:
+                draft = Draft.objects.filter(key=request.GET.get('draft'), instance_id=instance.id, user=user).first()
+            except DjangoValidationError:
+                draft = None
+            if draft is None:
+                return JsonResponse({"detail": "Draft not found"}, status=404)
+            answers = {int(field_id): value for field_id, value in draft.answers.items()}
+        payload = get_outline_payload(instance.id, answers)
+        if payload is None:
+            return JsonResponse({"detail": "Form not found"}, status=404)
+    else:
+        user = request.user if isinstance(request.user, SocialUser) else None
+        payload = get_form_payload(instance.id, get_voter_seed(request, instance, user))
+    return HttpResponse(payload, content_type='application/json', status=200)
+
+
+def get_voter_seed(request, instance, user=None):
+    """
+    Get the seed of the per voter orders of the form: the social user, the voter code, or the
+    seed chosen by the client (the key of its draft for instance) on the public instances.
+    """
+    if user is not None:
+        return f'user:{user.id}'
+    if instance.instance_auth_type == 0x1 << 3:
+        code = request.data.get('code') or request.GET.get('code')
+        return f'code:{code}' if code else None
+    seed = request.GET.get('seed')
+    return f'seed:{seed}' if seed else None
+
+
+def map_voter_answers(request, instance, answers, user=None):
+    """
+    Map the option positions answered by a voter in its own order back to the canonical options.
+    """
+    skeleton = get_skeleton_version(instance.id)
+    if skeleton is None or not isinstance(answers, list):
+        return answers
+    return unshuffle_answers(answers, get_plan(*skeleton), get_voter_key(get_voter_seed(request, instance, user)))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@throttle_classes([VoterRateThrottle])
+def custom_get_section(request, hash, section_id, *args, **kwargs):
+    """
+    Custom GET method for a section of the form (0 for the questions outside of the sections) as a voter.
+    """
+    instance, user, error = check_voter_access(request, hash)
+    if error:
+        return error
+    payload = get_section_payload(instance.id, section_id, get_voter_seed(request, instance, user))
+    if payload is None:
+        return JsonResponse({"detail": "Section not found"}, status=404)
+    return HttpResponse(payload, content_type='application/json', status=200)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([VoterRateThrottle])
 def custom_post_method(request, hash, *args, **kwargs):
     """
     Custom POST method for the form when submitting the form as a voter.
     """
     try:
-        instance = Instance.getExistingInstance(hash)
+        instance = get_instance_meta(hash)
     except Instance.DoesNotExist:
         return JsonResponse({"detail": "Instance not found"}, status=404)
 
     if instance.instance_status == 0x1 << 0:
         return JsonResponse({"detail": "Instance is no longer accepting responses"}, status=403)
 
+    data = request.data.get('answers', [])
+    if not data:
+        return JsonResponse({"detail": "Answers are required"}, status=400)
+    return submit_answers(request, instance, data)
+
+
+def check_answers(instance, data, seed=None):
+    """
+    Check the answers against the branching rules of the form, return the answers to the
+    visible questions (the answers to the hidden questions are dropped, the option positions
+    are mapped back to the options with the voter seed) and the error response if a visible
+    required question is unanswered.
+    """
+    skeleton = get_skeleton_version(instance.id)
+    if skeleton is None:
+        return data, JsonResponse({"detail": "Form not found"}, status=404)
+    data = unshuffle_answers(data, get_plan(*skeleton), get_voter_key(seed))
+    answers = {}
+    for answer in data:
+        try:
+            answers[int(answer["id"])] = answer.get("value")
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return data, JsonResponse({"detail": "Id and value are required for answer"}, status=400)
+
+    program = get_program(*skeleton)
+    missing = program.get_missing(answers)
+    if missing:
+        return data, JsonResponse({"detail": "Required fields are missing", "fields": missing}, status=400)
+    _, visible_fields, _ = program.evaluate(answers)
+    return [answer for answer in data if int(answer["id"]) in visible_fields], None
+
+
+def submit_answers(request, instance, data, draft=None):
+    """
+    Submit the answers of a voter after checking the access of the voter (the submitted
+    draft, if any, is deleted with the submission).
+    """
     auth_type = instance.instance_auth_type
 
     token = None
     if 'access' in request.GET:
         token = request.GET.get('access')
 
-    data = request.data.get('answers', [])
-    if not data:
-        return JsonResponse({"detail": "Answers are required"}, status=400)
     if auth_type == 0x1 << 0:
         # Public access, no token required
-        required_fields = Field.objects.filter(
-            skeleton=Skeleton.getSkeletonByInstance(instance=instance), required=True)
-        required_fields_ids = [field.id for field in required_fields]
-        for id in data:
-            if int(id["id"]) not in required_fields_ids:
-                return JsonResponse({"detail": "Required fields are missing"}, status=400)
-
-        response = populate_answers_and_responses(data=data, instance=instance)
+        data, error = check_answers(instance, data, get_voter_seed(request, instance))
+        if error:
+            return error
+
+        with transaction.atomic():
+            response = populate_answers_and_responses(data=data, instance=instance)
+            if draft is not None:
+                draft.delete()
         return JsonResponse(response, safe=False, status=201)
 
     if auth_type in [0x1 << 1, 0x1 << 2]:
@@ -261,39 +700,225 @@ def custom_post_method(request, hash, *args, **kwargs):
             decoded_token = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
             social_user_id = decoded_token.get('social_user_id')
             user = SocialUser.objects.filter(id=social_user_id).first()
-            if user.has_voted:
-                return JsonResponse({"detail": "You have already voted"}, status=403)
-            user.has_voted = True
-            user.save()
             if not user:
                 return JsonResponse({"detail": "Invalid access token"}, status=403)
+            if user.has_voted:
+                return JsonResponse({"detail": "You have already voted"}, status=403)
         except jwt.ExpiredSignatureError:
             return JsonResponse({"detail": "Token has expired"}, status=403)
         except jwt.InvalidTokenError:
             return JsonResponse({"detail": "Invalid access token"}, status=403)
 
         request.user = user
-        required_fields = Field.objects.filter(
-            skeleton=Skeleton.getSkeletonByInstance(instance=instance), required=True)
-        required_fields_ids = [field.id for field in required_fields]
-        for id in data:
-            if int(id["id"]) not in required_fields_ids:
-                return JsonResponse({"detail": "Required fields are missing"}, status=400)
-
-        response = populate_answers_and_responses(data=data, user=user, instance=instance)
+        data, error = check_answers(instance, data, get_voter_seed(request, instance, user))
+        if error:
+            return error
+
+        # The vote is only recorded with the response, a failed submission can be retried. The voted flag
+        # is set conditionally so only one of concurrent submissions of the voter goes through
+        with transaction.atomic():
+            if not SocialUser.objects.filter(pk=user.pk, has_voted=False).update(has_voted=True):
+                return JsonResponse({"detail": "You have already voted"}, status=403)
+            transaction.on_commit(partial(update_stats, user.instance_id, voted_count=1))
+            response = populate_answers_and_responses(data=data, user=user, instance=instance)
+            if draft is not None:
+                draft.delete()
+        return JsonResponse(response, safe=False, status=201)
+
+    if auth_type == 0x1 << 3:
+        # Voter code access, the code replaces the login and is redeemed with the submission
+        code = request.data.get('code') or request.GET.get('code')
+        if not code:
+            return JsonResponse({"detail": "Voter code is required"}, status=403)
+
+        data, error = check_answers(instance, data, get_voter_seed(request, instance))
+        if error:
+            return error
+
+        with transaction.atomic():
+            if not redeem_voter_code(instance, code):
+                return JsonResponse({"detail": "Invalid or already used voter code"}, status=403)
+            response = populate_answers_and_responses(data=data, instance=instance)
+            if draft is not None:
+                draft.delete()
         return JsonResponse(response, safe=False, status=201)
 
     return JsonResponse({"detail": "Unauthorized"}, status=403)
 
 
+def check_voter_access(request, hash):
+    """
+    Check the access of a voter to an open instance without consuming it (the voter
+    code is not redeemed), return the instance metadata, the social user (None for
+    the public and voter code instances) and the error response if any.
+    """
+    try:
+        instance = get_instance_meta(hash)
+    except Instance.DoesNotExist:
+        return None, None, JsonResponse({"detail": "Instance not found"}, status=404)
+
+    if instance.instance_status == 0x1 << 0:
+        return instance, None, JsonResponse({"detail": "Instance is no longer accepting responses"}, status=403)
+
+    auth_type = instance.instance_auth_type
+    if auth_type == 0x1 << 0:
+        return instance, None, None
+
+    if auth_type in [0x1 << 1, 0x1 << 2]:
+        token = request.GET.get('access')
+        if not token:
+            return instance, None, JsonResponse({"detail": "Access token is required"}, status=403)
+        try:
+            decoded_token = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            return instance, None, JsonResponse({"detail": "Token has expired"}, status=403)
+        except jwt.InvalidTokenError:
+            return instance, None, JsonResponse({"detail": "Invalid access token"}, status=403)
+        user = SocialUser.objects.filter(id=decoded_token.get('social_user_id'), instance_id=instance.id).first()
+        if not user:
+            return instance, None, JsonResponse({"detail": "Invalid access token"}, status=403)
+        if user.has_voted:
+            return instance, None, JsonResponse({"detail": "You have already voted"}, status=403)
+        return instance, user, None
+
+    if auth_type == 0x1 << 3:
+        code = request.GET.get('code')
+        if not code:
+            return instance, None, JsonResponse({"detail": "Voter code is required"}, status=403)
+        if not is_voter_code_valid(instance, code):
+            return instance, None, JsonResponse({"detail": "Invalid or already used voter code"}, status=403)
+        return instance, None, None
+
+    return instance, None, JsonResponse({"detail": "Unauthorized"}, status=403)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([VoterRateThrottle])
+def voter_upload_create(request, hash, *args, **kwargs):
+    """
+    Open a resumable upload for a file question as a voter.
+    """
+    instance, user, error = check_voter_access(request, hash)
+    if error:
+        return error
+    try:
+        field = Field.objects.get(id=request.data.get('field'), skeleton__instance_id=instance.id)
+    except (Field.DoesNotExist, ValueError, TypeError):
+        return JsonResponse({"detail": "Question not found"}, status=404)
+    upload = create_upload(instance, field, user, request.data.get('filename'), request.data.get('size'),
+                           request.data.get('content_type', ''))
+    return JsonResponse(get_upload_state(upload), status=201)
+
+
+@api_view(['GET', 'PATCH'])
+@permission_classes([AllowAny])
+@throttle_classes([VoterRateThrottle])
+def voter_upload_detail(request, hash, upload_id, *args, **kwargs):
+    """
+    Get the offset of an upload (to resume it) or send its next chunk as a voter.
+
+    Details: The chunk is the raw request body, sent with the Upload-Offset header
+    holding the offset it starts at. The body is streamed to the partial file and
+    never parsed.
+    """
+    instance, user, error = check_voter_access(request, hash)
+    if error:
+        return error
+    try:
+        upload = Upload.objects.get(id=upload_id, instance_id=instance.id, user=user, response__isnull=True)
+    except Upload.DoesNotExist:
+        return JsonResponse({"detail": "Upload not found"}, status=404)
+
+    if request.method == 'PATCH':
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return JsonResponse({"detail": "Upload-Offset and Content-Length headers are required"}, status=400)
+        write_chunk(upload, offset, request.stream, length)
+
+    response = JsonResponse(get_upload_state(upload), status=200)
+    response['Upload-Offset'] = upload.offset
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([VoterRateThrottle])
+def voter_draft_create(request, hash, *args, **kwargs):
+    """
+    Start the draft of a voter (the existing draft of a listed or social user is returned).
+    """
+    instance, user, error = check_voter_access(request, hash)
+    if error:
+        return error
+    if user is not None:
+        draft, created = Draft.objects.get_or_create(user=user, defaults={'instance_id': instance.id})
+    else:
+        draft, created = Draft.objects.create(instance_id=instance.id), True
+    if request.data.get('answers'):
+        draft = save_draft(draft, map_voter_answers(request, instance, request.data.get('answers'), user))
+    return JsonResponse(get_draft_state(draft), status=201 if created else 200)
+
+
+@api_view(['GET', 'PATCH', 'DELETE'])
+@permission_classes([AllowAny])
+@throttle_classes([VoterRateThrottle])
+def voter_draft_detail(request, hash, key, *args, **kwargs):
+    """
+    Get the draft of a voter, save changed answers into it or discard it.
+
+    Details: PATCH takes the changed answers only ({"answers": [{"id", "value"}]},
+    a null value removes the answer, or {"id", "option"} with the option positions
+    in the order of the voter) and optionally the revision they are based on.
+    """
+    instance, user, error = check_voter_access(request, hash)
+    if error:
+        return error
+    try:
+        draft = Draft.objects.get(key=key, instance_id=instance.id, user=user)
+    except Draft.DoesNotExist:
+        return JsonResponse({"detail": "Draft not found"}, status=404)
+
+    if request.method == 'DELETE':
+        draft.delete()
+        return HttpResponse(status=204)
+    if request.method == 'PATCH':
+        answers = map_voter_answers(request, instance, request.data.get('answers', []), user)
+        draft = save_draft(draft, answers, request.data.get('revision'))
+    return JsonResponse(get_draft_state(draft), status=200)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([VoterRateThrottle])
+def voter_draft_submit(request, hash, key, *args, **kwargs):
+    """
+    Submit the draft of a voter as the response (the draft is deleted on success).
+    """
+    instance, user, error = check_voter_access(request, hash)
+    if error:
+        return error
+    with transaction.atomic():
+        # Locked until submitted, a draft is never submitted twice
+        draft = Draft.objects.select_for_update().filter(key=key, instance_id=instance.id, user=user).first()
+        if draft is None:
+            return JsonResponse({"detail": "Draft not found"}, status=404)
+        data = get_draft_answers(draft)
+        if not data:
+            return JsonResponse({"detail": "Answers are required"}, status=400)
+        return submit_answers(request, instance, data, draft=draft)
+
+
 def populate_answers_and_responses(data, instance, user=None):
     """
     Populate the answers and responses for the form
     """
     if not isinstance(data, list):
         raise ValueError("Invalid data format for answers, list expected.")
-    skeleton = Skeleton.getSkeletonByInstance(instance=instance)
-    response = Response.objects.create(instance=instance, skeleton=skeleton, user=user)
+    skeleton = Skeleton.getSkeletonByInstance(instance=instance.id)
+    response = Response.objects.create(instance_id=instance.id, skeleton=skeleton, user=user)
 
     atomic_trans_actions = []
 
@@ -317,9 +942,17 @@ def populate_answers_and_responses(data, instance, user=None):
             response.delete()
             raise NotFound(f"Invalid data for answer: {serializer.errors}")
 
+    try:
+        uploads = resolve_file_answers(instance, user, atomic_trans_actions)
+    except ValidationError:
+        response.delete()
+        raise
+
     try:
         with transaction.atomic():
+            claim_uploads(response, uploads)
             Answer.objects.bulk_create(atomic_trans_actions)
+            index_answers(response, atomic_trans_actions)
     except Exception as e:
         response.delete()
         raise e
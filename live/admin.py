@@ -7,7 +7,8 @@ Author: Divij Sharma <divijs75@gmail.com>
 """
 
 from django.contrib import admin
-from .models import Instance, SocialUser
+from core.admin import EstimatedCountPaginator, input_filter
+from .models import Instance, SocialUser, VoterCode, VoterInvitation
 
 
 class InstanceAdmin(admin.ModelAdmin):
@@ -16,16 +17,19 @@ class InstanceAdmin(admin.ModelAdmin):
     """
     list_display = ('user', 'instance_auth_type', 'name', 'description',
                     'instance_status', 'created_at', 'last_modified', 'hash')
-    search_fields = ('name', 'description', 'user__username', 'hash', 'instance_auth_type')
-    list_filter = ('instance_status', 'created_at', 'last_modified', 'user')
+    search_fields = ('^name', '^user__username', '=hash')
+    list_filter = ('instance_status', 'created_at', 'last_modified',
+                   input_filter('owner username', 'owner', 'user__username'))
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
     ordering = ('-created_at',)
     readonly_fields = ('hash', 'created_at', 'last_modified')
     fieldsets = (
         ('Instance Information', {
-            'fields': ('user', 'instance_auth_type', 'name', 'description')
+            'fields': ('user', 'instance_auth_type', 'name', 'description', 'instance_password_policy')
         }),
         ('Status', {
-            'fields': ('instance_status',)
+            'fields': ('instance_status', 'retention_days')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'last_modified')
@@ -43,14 +47,19 @@ class SocialUserAdmin(admin.ModelAdmin):
     """
     list_display = ('instance', 'user_social_type', 'first_name', 'last_name',
                     'username', 'password', 'has_voted', 'created_at')
-    search_fields = ('first_name', 'last_name', 'username', 'instance__name', 'instance__hash')
-    list_filter = ('has_voted', 'created_at', 'user_social_type')
+    search_fields = ('^username', '^first_name', '^last_name', '=instance__hash')
+    list_filter = ('has_voted', 'created_at', 'user_social_type',
+                   input_filter('instance hash', 'instance', 'instance__hash'))
+    list_select_related = ('instance',)
+    autocomplete_fields = ('instance',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ('-created_at',)
     readonly_fields = ('created_at',)
     fieldsets = (
         ('Social User Information', {
             'fields': ('instance', 'user_social_type', 'first_name', 'last_name',
-                       'username', 'password', 'has_voted')
+                       'email', 'username', 'password', 'has_voted')
         }),
         ('Timestamps', {
             'fields': ('created_at',)
@@ -60,5 +69,44 @@ class SocialUserAdmin(admin.ModelAdmin):
     # list_editable = ('has_voted', 'first_name', 'last_name', 'username', 'password')
 
 
+class VoterCodeAdmin(admin.ModelAdmin):
+    """
+    Custom VoterCode admin settings.
+    """
+    list_display = ('instance', 'digest', 'used_at', 'created_at')
+    search_fields = ('=instance__hash', '^digest')
+    list_filter = ('used_at', 'created_at')
+    list_select_related = ('instance',)
+    autocomplete_fields = ('instance',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-created_at',)
+    readonly_fields = ('digest', 'created_at')
+    fieldsets = (
+        ('Voter Code Information', {
+            'fields': ('instance', 'digest', 'used_at')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at',)
+        }),
+    )
+
+
+class VoterInvitationAdmin(admin.ModelAdmin):
+    """
+    Custom VoterInvitation admin settings.
+    """
+    list_display = ('social_user', 'instance', 'status', 'sent_at', 'updated_at')
+    search_fields = ('=instance__hash',)
+    list_filter = ('status',)
+    list_select_related = ('social_user', 'instance')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-updated_at',)
+    readonly_fields = ('social_user', 'instance', 'status', 'sent_at', 'last_error', 'updated_at')
+
+
 admin.site.register(Instance, InstanceAdmin)
 admin.site.register(SocialUser, SocialUserAdmin)
+admin.site.register(VoterCode, VoterCodeAdmin)
+admin.site.register(VoterInvitation, VoterInvitationAdmin)
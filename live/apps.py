@@ -12,3 +12,9 @@ from django.apps import AppConfig
 class LiveConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "live"
+
+    def ready(self):
+        """
+        Register the signal receivers of the app.
+        """
+        from . import signals  # noqa: F401
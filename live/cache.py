@@ -0,0 +1,121 @@
+"""
+Brief: Django cache.py file.
+
+Description: This file contains the instance metadata cache of the Django live app.
+The metadata needed by the hash addressed endpoints is kept in a small in-process
+LRU in front of the shared Django cache, and invalidated by the Instance signals.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from .models import Instance
+
+InstanceMeta = namedtuple('InstanceMeta', [
+    'id', 'hash', 'user_id', 'instance_auth_type', 'instance_status', 'instance_password_policy', 'version'])
+
+
+def get_cache_settings():
+    """
+    Get the instance cache settings merged with the defaults.
+    """
+    defaults = {'LOCAL_SIZE': 1024, 'LOCAL_TTL': 5, 'TTL': 300}
+    defaults.update(getattr(settings, 'INSTANCE_CACHE', {}))
+    return defaults
+
+
+class LRUCache:
+    """
+    Thread safe in-process LRU cache with a time to live on every entry.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get the value for the key, None if missing or expired.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Set the value for the key, evicting the least recently used entry if full.
+        """
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Delete the key if present.
+        """
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        """
+        Delete every entry.
+        """
+        with self.lock:
+            self.entries.clear()
+
+
+_conf = get_cache_settings()
+_local = LRUCache(_conf['LOCAL_SIZE'], _conf['LOCAL_TTL'])
+
+
+def _cache_key(hash):
+    """
+    Get the shared cache key for the instance hash.
+    """
+    return f'instance:meta:{hash}'
+
+
+def get_instance_meta(hash):
+    """
+    Get the metadata of the instance by the hash, raise Instance.DoesNotExist if missing.
+    """
+    meta = _local.get(hash)
+    if meta is not None:
+        return meta
+
+    cached = cache.get(_cache_key(hash))
+    if cached is not None:
+        meta = InstanceMeta(*cached)
+    else:
+        row = Instance.objects.filter(hash=hash).values_list(
+            'id', 'hash', 'user_id', 'instance_auth_type', 'instance_status', 'instance_password_policy',
+            'last_modified').first()
+        if row is None:
+            raise Instance.DoesNotExist("Instance matching query does not exist.")
+        meta = InstanceMeta(*row[:-1], version=int(row[-1].timestamp() * 1000000))
+        cache.set(_cache_key(hash), tuple(meta), get_cache_settings()['TTL'])
+
+    _local.set(hash, meta)
+    return meta
+
+
+def invalidate_instance_meta(hash):
+    """
+    Drop the cached metadata of the instance, from this process and from the shared cache.
+    """
+    _local.delete(hash)
+    cache.delete(_cache_key(hash))
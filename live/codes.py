@@ -0,0 +1,93 @@
+"""
+Brief: Django codes.py file.
+
+Description: This file contains the generation and redemption helpers for the
+single-use voter codes of the Django live app.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import hmac
+import hashlib
+import secrets
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+from .models import VoterCode
+
+# Unambiguous alphabet (no 0/O, 1/I/L), 12 characters give 60 bits of entropy
+CODE_ALPHABET = 'ABCDEFGHJKMNPQRSTUVWXYZ23456789'
+CODE_LENGTH = 12
+CODE_GROUP = 4
+
+# Attempts of a batch before giving up, a digest collision is very unlikely to repeat
+MAX_BATCH_ATTEMPTS = 3
+
+
+def normalize_code(code):
+    """
+    Normalize a voter code as typed by a voter (case, separators and whitespace).
+    """
+    return ''.join(str(code).split()).replace('-', '').upper()
+
+
+def format_code(code):
+    """
+    Format a normalized voter code in dash separated groups.
+    """
+    return '-'.join(code[i:i + CODE_GROUP] for i in range(0, len(code), CODE_GROUP))
+
+
+def digest_code(instance_hash, code):
+    """
+    Get the keyed digest stored for a voter code of the given instance.
+    """
+    message = f'{instance_hash}:{normalize_code(code)}'.encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def generate_voter_codes(instance, count, batch_size=10000):
+    """
+    Generate and store voter codes for the instance in batches, yielding the plain codes.
+
+    Every batch is inserted with a single bulk insert, a batch hitting a digest
+    collision is regenerated so every yielded code is stored. A batch failing
+    MAX_BATCH_ATTEMPTS times is not a collision (a deleted instance for instance),
+    the IntegrityError is raised.
+    """
+    remaining = count
+    attempts = 0
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        codes = [''.join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH)) for _ in range(size)]
+        try:
+            with transaction.atomic():
+                VoterCode.objects.bulk_create(
+                    [VoterCode(instance=instance, digest=digest_code(instance.hash, code)) for code in codes],
+                    batch_size=size)
+        except IntegrityError:
+            attempts += 1
+            if attempts >= MAX_BATCH_ATTEMPTS:
+                raise
+            continue
+        attempts = 0
+        remaining -= size
+        for code in codes:
+            yield format_code(code)
+
+
+def is_voter_code_valid(instance, code):
+    """
+    Check if the voter code exists for the instance and is still unused.
+    """
+    return VoterCode.objects.filter(
+        digest=digest_code(instance.hash, code), instance_id=instance.id, used_at__isnull=True).exists()
+
+
+def redeem_voter_code(instance, code):
+    """
+    Redeem the voter code with a single conditional update, return False if invalid or already used.
+    """
+    return VoterCode.objects.filter(
+        digest=digest_code(instance.hash, code), instance_id=instance.id, used_at__isnull=True
+    ).update(used_at=timezone.now()) == 1
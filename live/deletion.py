@@ -0,0 +1,59 @@
+"""
+Brief: Django deletion.py file.
+
+Description: This file contains the instance deletion helpers of the Django live app.
+Instances are tombstoned first (hidden from every endpoint) and their rows are then
+purged with the bulk deletion engine, in a background thread or by the
+purge_deleted_instances command.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import logging
+import threading
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from core.deletion import delete_cascade
+from .models import Instance
+from .cache import invalidate_instance_meta
+
+logger = logging.getLogger(__name__)
+
+
+def purge_instance(instance_id, chunk_size=None, sleep=0):
+    """
+    Delete the instance and everything depending on it with chunked DELETE statements.
+    """
+    chunk_size = chunk_size or getattr(settings, 'INSTANCE_PURGE_CHUNK_SIZE', 1000)
+    hash = Instance.all_objects.filter(pk=instance_id).values_list('hash', flat=True).first()
+    deleted = delete_cascade(Instance, {'pk': instance_id}, chunk_size=chunk_size, sleep=sleep)
+    if hash:
+        invalidate_instance_meta(hash)
+    return deleted
+
+
+def _purge_in_thread(instance_id):
+    """
+    Purge the instance from a background thread, closing the thread's database connections.
+    """
+    try:
+        purge_instance(instance_id)
+    except Exception:
+        logger.exception('Background purge of instance %s failed, run purge_deleted_instances.', instance_id)
+    finally:
+        connections.close_all()
+
+
+def delete_instance(instance):
+    """
+    Delete the instance, either synchronously or by tombstoning it and purging it in the background.
+    """
+    if not getattr(settings, 'INSTANCE_DELETE_IN_BACKGROUND', True):
+        return purge_instance(instance.pk)
+
+    instance.deleted_at = timezone.now()
+    instance.save(update_fields=['deleted_at'])
+    instance_id = instance.pk
+    transaction.on_commit(
+        lambda: threading.Thread(target=_purge_in_thread, args=(instance_id,), daemon=True).start())
@@ -0,0 +1,66 @@
+"""
+Brief: Django hashers.py file.
+
+Description: This file contains the password hashers and the per-instance hashing
+policies used for the SocialUser (voter) credentials of the Django live app.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, ScryptPasswordHasher
+from django.contrib.auth.hashers import make_password, check_password
+
+
+PASSWORD_POLICY_DEFAULT = 0x1 << 0
+PASSWORD_POLICY_FAST_PBKDF2 = 0x1 << 1
+PASSWORD_POLICY_FAST_SCRYPT = 0x1 << 2
+
+
+class VoterPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher with a reduced iteration count for single-use voter credentials.
+    """
+    algorithm = 'voter_pbkdf2_sha256'
+    iterations = getattr(settings, 'VOTER_PBKDF2_ITERATIONS', 10000)
+
+
+class VoterScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Scrypt hasher with a small work factor (~2 MiB of memory per hash) for single-use voter credentials.
+    """
+    algorithm = 'voter_scrypt'
+    work_factor = getattr(settings, 'VOTER_SCRYPT_WORK_FACTOR', 2 ** 11)
+
+
+POLICY_HASHERS = {
+    PASSWORD_POLICY_DEFAULT: 'default',
+    PASSWORD_POLICY_FAST_PBKDF2: VoterPBKDF2PasswordHasher.algorithm,
+    PASSWORD_POLICY_FAST_SCRYPT: VoterScryptPasswordHasher.algorithm,
+}
+
+
+def get_policy_hasher(policy):
+    """
+    Get the hasher algorithm name for the given instance password policy.
+    """
+    return POLICY_HASHERS.get(policy, 'default')
+
+
+def make_voter_password(password, instance):
+    """
+    Hash a voter password with the hasher selected by the instance password policy.
+    """
+    return make_password(password, hasher=get_policy_hasher(instance.instance_password_policy))
+
+
+def check_voter_password(password, social_user, instance):
+    """
+    Check a voter password and transparently rehash it when the instance policy has changed.
+    """
+    def setter(raw_password):
+        social_user.password = make_voter_password(raw_password, instance)
+        social_user.save(update_fields=['password'])
+
+    return check_password(password, social_user.password, setter,
+                          preferred=get_policy_hasher(instance.instance_password_policy))
@@ -0,0 +1,199 @@
+"""
+Brief: Django invitations.py file.
+
+Description: This file contains the voter invitation pipeline of the Django live app.
+The listed social users of an instance are walked in keyset batches, each voter
+gets an invitation email rendered from the live/invitation.txt template with a
+pre-signed access link, the batch is sent over one pooled connection of
+OUTBOX_EMAIL_BACKEND and its delivery state is upserted with a single statement.
+A run holds a per-instance lock in the cache, so concurrent runs of an instance
+never invite a voter twice.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import datetime
+import logging
+import threading
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections
+from django.db.models import Count
+from django.template.loader import get_template
+from django.utils import timezone
+from .models import SocialUser, VoterInvitation
+from .token.jwt import TokenStrategy
+
+logger = logging.getLogger(__name__)
+
+INVITATION_STATUS_SENT = 0x1 << 0
+INVITATION_STATUS_FAILED = 0x1 << 1
+
+USER_SOCIAL_TYPE_USER_LIST = 0x1 << 1
+
+# Seconds the sending lock of an instance is held at most (released at the end of the run)
+INVITATION_LOCK_TIMEOUT = 6 * 3600
+
+
+def get_site_url():
+    """
+    Get the base URL of the front end: DOMAIN, prefixed with PROTOCOL (as in the Djoser emails)
+    unless it already holds a scheme.
+    """
+    domain = settings.DOMAIN.rstrip('/')
+    if '://' in domain:
+        return domain
+    return f"{getattr(settings, 'PROTOCOL', '') or 'http'}://{domain}"
+
+
+def lock_invitations(instance):
+    """
+    Take the sending lock of the instance, return False if a run is already sending its invitations.
+    """
+    return cache.add(f'invitations:sending:{instance.id}', True, INVITATION_LOCK_TIMEOUT)
+
+
+def unlock_invitations(instance):
+    """
+    Release the sending lock of the instance.
+    """
+    cache.delete(f'invitations:sending:{instance.id}')
+
+
+def get_invitation_queryset(instance, resend=False):
+    """
+    Get the listed social users of the instance having an email address to invite.
+    """
+    queryset = SocialUser.objects.filter(
+        instance_id=instance.id, user_social_type=USER_SOCIAL_TYPE_USER_LIST).exclude(email='')
+    if not resend:
+        queryset = queryset.exclude(invitation__status=INVITATION_STATUS_SENT)
+    return queryset
+
+
+def build_invitation(template, subject, social_user, instance, lifetime):
+    """
+    Render the invitation email of a social user.
+    """
+    token = TokenStrategy.obtain(social_user, lifetime)['access']
+    url = getattr(settings, 'VOTER_INVITATION_URL', 'vote/{hash}/?token={token}').format(
+        hash=instance.hash, token=token)
+    context = {
+        'first_name': social_user.first_name,
+        'last_name': social_user.last_name,
+        'username': social_user.username,
+        'instance_name': instance.name,
+        'site_name': getattr(settings, 'SITE_NAME', ''),
+        'url': f"{get_site_url()}/{url}",
+        'expires_at': timezone.now() + lifetime,
+    }
+    return EmailMessage(subject, template.render(context), to=[social_user.email])
+
+
+def save_delivery_state(invitations):
+    """
+    Upsert the delivery state of a batch of invitations with a single statement.
+    """
+    kwargs = {}
+    if connections[VoterInvitation.objects.db].features.supports_update_conflicts_with_target:
+        kwargs['unique_fields'] = ['social_user']
+    VoterInvitation.objects.bulk_create(
+        invitations, update_conflicts=True, update_fields=['status', 'sent_at', 'last_error', 'updated_at'],
+        **kwargs)
+
+
+def send_invitations(instance, batch_size=500, resend=False, backend=None):
+    """
+    Send the invitation emails of the instance, return the number of sent and failed invitations.
+
+    Details: Voters already invited successfully are skipped unless resend is set,
+    so an interrupted run can simply be started again. The delivery state is saved
+    before the connection is reopened after a failure, so the voters invited so far
+    are not invited again if the reopening fails. The caller holds the sending lock
+    of the instance.
+    """
+    lifetime = datetime.timedelta(days=getattr(settings, 'VOTER_INVITATION_TOKEN_DAYS', 7))
+    template = get_template('live/invitation.txt')
+    subject = get_template('live/invitation_subject.txt').render({'instance_name': instance.name}).strip()
+    queryset = get_invitation_queryset(instance, resend).only(
+        'id', 'username', 'first_name', 'last_name', 'email').order_by('id')
+
+    totals = Counter()
+    last_id = 0
+    connection = get_connection(backend or settings.OUTBOX_EMAIL_BACKEND, fail_silently=False)
+    connection.open()
+    try:
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            invitations = []
+            for social_user in batch:
+                message = build_invitation(template, subject, social_user, instance, lifetime)
+                message.connection = connection
+                invitation = VoterInvitation(social_user_id=social_user.id, instance_id=instance.id,
+                                             updated_at=timezone.now())
+                try:
+                    message.send()
+                except Exception as e:
+                    invitation.status = INVITATION_STATUS_FAILED
+                    invitation.last_error = f'{type(e).__name__}: {e}'
+                    totals['failed'] += 1
+                else:
+                    invitation.status = INVITATION_STATUS_SENT
+                    invitation.sent_at = invitation.updated_at
+                    totals['sent'] += 1
+                invitations.append(invitation)
+                if invitation.status == INVITATION_STATUS_FAILED:
+                    # The connection may be broken, continue on a fresh one once the state is saved
+                    save_delivery_state(invitations)
+                    invitations = []
+                    connection.close()
+                    connection.open()
+            if invitations:
+                save_delivery_state(invitations)
+    finally:
+        connection.close()
+    return totals
+
+
+def _send_in_thread(instance, resend):
+    """
+    Send the invitations from a background thread, then release the sending lock and close the
+    thread's database connections.
+    """
+    try:
+        send_invitations(instance, resend=resend)
+    except Exception:
+        logger.exception('Sending the invitations of instance %s failed, run send_invitations.', instance.id)
+    finally:
+        unlock_invitations(instance)
+        connections.close_all()
+
+
+def send_invitations_in_background(instance, resend=False):
+    """
+    Start sending the invitations of the instance in a background thread, return False if they
+    are already being sent.
+    """
+    if not lock_invitations(instance):
+        return False
+    threading.Thread(target=_send_in_thread, args=(instance, resend), daemon=True).start()
+    return True
+
+
+def get_invitation_counts(instance):
+    """
+    Get the number of invitable, sent and failed invitations of the instance.
+    """
+    counts = dict(VoterInvitation.objects.filter(instance_id=instance.id).values('status')
+                  .annotate(count=Count('pk')).order_by().values_list('status', 'count'))
+    return {
+        'invitable': get_invitation_queryset(instance, resend=True).count(),
+        'sent': counts.get(INVITATION_STATUS_SENT, 0),
+        'failed': counts.get(INVITATION_STATUS_FAILED, 0),
+    }
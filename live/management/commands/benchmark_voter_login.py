@@ -0,0 +1,48 @@
+"""
+Brief: Django benchmark_voter_login management command.
+
+Description: This command measures the voter login throughput (logins/sec) of the
+password check under each instance password policy.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from live.models import Instance, SocialUser, PASSWORD_POLICY_CHOICES
+from live.hashers import make_voter_password, check_voter_password
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the voter password check for every instance password policy.
+    """
+    help = 'Benchmark voter logins/sec under each instance password policy.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--duration', type=float, default=2.0,
+                            help='Seconds to spend on each policy.')
+        parser.add_argument('--password', default='voter-code-1234',
+                            help='Password used for the benchmark.')
+
+    def handle(self, *args, **options):
+        """
+        Run the benchmark, no database access is required.
+        """
+        duration = options['duration']
+        password = options['password']
+        for policy, label in PASSWORD_POLICY_CHOICES:
+            instance = Instance(instance_password_policy=policy)
+            social_user = SocialUser(instance=instance, password=make_voter_password(password, instance))
+            logins = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < duration:
+                if not check_voter_password(password, social_user, instance):
+                    raise AssertionError('Password check failed for policy %s' % label)
+                logins += 1
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{label:<12} {logins / elapsed:>10.1f} logins/sec/core "
+                              f"({social_user.password.split('$', 1)[0]})")
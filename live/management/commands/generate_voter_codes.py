@@ -0,0 +1,49 @@
+"""
+Brief: Django generate_voter_codes management command.
+
+Description: This command bulk generates single-use voter codes for an instance
+and writes the plain codes to a file (or stdout), one per line.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from live.models import Instance
+from live.codes import generate_voter_codes
+
+
+class Command(BaseCommand):
+    """
+    Generate voter codes for an instance.
+    """
+    help = 'Bulk generate single-use voter codes for an instance.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('hash', help='Hash of the instance.')
+        parser.add_argument('count', type=int, help='Number of codes to generate.')
+        parser.add_argument('--output', help='File to write the codes to, defaults to stdout.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Codes inserted per statement.')
+
+    def handle(self, *args, **options):
+        """
+        Generate the codes and stream them to the output.
+        """
+        try:
+            instance = Instance.getExistingInstance(options['hash'])
+        except Instance.DoesNotExist:
+            raise CommandError('Instance with the provided hash does not exist.')
+        if options['count'] < 1:
+            raise CommandError('Count must be positive.')
+
+        output = open(options['output'], 'w') if options['output'] else sys.stdout
+        try:
+            for code in generate_voter_codes(instance, options['count'], options['batch_size']):
+                output.write(code + '\n')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(f"Generated {options['count']} voter codes for instance {instance.hash}.")
@@ -0,0 +1,36 @@
+"""
+Brief: Django purge_deleted_instances management command.
+
+Description: This command purges the rows of the tombstoned (deleted) instances,
+resuming the background purges interrupted by a restart.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.core.management.base import BaseCommand
+from live.models import Instance
+from live.deletion import purge_instance
+
+
+class Command(BaseCommand):
+    """
+    Purge the tombstoned instances.
+    """
+    help = 'Purge the rows of the deleted (tombstoned) instances in chunks.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows deleted per statement.')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to sleep between statements.')
+
+    def handle(self, *args, **options):
+        """
+        Purge every tombstoned instance.
+        """
+        instance_ids = Instance.all_objects.filter(deleted_at__isnull=False).values_list('pk', flat=True)
+        for instance_id in list(instance_ids):
+            deleted = purge_instance(instance_id, options['chunk_size'], options['sleep'])
+            summary = ', '.join(f'{label}: {count}' for label, count in sorted(deleted.items()))
+            self.stdout.write(f'Purged instance {instance_id} ({summary})')
@@ -0,0 +1,39 @@
+"""
+Brief: Django reconcile_instance_stats management command.
+
+Description: This command recomputes the per-instance statistics from the base
+tables (responses and social users) in chunked passes, for every instance or the
+given ones. It creates the stats of the instances which have none yet.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.core.management.base import BaseCommand
+from live.models import Instance
+from live.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    """
+    Recompute the instance statistics.
+    """
+    help = 'Recompute the per-instance statistics from the base tables.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('hashes', nargs='*', help='Hashes of the instances, every instance by default.')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Rows read per query.')
+
+    def handle(self, *args, **options):
+        """
+        Reconcile the stats of the selected instances.
+        """
+        instances = Instance.objects.all()
+        if options['hashes']:
+            instances = instances.filter(hash__in=options['hashes'])
+        for instance_id, hash in instances.values_list('id', 'hash').iterator():
+            stats = reconcile_stats(instance_id, options['chunk_size'])
+            self.stdout.write(f'Instance {hash}: {stats.total_responses} responses, '
+                              f'{stats.voted_count}/{stats.roster_size} voted')
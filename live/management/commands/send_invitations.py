@@ -0,0 +1,44 @@
+"""
+Brief: Django send_invitations management command.
+
+Description: This command sends the invitation emails of the listed social users
+of an instance, skipping the voters already invited unless --resend is given.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from live.models import Instance
+from live.invitations import send_invitations, lock_invitations, unlock_invitations
+
+
+class Command(BaseCommand):
+    """
+    Send the voter invitations of an instance.
+    """
+    help = 'Send the invitation emails of the listed social users of an instance.'
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        """
+        parser.add_argument('hash', help='Hash of the instance.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Voters rendered and recorded per batch.')
+        parser.add_argument('--resend', action='store_true', help='Also send to the voters already invited.')
+        parser.add_argument('--backend', help='Email backend used for the delivery, defaults to OUTBOX_EMAIL_BACKEND.')
+
+    def handle(self, *args, **options):
+        """
+        Send the invitations and report the number of sent and failed emails.
+        """
+        try:
+            instance = Instance.objects.get(hash=options['hash'])
+        except Instance.DoesNotExist:
+            raise CommandError('Instance with the provided hash does not exist.')
+        if not lock_invitations(instance):
+            raise CommandError('The invitations of the instance are already being sent.')
+        try:
+            totals = send_invitations(instance, options['batch_size'], options['resend'], options['backend'])
+        finally:
+            unlock_invitations(instance)
+        self.stdout.write(f"Sent {totals['sent']} invitations, {totals['failed']} failed.")
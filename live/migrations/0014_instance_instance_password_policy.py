@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("live", "0013_alter_socialuser_username_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="instance",
+            name="instance_password_policy",
+            field=models.IntegerField(
+                choices=[(1, "Default"), (2, "Fast PBKDF2"), (4, "Fast Scrypt")],
+                default=1,
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("live", "0014_instance_instance_password_policy"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="instance",
+            name="instance_auth_type",
+            field=models.IntegerField(
+                choices=[
+                    (1, "Open to All"),
+                    (2, "Open within Ogranization"),
+                    (4, "Open to Specific Users"),
+                    (8, "Open to Voter Code Holders"),
+                ],
+                default=1,
+            ),
+        ),
+        migrations.CreateModel(
+            name="VoterCode",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "digest",
+                    models.CharField(editable=False, max_length=64, unique=True),
+                ),
+                ("used_at", models.DateTimeField(blank=True, default=None, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "instance",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="voter_codes",
+                        to="live.instance",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("live", "0015_alter_instance_instance_auth_type_votercode"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="instance",
+            name="deleted_at",
+            field=models.DateTimeField(
+                blank=True, default=None, editable=False, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("live", "0016_instance_deleted_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="instance",
+            name="retention_days",
+            field=models.PositiveIntegerField(blank=True, default=None, null=True),
+        ),
+    ]
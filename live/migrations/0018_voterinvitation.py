@@ -0,0 +1,52 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("live", "0017_instance_retention_days"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="socialuser",
+            name="email",
+            field=models.EmailField(blank=True, default="", max_length=254),
+        ),
+        migrations.CreateModel(
+            name="VoterInvitation",
+            fields=[
+                (
+                    "social_user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="invitation",
+                        serialize=False,
+                        to="live.socialuser",
+                    ),
+                ),
+                ("status", models.IntegerField(choices=[(1, "Sent"), (2, "Failed")])),
+                ("sent_at", models.DateTimeField(blank=True, default=None, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "instance",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="invitations",
+                        to="live.instance",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["instance", "status"], name="invitation_instance_status"
+                    )
+                ],
+            },
+        ),
+    ]
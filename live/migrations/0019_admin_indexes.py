@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("live", "0018_voterinvitation"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="socialuser",
+            index=models.Index(fields=["username"], name="socialuser_username"),
+        ),
+        migrations.AddIndex(
+            model_name="socialuser",
+            index=models.Index(fields=["has_voted"], name="socialuser_has_voted"),
+        ),
+        migrations.AddIndex(
+            model_name="socialuser",
+            index=models.Index(fields=["created_at"], name="socialuser_created_at"),
+        ),
+    ]
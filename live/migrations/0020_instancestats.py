@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("live", "0019_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InstanceStats",
+            fields=[
+                (
+                    "instance",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="live.instance",
+                    ),
+                ),
+                ("total_responses", models.IntegerField(default=0)),
+                ("roster_size", models.IntegerField(default=0)),
+                ("voted_count", models.IntegerField(default=0)),
+                (
+                    "first_response_at",
+                    models.DateTimeField(blank=True, default=None, null=True),
+                ),
+                (
+                    "last_response_at",
+                    models.DateTimeField(blank=True, default=None, null=True),
+                ),
+                (
+                    "reconciled_at",
+                    models.DateTimeField(blank=True, default=None, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:05
+
+from django.db import migrations
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+
+def fill_instance_stats(apps, schema_editor):
+    Instance = apps.get_model("live", "Instance")
+    InstanceStats = apps.get_model("live", "InstanceStats")
+    SocialUser = apps.get_model("live", "SocialUser")
+    Response = apps.get_model("data", "Response")
+    responses = {
+        row["instance_id"]: row
+        for row in Response.objects.values("instance_id").annotate(
+            total=Count("id"), first=Min("submitted_at"), last=Max("submitted_at")
+        )
+    }
+    roster = {
+        row["instance_id"]: row
+        for row in SocialUser.objects.values("instance_id").annotate(
+            size=Count("id"), voted=Count("id", filter=Q(has_voted=True))
+        )
+    }
+    existing = set(InstanceStats.objects.values_list("instance_id", flat=True))
+    now = timezone.now()
+    stats = []
+    for instance_id in Instance._base_manager.values_list("id", flat=True).iterator():
+        if instance_id in existing:
+            continue
+        response_row = responses.get(instance_id, {})
+        roster_row = roster.get(instance_id, {})
+        stats.append(
+            InstanceStats(
+                instance_id=instance_id,
+                total_responses=response_row.get("total", 0),
+                roster_size=roster_row.get("size", 0),
+                voted_count=roster_row.get("voted", 0),
+                first_response_at=response_row.get("first"),
+                last_response_at=response_row.get("last"),
+                reconciled_at=now,
+            )
+        )
+    InstanceStats.objects.bulk_create(stats, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("live", "0020_instancestats"),
+        ("data", "0009_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_instance_stats, migrations.RunPython.noop),
+    ]
@@ -9,6 +9,7 @@ Author: Divij Sharma <divijs75@gmail.com>
 import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
+from .hashers import make_voter_password, check_voter_password
 
 User = get_user_model()
 
@@ -17,6 +18,7 @@ TYPE_CHOICES = (
         (0x1 << 0, 'Open to All'),
         (0x1 << 1, 'Open within Ogranization'),
         (0x1 << 2, 'Open to Specific Users'),
+        (0x1 << 3, 'Open to Voter Code Holders'),
     )
 
 STATUS_CHOICES = (
@@ -29,6 +31,28 @@ SOCIAL_TYPE_CHOICES = (
         (0x1 << 1, 'User List'),
     )
 
+INVITATION_STATUS_CHOICES = (
+        (0x1 << 0, 'Sent'),
+        (0x1 << 1, 'Failed'),
+    )
+
+PASSWORD_POLICY_CHOICES = (
+        (0x1 << 0, 'Default'),
+        (0x1 << 1, 'Fast PBKDF2'),
+        (0x1 << 2, 'Fast Scrypt'),
+    )
+
+
+class InstanceManager(models.Manager):
+    """
+    Default manager of the Instance model, hiding the instances pending deletion.
+    """
+    def get_queryset(self):
+        """
+        Exclude the tombstoned instances.
+        """
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
 class Instance(models.Model):
     """
@@ -43,6 +67,9 @@ class Instance(models.Model):
     - created_at: Timestamp of the instance creation.
     - last_modified: Timestamp of the last modification of the instance.
     - hash: Unique hash for the instance object.
+    - instance_password_policy: Hasher policy for the social user passwords, defaults to the project hasher.
+    - deleted_at: Tombstone set when the instance is deleted, the rows are purged in the background.
+    - retention_days: Days the responses are kept for, null to keep them forever.
     """
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -53,6 +80,12 @@ class Instance(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     last_modified = models.DateTimeField(auto_now=True)
     hash = models.CharField(max_length=16, unique=True, editable=False)
+    instance_password_policy = models.IntegerField(choices=PASSWORD_POLICY_CHOICES, default=0x1 << 0)
+    deleted_at = models.DateTimeField(null=True, blank=True, default=None, editable=False)
+    retention_days = models.PositiveIntegerField(null=True, blank=True, default=None)
+
+    objects = InstanceManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         """
@@ -81,6 +114,59 @@ class Instance(models.Model):
         return Instance.objects.get(hash=hash)
 
 
+class InstanceStats(models.Model):
+    """
+    Model for the InstanceStats object.
+
+    Details: Counters of an instance maintained incrementally (with F() updates)
+    on every submission and roster change, so the owner dashboards never count
+    the base tables. The row is created with the instance (the migration 0021
+    computes the rows of the existing instances) and the reconcile_instance_stats
+    command recomputes them from the base tables after bulk operations.
+
+    Fields:
+    - instance: Instance object (primary key).
+    - total_responses: Number of responses.
+    - roster_size: Number of social users.
+    - voted_count: Number of social users who have voted.
+    - first_response_at: Timestamp of the first response.
+    - last_response_at: Timestamp of the last response.
+    - reconciled_at: Timestamp of the last recomputation from the base tables.
+    """
+    instance = models.OneToOneField(Instance, primary_key=True, related_name='stats', on_delete=models.CASCADE)
+    total_responses = models.IntegerField(default=0)
+    roster_size = models.IntegerField(default=0)
+    voted_count = models.IntegerField(default=0)
+    first_response_at = models.DateTimeField(null=True, blank=True, default=None)
+    last_response_at = models.DateTimeField(null=True, blank=True, default=None)
+    reconciled_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    def __str__(self):
+        """
+        Return the id of the instance of the stats object.
+        """
+        return str(self.instance_id)
+
+    @property
+    def turnout(self):
+        """
+        Get the share of the roster who has voted, None without a roster.
+        """
+        if not self.roster_size:
+            return None
+        return self.voted_count / self.roster_size
+
+    @property
+    def responses_per_hour(self):
+        """
+        Get the average number of responses per hour since the first response.
+        """
+        if not self.first_response_at:
+            return None
+        hours = (self.last_response_at - self.first_response_at).total_seconds() / 3600
+        return self.total_responses / max(hours, 1)
+
+
 class SocialUser(models.Model):
     """
     Model for the SocialUser object.
@@ -91,6 +177,7 @@ class SocialUser(models.Model):
     - first_name: First name of the social user.
     - last_name: Last name of the social user.
     - username: Username of the social user, required.
+    - email: Email address the invitation is sent to, optional.
     - password: Password of the social user, required.
     - has_voted: Flag indicating if the user has voted, defaults to False.
     - created_at: Timestamp of the social user creation.
@@ -100,6 +187,7 @@ class SocialUser(models.Model):
     first_name = models.CharField(max_length=30)
     last_name = models.CharField(max_length=30)
     username = models.CharField(max_length=100, blank=False, null=False, default='')
+    email = models.EmailField(blank=True, default='')
     password = models.CharField(max_length=128, blank=False, null=False)
     has_voted = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -108,6 +196,11 @@ class SocialUser(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['instance', 'username'], name='unique_instance_username')
         ]
+        indexes = [
+            models.Index(fields=['username'], name='socialuser_username'),
+            models.Index(fields=['has_voted'], name='socialuser_has_voted'),
+            models.Index(fields=['created_at'], name='socialuser_created_at'),
+        ]
 
     def __str__(self):
         """
@@ -120,3 +213,76 @@ class SocialUser(models.Model):
         Save the social user object.
         """
         super().save(*args, **kwargs)
+
+    def set_password(self, raw_password):
+        """
+        Hash and set the password using the password policy of the instance.
+        """
+        self.password = make_voter_password(raw_password, self.instance)
+
+    def check_password(self, raw_password):
+        """
+        Check the password, rehashing it if the instance password policy has changed.
+        """
+        return check_voter_password(raw_password, self, self.instance)
+
+
+class VoterCode(models.Model):
+    """
+    Model for the VoterCode object.
+
+    Details: A single-use access code for instances open to voter code holders.
+    Only a keyed digest of the code is stored, the plain code is handed out once
+    when generated.
+
+    Fields:
+    - instance: Instance object, required.
+    - digest: Fixed width keyed digest (HMAC-SHA256 hex) of the code, unique.
+    - used_at: Timestamp of the redemption of the code, null while unused.
+    - created_at: Timestamp of the voter code creation.
+    """
+    instance = models.ForeignKey(Instance, related_name='voter_codes', on_delete=models.CASCADE)
+    digest = models.CharField(max_length=64, unique=True, editable=False)
+    used_at = models.DateTimeField(null=True, blank=True, default=None)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """
+        Return the digest prefix of the voter code object.
+        """
+        return self.digest[:12]
+
+
+class VoterInvitation(models.Model):
+    """
+    Model for the VoterInvitation object.
+
+    Details: Delivery state of the invitation email of a listed social user, one
+    row per voter, upserted by the invitation pipeline after every batch.
+
+    Fields:
+    - social_user: SocialUser object (primary key).
+    - instance: Instance object, required.
+    - status: Delivery status of the last attempt.
+    - sent_at: Timestamp of the last successful delivery.
+    - last_error: Error of the last failed delivery.
+    - updated_at: Timestamp of the last delivery attempt.
+    """
+    social_user = models.OneToOneField(SocialUser, primary_key=True, related_name='invitation',
+                                       on_delete=models.CASCADE)
+    instance = models.ForeignKey(Instance, related_name='invitations', on_delete=models.CASCADE)
+    status = models.IntegerField(choices=INVITATION_STATUS_CHOICES)
+    sent_at = models.DateTimeField(null=True, blank=True, default=None)
+    last_error = models.TextField(blank=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['instance', 'status'], name='invitation_instance_status'),
+        ]
+
+    def __str__(self):
+        """
+        Return the username of the invited social user.
+        """
+        return str(self.social_user_id)
@@ -0,0 +1,31 @@
+"""
+Brief: Django records.py file.
+
+Description: This file contains the records for the Django live app, producing
+the same output as the SocialUserSerializer.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from core.records import Record, format_datetime
+
+
+class SocialUserRecord(Record):
+    """
+    Record of a SocialUser, same output as the SocialUserSerializer.
+    """
+    __slots__ = ('instance', 'user_social_type', 'first_name', 'last_name', 'email', 'username', 'has_voted',
+                 'created_at')
+
+
+def social_user_records(queryset):
+    """
+    Get the social user records for the SocialUser queryset, in one query.
+    """
+    return [
+        SocialUserRecord(instance, user_social_type, first_name, last_name, email, username, has_voted,
+                         format_datetime(created_at))
+        for instance, user_social_type, first_name, last_name, email, username, has_voted, created_at
+        in queryset.values_list('instance__hash', 'user_social_type', 'first_name', 'last_name', 'email',
+                                'username', 'has_voted', 'created_at').iterator(chunk_size=5000)
+    ]
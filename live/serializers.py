@@ -10,20 +10,43 @@ from rest_framework import serializers
 from social_core import exceptions
 from social_django.utils import load_backend, load_strategy
 from django.contrib.auth.hashers import make_password
-from .models import Instance, SocialUser
+from .models import Instance, InstanceStats, SocialUser
+from .hashers import make_voter_password
 from .token import jwt
 
 
+class InstanceStatsSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the InstanceStats object.
+    """
+    class Meta:
+        model = InstanceStats
+        fields = ['total_responses', 'roster_size', 'voted_count', 'turnout', 'responses_per_hour',
+                  'first_response_at', 'last_response_at']
+        read_only_fields = fields
+
+
 class InstanceSerializer(serializers.ModelSerializer):
     """
     Serializer for the Instance object.
     """
+    stats = serializers.SerializerMethodField()
+
     class Meta:
         model = Instance
         fields = ['user', 'instance_auth_type', 'name', 'description', 'instance_status',
-                  'created_at', 'last_modified', 'hash']
+                  'instance_password_policy', 'retention_days', 'created_at', 'last_modified', 'hash', 'stats']
         read_only_fields = ['hash', 'created_at', 'last_modified', 'user']
 
+    def get_stats(self, instance):
+        """
+        Get the stats counters of the instance, None until they have been computed.
+        """
+        try:
+            return InstanceStatsSerializer(instance.stats).data
+        except InstanceStats.DoesNotExist:
+            return None
+
     def create(self, validated_data):
         """
         Create the instance object with the user field set to the current user.
@@ -38,7 +61,7 @@ class SocialUserSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = SocialUser
-        fields = ['instance', 'user_social_type', 'first_name', 'last_name',
+        fields = ['instance', 'user_social_type', 'first_name', 'last_name', 'email',
                   'username', 'password', 'has_voted', 'created_at']
         read_only_fields = ['created_at', 'user_social_type', 'username']
 
@@ -55,7 +78,7 @@ class SocialUserSerializer(serializers.ModelSerializer):
         """
         Overriding the create method to hash the password before saving.
         """
-        validated_data['password'] = make_password(validated_data['password'])
+        validated_data['password'] = make_voter_password(validated_data['password'], validated_data['instance'])
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
@@ -63,7 +86,7 @@ class SocialUserSerializer(serializers.ModelSerializer):
         Overriding the update method to hash the password if it's updated.
         """
         if 'password' in validated_data:
-            validated_data['password'] = make_password(validated_data['password'])
+            validated_data['password'] = make_voter_password(validated_data['password'], instance.instance)
         return super().update(instance, validated_data)
 
 
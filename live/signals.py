@@ -0,0 +1,72 @@
+"""
+Brief: Django signals.py file.
+
+Description: This file contains the signal receivers for the Django live app.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .models import Instance, InstanceStats, SocialUser
+from .cache import invalidate_instance_meta
+from .stats import update_stats
+
+
+@receiver(post_save, sender=Instance)
+@receiver(post_delete, sender=Instance)
+def instance_changed(sender, instance, **kwargs):
+    """
+    Invalidate the cached instance metadata when an instance is saved or deleted.
+
+    The entry is dropped again on commit, a concurrent request may have cached
+    the old row before the transaction was committed.
+    """
+    invalidate_instance_meta(instance.hash)
+    transaction.on_commit(lambda: invalidate_instance_meta(instance.hash))
+
+
+@receiver(post_save, sender=Instance)
+def instance_created(sender, instance, created, **kwargs):
+    """
+    Create the (empty) stats row of a new instance.
+    """
+    if created:
+        InstanceStats.objects.get_or_create(instance=instance)
+
+
+@receiver(post_init, sender=SocialUser)
+def social_user_loaded(sender, instance, **kwargs):
+    """
+    Remember the voted flag a social user was loaded (or created) with, unless deferred.
+    """
+    if 'has_voted' in instance.__dict__:
+        instance._stored_has_voted = instance.has_voted
+
+
+@receiver(post_save, sender=SocialUser)
+def social_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Count a new social user or a change of its voted flag in the instance stats once committed.
+    """
+    if created:
+        transaction.on_commit(partial(update_stats, instance.instance_id, roster_size=1,
+                                      voted_count=int(instance.has_voted)))
+    elif update_fields is None or 'has_voted' in update_fields:
+        stored_has_voted = instance.__dict__.get('_stored_has_voted')
+        if stored_has_voted is not None and stored_has_voted != instance.has_voted:
+            transaction.on_commit(partial(update_stats, instance.instance_id,
+                                          voted_count=1 if instance.has_voted else -1))
+    if 'has_voted' in instance.__dict__:
+        instance._stored_has_voted = instance.has_voted
+
+
+@receiver(post_delete, sender=SocialUser)
+def social_user_deleted(sender, instance, **kwargs):
+    """
+    Uncount a deleted social user from the instance stats once committed.
+    """
+    transaction.on_commit(partial(update_stats, instance.instance_id, roster_size=-1,
+                                  voted_count=-int(instance.has_voted)))
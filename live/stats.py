@@ -0,0 +1,109 @@
+"""
+Brief: Django stats.py file.
+
+Description: This file contains the maintenance of the per-instance statistics
+(InstanceStats) of the Django live app. The counters are moved with single F()
+UPDATE statements on submissions and roster changes (once their transaction is
+committed, so the stats row is never locked for the length of a submission), and
+recomputed from the base tables in chunked passes by reconcile_stats.
+
+Author: Divij Sharma <divijs75@gmail.com>
+"""
+
+from django.db.models import F, Min, Max
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from .models import InstanceStats, SocialUser
+
+
+def update_stats(instance_id, **deltas):
+    """
+    Add the deltas to the counters of the instance stats in one statement.
+
+    Details: Every instance has its stats row, created with the instance (and
+    computed for the instances created before the stats by a data migration).
+    """
+    values = {name: F(name) + delta for name, delta in deltas.items() if delta}
+    if values:
+        InstanceStats.objects.filter(instance_id=instance_id).update(**values)
+
+
+def record_response(instance_id, submitted_at):
+    """
+    Count a new response of the instance.
+    """
+    InstanceStats.objects.filter(instance_id=instance_id).update(
+        total_responses=F('total_responses') + 1,
+        first_response_at=Coalesce(F('first_response_at'), submitted_at),
+        last_response_at=Greatest(Coalesce(F('last_response_at'), submitted_at), submitted_at),
+    )
+
+
+def forget_response(instance_id):
+    """
+    Uncount a deleted response of the instance (the first/last timestamps are fixed by the reconciliation).
+    """
+    update_stats(instance_id, total_responses=-1)
+
+
+def refresh_response_bounds(instance_id, deleted_first, deleted_last):
+    """
+    Recompute the first/last response timestamps of the instance after the deletion of the
+    responses submitted between deleted_first and deleted_last, if they held one of them.
+    """
+    from data.models import Response
+
+    bounds = InstanceStats.objects.filter(instance_id=instance_id).values_list(
+        'first_response_at', 'last_response_at').first()
+    if bounds is None:
+        return
+    first_response_at, last_response_at = bounds
+    if (first_response_at is None or deleted_first > first_response_at) and \
+            (last_response_at is None or deleted_last < last_response_at):
+        return
+    bounds = Response.objects.filter(instance_id=instance_id).aggregate(first=Min('submitted_at'),
+                                                                        last=Max('submitted_at'))
+    InstanceStats.objects.filter(instance_id=instance_id).update(
+        first_response_at=bounds['first'], last_response_at=bounds['last'])
+
+
+def reconcile_stats(instance_id, chunk_size=10000):
+    """
+    Recompute the stats of the instance from the base tables, walking them in keyset chunks.
+    """
+    from data.models import Response
+
+    total_responses = 0
+    first_response_at = last_response_at = None
+    last_id = 0
+    while True:
+        rows = list(Response.objects.filter(instance_id=instance_id, id__gt=last_id)
+                    .order_by('id').values_list('id', 'submitted_at')[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        total_responses += len(rows)
+        submitted = [submitted_at for _, submitted_at in rows]
+        first_response_at = min([first_response_at, *submitted] if first_response_at else submitted)
+        last_response_at = max([last_response_at, *submitted] if last_response_at else submitted)
+
+    roster_size = voted_count = 0
+    last_id = 0
+    while True:
+        rows = list(SocialUser.objects.filter(instance_id=instance_id, id__gt=last_id)
+                    .order_by('id').values_list('id', 'has_voted')[:chunk_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        roster_size += len(rows)
+        voted_count += sum(1 for _, has_voted in rows if has_voted)
+
+    stats, _ = InstanceStats.objects.update_or_create(instance_id=instance_id, defaults={
+        'total_responses': total_responses,
+        'roster_size': roster_size,
+        'voted_count': voted_count,
+        'first_response_at': first_response_at,
+        'last_response_at': last_response_at,
+        'reconciled_at': timezone.now(),
+    })
+    return stats
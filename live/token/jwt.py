@@ -12,9 +12,9 @@ class TokenStrategy:
     Custom token strategy class for obtaining the token.
     """
     @classmethod
-    def obtain(cls, user):
+    def obtain(cls, user, lifetime=None):
         """
-        Obtain the token for the user.
+        Obtain the token for the user, valid for the lifetime (a timedelta, one day by default).
         """
         import jwt
         import datetime
@@ -22,7 +22,7 @@ class TokenStrategy:
         payload = {
             'social_user_id': user.id,
             'username': user.username,
-            'exp': datetime.datetime.now() + datetime.timedelta(days=1)
+            'exp': datetime.datetime.now() + (lifetime or datetime.timedelta(days=1))
         }
         token = jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
         return {"access": token, "user": user.username}
@@ -9,7 +9,7 @@ Author: Divij Sharma <divijs75@gmail.com>
 from django.urls import path, re_path
 from .views import InstanceListCreateView, InstanceRetrieveUpdateDestroyView, InstanceTypeStatusView
 from .views import InstanceCSVView, InstanceJSONView
-from .views import InstanceOrganizationView
+from .views import InstanceOrganizationView, InstanceVoterCodeView, InstanceInvitationView
 from .views import SocialUserTokenObtainPairView
 from .views import ProviderAuthView
 
@@ -24,5 +24,7 @@ urlpatterns = [
     path('instance/JSON/<str:hash>/<str:username>', InstanceJSONView.as_view(), name='instance-json'),
     path('instance/ORG/<str:hash>/', InstanceOrganizationView.as_view(), name='instance-orgs'),
     path('instance/ORG/<str:hash>/<str:username>', InstanceOrganizationView.as_view(), name='instance-orgs'),
+    path('instance/CODES/<str:hash>/', InstanceVoterCodeView.as_view(), name='instance-codes'),
+    path('instance/INVITE/<str:hash>/', InstanceInvitationView.as_view(), name='instance-invitations'),
     re_path(r"^(?P<hash>\w+)/(?P<provider>\S+)/$", ProviderAuthView.as_view(), name="provider-auth"),
 ]
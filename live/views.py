@@ -10,10 +10,9 @@ import jwt
 import datetime
 import pandas as pd
 from django.shortcuts import get_object_or_404
-from django.contrib.auth.hashers import make_password, check_password
 from django.conf import settings
-from django.http import HttpResponse
-from rest_framework import generics, permissions, status
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.exceptions import PermissionDenied, NotFound
 from rest_framework.parsers import MultiPartParser, JSONParser
@@ -21,7 +20,15 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from social_django.utils import load_backend, load_strategy
 from core.models import User
-from .models import Instance, SocialUser
+from core.throttling import VoterRateThrottle
+from core.records import RecordResponse
+from .models import Instance, SocialUser, VoterCode
+from .hashers import make_voter_password, check_voter_password
+from .codes import generate_voter_codes
+from .cache import get_instance_meta
+from .records import social_user_records
+from .deletion import delete_instance
+from .invitations import send_invitations_in_background, get_invitation_counts
 from .serializers import InstanceSerializer
 from .serializers import SocialUserSerializer, SocialUserLoginSerializer
 from .serializers import CustomProviderAuthSerializer
@@ -53,7 +60,7 @@ class InstanceListCreateView(generics.ListCreateAPIView):
         """
         Filters the instances for the current user.
         """
-        return Instance.objects.filter(user=self.request.user)
+        return Instance.objects.filter(user=self.request.user).select_related('stats')
 
     def perform_create(self, serializer):
         """
@@ -74,7 +81,7 @@ class InstanceRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         """
         Filters the instances for the current user.
         """
-        return Instance.objects.filter(user=self.request.user)
+        return Instance.objects.filter(user=self.request.user).select_related('stats')
 
     def perform_update(self, serializer):
         """
@@ -90,7 +97,7 @@ class InstanceRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         """
         if instance.user != self.request.user:
             raise PermissionDenied("You do not have permission to delete this instance.")
-        instance.delete()
+        delete_instance(instance)
 
 
 class InstanceTypeStatusView(APIView):
@@ -98,6 +105,7 @@ class InstanceTypeStatusView(APIView):
     Get the type and status of all instances without authentication.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [VoterRateThrottle]
 
     def post(self, request):
         """
@@ -108,7 +116,7 @@ class InstanceTypeStatusView(APIView):
             return Response({"detail": "Hash is required."}, status=400)
 
         try:
-            instance = Instance.objects.get(hash=hash_value)
+            instance = get_instance_meta(hash_value)
         except Instance.DoesNotExist:
             raise NotFound("Instance with the provided hash does not exist.")
 
@@ -146,6 +154,7 @@ class InstanceCSVView(APIView):
         for index, row in df.iterrows():
             first_name = request.data.get('first_name', '')
             last_name = request.data.get('last_name', '')
+            email = request.data.get('email', '')
             username = request.data.get('username')
             password = request.data.get('password')
 
@@ -165,8 +174,9 @@ class InstanceCSVView(APIView):
                     user_social_type=0x1 << 1,
                     first_name=row[first_name] if not pd.isnull(row[first_name]) else '',
                     last_name=row[last_name] if not pd.isnull(row[last_name]) else '',
+                    email=row[email] if email in df.columns and not pd.isnull(row[email]) else '',
                     username=row[username],
-                    password=make_password(row[password]),
+                    password=make_voter_password(row[password], instance),
                 )
             except Exception as e:
                 return Response({"detail": f"{e}"}, status=status.HTTP_400_BAD_REQUEST)
@@ -200,8 +210,7 @@ class InstanceCSVView(APIView):
 
         users = SocialUser.objects.filter(
             instance=instance, user_social_type=USER_SOCIAL_TYPE_USER_LIST)
-        serializer = SocialUserSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return RecordResponse(social_user_records(users), status=status.HTTP_200_OK)
 
     def patch(self, request, hash, username, *args, **kwargs):
         """
@@ -261,6 +270,7 @@ class InstanceJSONView(APIView):
         for index, row in df.iterrows():
             first_name = request.data.get('first_name', '')
             last_name = request.data.get('last_name', '')
+            email = request.data.get('email', '')
             username = request.data.get('username')
             password = request.data.get('password')
 
@@ -281,8 +291,9 @@ class InstanceJSONView(APIView):
                     user_social_type=0x1 << 1,
                     first_name=row[first_name] if not pd.isnull(row[first_name]) else '',
                     last_name=row[last_name] if not pd.isnull(row[last_name]) else '',
+                    email=row[email] if email in df.columns and not pd.isnull(row[email]) else '',
                     username=row[username],
-                    password=make_password(row[password]),
+                    password=make_voter_password(row[password], instance),
                 )
             except Exception as e:
                 return Response({"detail": f"{e}"}, status=status.HTTP_400_BAD_REQUEST)
@@ -314,8 +325,7 @@ class InstanceJSONView(APIView):
 
         users = SocialUser.objects.filter(
             instance=instance, user_social_type=USER_SOCIAL_TYPE_USER_LIST)
-        serializer = SocialUserSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return RecordResponse(social_user_records(users), status=status.HTTP_200_OK)
 
     def patch(self, request, hash, username, *args, **kwargs):
         """
@@ -398,8 +408,81 @@ class InstanceOrganizationView(APIView):
 
         users = SocialUser.objects.filter(
             instance=instance, user_social_type=USER_SOCIAL_TYPE_OAUTH)
-        serializer = SocialUserSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return RecordResponse(social_user_records(users), status=status.HTTP_200_OK)
+
+
+class InstanceVoterCodeView(APIView):
+    """
+    View to generate and count the single-use voter codes of an instance.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, hash, *args, **kwargs):
+        """
+        Handle GET request to get the number of generated and used voter codes.
+        """
+        try:
+            instance = Instance.getInstance(hash, request.user)
+        except Instance.DoesNotExist:
+            return Response({"detail": "Instance with the provided hash does not exist."},
+                            status=404)
+        codes = VoterCode.objects.filter(instance=instance)
+        return Response({"total": codes.count(), "used": codes.filter(used_at__isnull=False).count()},
+                        status=status.HTTP_200_OK)
+
+    def post(self, request, hash, *args, **kwargs):
+        """
+        Handle POST request to generate voter codes, streamed back as a CSV file.
+        """
+        try:
+            instance = Instance.getInstance(hash, request.user)
+        except Instance.DoesNotExist:
+            return Response({"detail": "Instance with the provided hash does not exist."},
+                            status=404)
+        try:
+            count = int(request.data.get('count'))
+        except (TypeError, ValueError):
+            return Response({"detail": "Count is required."}, status=400)
+        max_count = getattr(settings, 'VOTER_CODES_MAX_PER_REQUEST', 100000)
+        if count < 1 or count > max_count:
+            return Response({"detail": f"Count must be between 1 and {max_count}."}, status=400)
+
+        rows = (f"{code}\n" for code in generate_voter_codes(instance, count))
+        response = StreamingHttpResponse(rows, content_type='text/csv', status=status.HTTP_201_CREATED)
+        response['Content-Disposition'] = 'attachment; filename="codes.csv"'
+        return response
+
+
+class InstanceInvitationView(APIView):
+    """
+    View to send the invitation emails of the listed social users of an instance.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, hash, *args, **kwargs):
+        """
+        Handle GET request to get the number of invitable, sent and failed invitations.
+        """
+        try:
+            instance = Instance.getInstance(hash, request.user)
+        except Instance.DoesNotExist:
+            return Response({"detail": "Instance with the provided hash does not exist."},
+                            status=404)
+        return Response(get_invitation_counts(instance), status=status.HTTP_200_OK)
+
+    def post(self, request, hash, *args, **kwargs):
+        """
+        Handle POST request to start sending the invitations in the background.
+        """
+        try:
+            instance = Instance.getInstance(hash, request.user)
+        except Instance.DoesNotExist:
+            return Response({"detail": "Instance with the provided hash does not exist."},
+                            status=404)
+        resend = serializers.BooleanField().to_internal_value(request.data.get('resend', False))
+        if not send_invitations_in_background(instance, resend=resend):
+            return Response({"detail": "Invitations are already being sent"}, status=status.HTTP_409_CONFLICT)
+        return Response({"message": "Invitations are being sent"}, status=status.HTTP_202_ACCEPTED)
 
 
 class SocialUserTokenObtainPairView(APIView):
@@ -407,6 +490,7 @@ class SocialUserTokenObtainPairView(APIView):
     View to obtain the token pair for the SocialUser object.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [VoterRateThrottle]
 
     def post(self, request, hash, *args, **kwargs):
         """
@@ -417,17 +501,17 @@ class SocialUserTokenObtainPairView(APIView):
         username = serializer.validated_data['username']
         password = serializer.validated_data['password']
         try:
-            instance = Instance.getExistingInstance(hash)
+            instance = get_instance_meta(hash)
         except Instance.DoesNotExist:
             return Response({"detail": "Instance with the provided hash does not exist."},
                             status=404)
         try:
-            social_user = SocialUser.objects.get(username=username, instance=instance)
+            social_user = SocialUser.objects.get(username=username, instance_id=instance.id)
         except SocialUser.DoesNotExist:
             return Response({"detail": "Invalid credentials"},
                             status=status.HTTP_401_UNAUTHORIZED)
 
-        if not check_password(password, social_user.password):
+        if not check_voter_password(password, social_user, instance):
             return Response({"detail": "Invalid credentials"},
                             status=status.HTTP_401_UNAUTHORIZED)
 